@@ -22,10 +22,18 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 # SECURITY WARNING: keep the secret key used in production secret!
 SECRET_KEY = 'django-insecure--ix_u5u55q4t*dtb^c1)arm_l$p$)@szwhf+euf!hnbtcjx+jz'
 
-# SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
-
 import os
+import sys
+
+
+def env_flag(name, default):
+    """Read a boolean setting from the environment"""
+    return os.environ.get(name, str(default)).lower() in ('1', 'true', 'yes')
+
+
+# SECURITY WARNING: don't run with debug turned on in production!
+# Set DJANGO_DEBUG=False in production to enable the hashed static pipeline below.
+DEBUG = env_flag('DJANGO_DEBUG', True)
 
 ALLOWED_HOSTS = [
     'bo-rangers-fc-ticketing-system-driz.onrender.com',
@@ -49,10 +57,17 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    # WhiteNoise, wrapped so it does not force ASGI requests onto a thread
+    'ticketing.static_files.AsyncWhiteNoiseMiddleware',
+    # Outside everything that queries, so session and role lookups are counted
+    'ticketing.request_profiling.RequestProfilingMiddleware',
+    # Before sessions so a session write also pins the client to the primary
+    'ticketing.db_router.ReplicaRoutingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'ticketing.roles.RoleMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -61,7 +76,8 @@ ROOT_URLCONF = 'borangersfc.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates, timing renders for the request profile
+        'BACKEND': 'ticketing.request_profiling.ProfiledDjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -80,11 +96,127 @@ WSGI_APPLICATION = 'borangersfc.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# DJANGO_DB_ENGINE selects 'sqlite' (default) or 'postgresql'; the other
+# DJANGO_DB_* variables describe the PostgreSQL server.
+DB_ENGINE = os.environ.get('DJANGO_DB_ENGINE', 'sqlite')
+
+if DB_ENGINE == 'postgresql':
+    # DJANGO_DB_POOL=True uses Django's psycopg connection pool; otherwise
+    # each worker thread keeps its own connection for DJANGO_DB_CONN_MAX_AGE
+    # seconds. Either way connections are health-checked before reuse.
+    DB_POOL = env_flag('DJANGO_DB_POOL', True)
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('DJANGO_DB_NAME', 'borangersfc'),
+            'USER': os.environ.get('DJANGO_DB_USER', 'postgres'),
+            'PASSWORD': os.environ.get('DJANGO_DB_PASSWORD', ''),
+            'HOST': os.environ.get('DJANGO_DB_HOST', 'localhost'),
+            'PORT': os.environ.get('DJANGO_DB_PORT', '5432'),
+            # Pooled connections go back to the pool instead of persisting
+            'CONN_MAX_AGE': 0 if DB_POOL else int(os.environ.get('DJANGO_DB_CONN_MAX_AGE', 600)),
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                'pool': {
+                    'min_size': int(os.environ.get('DJANGO_DB_POOL_MIN_SIZE', 2)),
+                    'max_size': int(os.environ.get('DJANGO_DB_POOL_MAX_SIZE', 10)),
+                    'timeout': int(os.environ.get('DJANGO_DB_POOL_TIMEOUT', 10)),
+                },
+            } if DB_POOL else {},
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('DJANGO_DB_NAME', BASE_DIR / 'db.sqlite3'),
+        }
+    }
+
+# Production SQLite profile: WAL lets reads run alongside a writer and
+# writers queue on the busy timeout instead of failing with "database is
+# locked". On by default when DEBUG is off.
+SQLITE_PRODUCTION = env_flag('DJANGO_SQLITE_PRODUCTION', not DEBUG)
+# BEGIN IMMEDIATE takes the write lock when any transaction.atomic() block
+# opens, so a transaction never has to upgrade a read lock mid-way, but
+# every atomic block then locks out all other writers while it runs. Opt in
+# once no atomic block waits on a client or other slow I/O
+SQLITE_IMMEDIATE_TRANSACTIONS = env_flag('DJANGO_SQLITE_IMMEDIATE', False)
+SQLITE_PRODUCTION_OPTIONS = {
+    'timeout': 20,  # seconds; sets SQLite's busy_timeout
+    'init_command': (
+        'PRAGMA journal_mode=WAL;'
+        'PRAGMA synchronous=NORMAL;'
+        'PRAGMA mmap_size=134217728;'
+        'PRAGMA cache_size=-20000;'
+        'PRAGMA temp_store=MEMORY;'
+    ),
+}
+if SQLITE_IMMEDIATE_TRANSACTIONS:
+    SQLITE_PRODUCTION_OPTIONS['transaction_mode'] = 'IMMEDIATE'
+if DB_ENGINE == 'sqlite' and SQLITE_PRODUCTION:
+    DATABASES['default']['OPTIONS'] = SQLITE_PRODUCTION_OPTIONS
+
+# Read replicas: DJANGO_DB_REPLICAS lists replica hosts (PostgreSQL) or
+# database files (SQLite), comma separated. Each becomes a replicaN alias
+# that safe requests read from (see ticketing/db_router.py).
+DATABASE_REPLICAS = []
+for index, location in enumerate(filter(None, os.environ.get('DJANGO_DB_REPLICAS', '').split(',')), 1):
+    alias = f'replica{index}'
+    DATABASES[alias] = dict(
+        DATABASES['default'],
+        **{'HOST' if DB_ENGINE == 'postgresql' else 'NAME': location.strip()},
+        TEST={'MIRROR': 'default'},
+    )
+    DATABASE_REPLICAS.append(alias)
+DATABASE_ROUTERS = ['ticketing.db_router.PrimaryReplicaRouter']
+# Seconds a client reads from the primary after writing
+REPLICA_PIN_SECONDS = 10
+
+# The cache is per-process unless DJANGO_REDIS_URL names a shared one.
+# Production needs it shared so login throttling counts every worker's
+# failures (see ticketing/throttling.py; check --deploy warns otherwise)
+if os.environ.get('DJANGO_REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['DJANGO_REDIS_URL'],
+        }
     }
+
+# Seconds a resolved UserProfile role is cached (see ticketing/roles.py)
+ROLE_CACHE_TIMEOUT = 300
+
+# Per-request query and timing budgets (see ticketing/request_profiling.py)
+# Requests over either budget are logged on the ticketing.performance logger.
+# Off unless DEBUG; set DJANGO_REQUEST_PROFILING=True to profile production
+REQUEST_PROFILING = env_flag('DJANGO_REQUEST_PROFILING', DEBUG)
+REQUEST_QUERY_BUDGET = 25
+REQUEST_TIME_BUDGET_MS = 500
+# Views that hash a password, which PBKDF2 makes slow on purpose, get their own
+REQUEST_TIME_BUDGETS_MS = {'login': 2000, 'register': 2000, 'admin:login': 2000}
+# The same query shape this many times in one request is logged as a probable N+1
+N_PLUS_ONE_THRESHOLD = 5
+# Recent requests per view kept for the staff summary at /admin-performance/
+REQUEST_PROFILE_WINDOW = 200
+
+# Test runs are slower than production and cross the time budget for reasons
+# unrelated to the code, so only errors are logged there. Tests expecting a
+# warning still capture it with assertLogs
+TESTING = sys.argv[1:2] == ['test']
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'ticketing.performance': {
+            'handlers': ['console'],
+            'level': 'ERROR' if TESTING else 'WARNING',
+            'propagate': False,
+        },
+    },
 }
 
 
@@ -126,6 +258,22 @@ STATIC_URL = 'static/'
 STATICFILES_DIRS = [
     BASE_DIR / "static",
 ]
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+
+# In production collectstatic writes content-hashed copies of every file plus
+# gzip and Brotli versions, and WhiteNoise serves the hashed names with
+# far-future immutable Cache-Control headers. Development keeps plain names.
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': (
+            'django.contrib.staticfiles.storage.StaticFilesStorage' if DEBUG
+            else 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+        ),
+    },
+}
 
 # Media files
 MEDIA_URL = '/media/'
@@ -136,3 +284,49 @@ MEDIA_ROOT = BASE_DIR / 'media'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 LOGOUT_REDIRECT_URL = '/login/'
+
+# Conditional GET / HTTP caching
+# Seconds a shared cache may serve anonymous public pages without revalidating
+PUBLIC_PAGE_MAX_AGE = 60
+
+# Responsive image derivatives (see ticketing/images.py)
+IMAGE_DERIVATIVE_WIDTHS = (96, 320, 640, 1280)
+# Generate derivatives on a background thread after upload
+IMAGE_DERIVATIVES_ASYNC = True
+
+# Update the related-articles index on a background thread after an
+# article is saved (see ticketing/related_news.py)
+RELATED_NEWS_ASYNC = True
+
+# Chunked news video uploads (see ticketing/video_uploads.py)
+# Partially uploaded files are kept here, outside MEDIA_ROOT, until reassembled
+CHUNKED_UPLOAD_DIR = BASE_DIR / 'chunked_uploads'
+VIDEO_UPLOAD_CHUNK_SIZE = 4 * 1024 * 1024
+VIDEO_UPLOAD_MAX_SIZE = 2 * 1024 * 1024 * 1024
+
+# Ticket QR codes are rendered on demand (see ticketing/qr_codes.py)
+# Sharded on-disk render cache, outside MEDIA_ROOT
+QR_CACHE_DIR = BASE_DIR / 'qr_cache'
+QR_MEMORY_CACHE_SIZE = 256
+QR_DISK_CACHE_MAX_FILES = 100_000
+
+# Orphaned media collection (manage.py collect_orphaned_media)
+# Patterns of further media files to keep; files templates link to by
+# path, such as qr_codes/Logo.png, are kept automatically
+MEDIA_GC_KEEP = []
+
+# Login throttling (see ticketing/throttling.py): (failures, window seconds)
+LOGIN_THROTTLE_USERNAME = (5, 300)
+# Generous, since a whole stand may share one mobile carrier address
+LOGIN_THROTTLE_IP = (50, 300)
+# Reverse proxies in front of the app that append to X-Forwarded-For
+TRUSTED_PROXY_COUNT = int(os.environ.get('DJANGO_TRUSTED_PROXIES', 0))
+
+# Most events accepted in one POST to the live-event ingestion endpoint
+MATCH_EVENT_BATCH_LIMIT = 500
+
+# Live match push (see ticketing/live.py); needs an ASGI server
+# Seconds between checks for score changes made by other processes
+LIVE_POLL_INTERVAL = 2.0
+# Seconds between keep-alive comments on an idle event stream
+LIVE_HEARTBEAT_INTERVAL = 15
@@ -0,0 +1,154 @@
+// Chunked, resumable upload of news videos (see ticketing/video_uploads.py)
+
+document.addEventListener('DOMContentLoaded', function() {
+    const form = document.querySelector('form[data-video-upload-url]');
+    if (!form) {
+        return;
+    }
+    
+    const fileInput = form.querySelector('input[type="file"][name="video"]');
+    const uploadInput = form.querySelector('input[name="video_upload"]');
+    const csrfToken = form.querySelector('[name=csrfmiddlewaretoken]').value;
+    const baseUrl = form.dataset.videoUploadUrl;
+    let uploading = false;
+    
+    if (!fileInput || !uploadInput) {
+        return;
+    }
+    
+    fileInput.addEventListener('change', function() {
+        uploadInput.value = '';
+    });
+    
+    form.addEventListener('submit', async function(e) {
+        // Leave other validation failures and forms without a video alone
+        if (e.defaultPrevented || !fileInput.files.length || uploadInput.value) {
+            return;
+        }
+        e.preventDefault();
+        if (uploading) {
+            return;
+        }
+        
+        uploading = true;
+        try {
+            uploadInput.value = await uploadVideo(fileInput.files[0]);
+            // The video is already on the server; don't send it again
+            fileInput.value = '';
+            form.submit();
+        } catch (error) {
+            alert('Video upload failed: ' + error.message + '\nSubmit the form again to resume.');
+        } finally {
+            uploading = false;
+        }
+    });
+    
+    async function uploadVideo(file) {
+        const resumeKey = ['video-upload', file.name, file.size, file.lastModified].join(':');
+        let uploadId = localStorage.getItem(resumeKey);
+        let offset = 0;
+        let chunkSize = 0;
+        
+        // Resume an earlier attempt for the same file if the server still has it
+        if (uploadId) {
+            const status = await fetchJson(`${baseUrl}${uploadId}/`, {}).catch(() => null);
+            if (status && status.success) {
+                if (status.complete) {
+                    localStorage.removeItem(resumeKey);
+                    return uploadId;
+                }
+                offset = status.offset;
+                chunkSize = status.chunk_size;
+            } else {
+                uploadId = null;
+            }
+        }
+        
+        if (!uploadId) {
+            const started = await fetchJson(baseUrl, {
+                method: 'POST',
+                headers: {'X-CSRFToken': csrfToken, 'Content-Type': 'application/json'},
+                body: JSON.stringify({filename: file.name, size: file.size}),
+            });
+            if (!started.success) {
+                throw new Error(started.error);
+            }
+            uploadId = started.upload_id;
+            chunkSize = started.chunk_size;
+            localStorage.setItem(resumeKey, uploadId);
+        }
+        
+        const progress = showProgress();
+        while (offset < file.size) {
+            const chunk = file.slice(offset, offset + chunkSize);
+            const headers = {
+                'X-CSRFToken': csrfToken,
+                'Content-Type': 'application/octet-stream',
+                'Upload-Offset': String(offset),
+            };
+            if (window.crypto && window.crypto.subtle) {
+                headers['Upload-Checksum'] = toHex(await crypto.subtle.digest('SHA-256', await chunk.arrayBuffer()));
+            }
+            
+            const result = await withRetries(() => fetchJson(`${baseUrl}${uploadId}/chunk/`, {
+                method: 'POST',
+                headers: headers,
+                body: chunk,
+            }));
+            if (!result.success) {
+                // The server is ahead of or behind us: continue from its offset
+                if (typeof result.offset === 'number' && result.offset !== offset) {
+                    offset = result.offset;
+                    continue;
+                }
+                throw new Error(result.error);
+            }
+            offset = result.offset;
+            progress(offset / file.size);
+        }
+        
+        localStorage.removeItem(resumeKey);
+        return uploadId;
+    }
+    
+    async function fetchJson(url, options) {
+        const response = await fetch(url, Object.assign({credentials: 'same-origin'}, options));
+        if (!response.ok) {
+            throw new Error(`Server responded with ${response.status}`);
+        }
+        return response.json();
+    }
+    
+    async function withRetries(request, attempts = 4) {
+        for (let attempt = 1; ; attempt++) {
+            try {
+                return await request();
+            } catch (error) {
+                if (attempt >= attempts) {
+                    throw error;
+                }
+                await new Promise(resolve => setTimeout(resolve, 1000 * 2 ** attempt));
+            }
+        }
+    }
+    
+    function toHex(buffer) {
+        return Array.from(new Uint8Array(buffer)).map(b => b.toString(16).padStart(2, '0')).join('');
+    }
+    
+    function showProgress() {
+        let bar = form.querySelector('.video-upload-progress');
+        if (!bar) {
+            bar = document.createElement('div');
+            bar.className = 'progress mt-2 video-upload-progress';
+            bar.innerHTML = '<div class="progress-bar bg-danger" role="progressbar" style="width: 0%">0%</div>';
+            fileInput.parentNode.appendChild(bar);
+        }
+        const inner = bar.querySelector('.progress-bar');
+        return function(fraction) {
+            const percent = Math.round(fraction * 100) + '%';
+            inner.style.width = percent;
+            inner.textContent = percent;
+        };
+    }
+});
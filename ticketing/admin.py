@@ -1,5 +1,7 @@
 from django.contrib import admin
+from django.urls import reverse
 from django.utils.html import format_html
+from .match_stats import rebuild_counters
 from .models import Match, TicketCategory, Ticket, News, UserProfile, Report, MatchEvent
 
 
@@ -10,6 +12,8 @@ class MatchAdmin(admin.ModelAdmin):
     search_fields = ['title', 'opponent', 'venue']
     ordering = ['-date']
     date_hierarchy = 'date'
+    readonly_fields = ['generated_summary', 'generated_highlights']
+    actions = ['rebuild_counters_from_events']
     
     fieldsets = (
         ('Match Information', {
@@ -22,6 +26,12 @@ class MatchAdmin(admin.ModelAdmin):
             'fields': ('home_score', 'away_score', 'match_summary', 'highlights', 'attendance', 'weather', 'referee'),
             'classes': ('collapse',)
         }),
+        ('Generated Texts', {
+            'fields': ('generated_summary', 'generated_highlights'),
+            'description': 'Rebuilt automatically when the match is saved or its events change. '
+                           'Shown on the match page when Match Summary / Highlights are left blank.',
+            'classes': ('collapse',)
+        }),
         ('Statistics', {
             'fields': (
                 'possession_home', 'possession_away',
@@ -50,6 +60,11 @@ class MatchAdmin(admin.ModelAdmin):
         count = obj.ticket_set.filter(payment_status='completed').count()
         return f"{count} tickets"
     tickets_sold.short_description = "Tickets Sold"
+    
+    @admin.action(description="Rebuild score and counters from events")
+    def rebuild_counters_from_events(self, request, queryset):
+        updated = rebuild_counters(queryset)
+        self.message_user(request, f"Rebuilt score and counters for {updated} matches.")
 
 
 @admin.register(MatchEvent)
@@ -102,6 +117,13 @@ class TicketAdmin(admin.ModelAdmin):
         return f"{str(obj.ticket_id)[:8]}..."
     ticket_id_short.short_description = "Ticket ID"
     
+    def qr_code(self, obj):
+        if obj.pk and obj.payment_status == 'completed':
+            return format_html('<img src="{}" alt="QR Code" style="max-width: 150px;">',
+                               reverse('ticket_qr', args=[obj.ticket_id]))
+        return "-"
+    qr_code.short_description = "QR Code"
+    
     def has_add_permission(self, request):
         # Prevent manual ticket creation through admin
         return False
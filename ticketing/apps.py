@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class TicketingConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'ticketing'
+
+    def ready(self):
+        from django.core import checks
+        from . import signals  # noqa: F401
+        from .throttling import check_shared_cache
+        checks.register(check_shared_cache, checks.Tags.caches, deploy=True)
@@ -0,0 +1,109 @@
+import hashlib
+from functools import wraps
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.db.models import Count, Max
+from django.middleware.csrf import get_token
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.views.decorators.http import condition
+
+
+def content_version(queryset):
+    """Return (last_modified, token) describing the current state of a queryset.
+
+    The row count is part of the token so deletions, which leave no
+    timestamp behind, still change the ETag.
+    """
+    stats = queryset.aggregate(last_modified=Max('updated_at'), total=Count('id'))
+    last_modified = stats['last_modified']
+    stamp = int(last_modified.timestamp() * 1000000) if last_modified else 0
+    return last_modified, f"{stats['total']}.{stamp}"
+
+
+def combine_versions(*versions):
+    """Merge several content versions into one."""
+    timestamps = [last_modified for last_modified, _ in versions if last_modified]
+    last_modified = max(timestamps) if timestamps else None
+    return last_modified, '-'.join(token for _, token in versions)
+
+
+def _is_personalised(request):
+    # Logged-in pages carry the username and a CSRF token, and flashed
+    # messages are shown once; none of that may be shared by a proxy.
+    return request.user.is_authenticated or len(get_messages(request)) > 0
+
+
+def conditional_page(version_func, max_age=None):
+    """Add ETag/Last-Modified handling and cache headers to a public view.
+
+    ``version_func(request, *args, **kwargs)`` returns a
+    ``(last_modified, token)`` pair (see ``content_version``) and is
+    evaluated at most once per request. Anonymous responses are marked
+    public so an edge proxy can serve them; personalised responses are
+    private and must be revalidated, which the ETag makes cheap.
+    """
+    if max_age is None:
+        max_age = getattr(settings, 'PUBLIC_PAGE_MAX_AGE', 60)
+
+    def decorator(view_func):
+        def get_version(request, *args, **kwargs):
+            if not hasattr(request, '_content_version'):
+                request._content_version = version_func(request, *args, **kwargs)
+            return request._content_version
+
+        def etag_func(request, *args, **kwargs):
+            if len(get_messages(request)) > 0:
+                return None
+            _, token = get_version(request, *args, **kwargs)
+            if not request.user.is_authenticated:
+                return f"{token}-anon"
+            # The page embeds the CSRF token and the staff navigation, so a
+            # new login or a role change must not revalidate an old copy.
+            # get_token() is masked afresh on each call; key on the secret.
+            get_token(request)
+            secret = hashlib.sha256(request.META['CSRF_COOKIE'].encode()).hexdigest()[:12]
+            return f"{token}-{request.user.pk}-{int(request.user.is_staff)}-{secret}"
+
+        def last_modified_func(request, *args, **kwargs):
+            # Last-Modified cannot tell two users apart, so it is only
+            # offered for anonymous responses.
+            if _is_personalised(request):
+                return None
+            last_modified, _ = get_version(request, *args, **kwargs)
+            return last_modified
+
+        conditional_view = condition(etag_func=etag_func, last_modified_func=last_modified_func)(view_func)
+
+        def add_cache_headers(request, response):
+            if response.status_code in (200, 304):
+                if _is_personalised(request):
+                    patch_cache_control(response, private=True, no_cache=True)
+                else:
+                    patch_cache_control(response, public=True, max_age=max_age)
+                patch_vary_headers(response, ('Cookie',))
+            return response
+
+        if iscoroutinefunction(view_func):
+            def prepare(request, *args, **kwargs):
+                # The ETag checks are synchronous: run the version query and
+                # load the session and user here so they only read cached values
+                get_version(request, *args, **kwargs)
+                _is_personalised(request)
+
+            @wraps(view_func)
+            async def _async_wrapped_view(request, *args, **kwargs):
+                await sync_to_async(prepare)(request, *args, **kwargs)
+                response = await conditional_view(request, *args, **kwargs)
+                return add_cache_headers(request, response)
+
+            return _async_wrapped_view
+
+        @wraps(view_func)
+        def _wrapped_view(request, *args, **kwargs):
+            response = conditional_view(request, *args, **kwargs)
+            return add_cache_headers(request, response)
+
+        return _wrapped_view
+
+    return decorator
@@ -0,0 +1,113 @@
+"""
+Primary/replica database routing.
+
+Writes always go to ``default``. Reads go to a random alias from
+DATABASE_REPLICAS only while handling a safe (GET/HEAD/OPTIONS) request
+from a client that has not written recently; everywhere else, including
+management commands and background threads, they stay on the primary.
+
+After a request writes, ReplicaRoutingMiddleware sets a short-lived
+cookie that pins that browser to the primary for REPLICA_PIN_SECONDS, so
+``payment`` -> ``ticket_detail`` reads its own write even if replicas lag.
+The pin is a cookie rather than a session key because loading the
+session would itself be a read that might hit a stale replica.
+"""
+import random
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.conf import settings
+
+PRIMARY = 'default'
+PIN_COOKIE = 'db_primary'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class RoutingState:
+    def __init__(self, use_replica):
+        self.use_replica = use_replica
+        self.wrote = False
+
+
+_state = ContextVar('db_routing_state', default=None)
+
+
+@contextmanager
+def replica_reads(use_replica=True):
+    """Route reads inside the block to replicas (or not); yields the state"""
+    state = RoutingState(use_replica)
+    token = _state.set(state)
+    try:
+        yield state
+    finally:
+        _state.reset(token)
+
+
+def replica_aliases():
+    return getattr(settings, 'DATABASE_REPLICAS', [])
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        replicas = replica_aliases()
+        if state is None or not state.use_replica or not replicas:
+            return PRIMARY
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            # Everything after a write in this request reads the primary
+            state.wrote = True
+            state.use_replica = False
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {PRIMARY, *replica_aliases()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in replica_aliases():
+            return False
+        return None
+
+
+class ReplicaRoutingMiddleware:
+    """Serve safe requests from replicas unless the client wrote recently"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        with replica_reads(self.use_replica(request)) as state:
+            response = self.get_response(request)
+        return self.pin(request, state, response)
+
+    async def __acall__(self, request):
+        # ORM calls made through sync_to_async copy the context, so they
+        # see (and mark) the same state
+        with replica_reads(self.use_replica(request)) as state:
+            response = await self.get_response(request)
+        return self.pin(request, state, response)
+
+    def use_replica(self, request):
+        return request.method in SAFE_METHODS and PIN_COOKIE not in request.COOKIES
+
+    def pin(self, request, state, response):
+        if state.wrote or request.method not in SAFE_METHODS:
+            response.set_cookie(
+                PIN_COOKIE, '1',
+                max_age=getattr(settings, 'REPLICA_PIN_SECONDS', 10),
+                httponly=True, samesite='Lax',
+            )
+        return response
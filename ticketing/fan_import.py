@@ -0,0 +1,258 @@
+"""
+Bulk registration of supporter-club members from CSV or XLSX files.
+
+Rows are streamed from the file and checked in memory against each other
+and against existing accounts: usernames are unique regardless of case,
+as in the registration form, and so are phone numbers once spaces and
+punctuation are stripped. Accepted rows are written in chunks, users and
+profiles together in one transaction per chunk.
+
+PBKDF2 hashing dominates the cost, so passwords are hashed across a
+process pool while the main process reads, checks and saves the chunks
+either side. Rows without a password get an unusable one and no hash;
+those members set a password through the reset flow.
+"""
+import csv
+import os
+import re
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import chain, islice
+from pathlib import Path
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.contrib.auth.password_validation import validate_password
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from .models import UserProfile
+
+FIELDS = ('username', 'password', 'email', 'first_name', 'last_name', 'phone')
+CHUNK_SIZE = 1000
+
+PHONE_RE = re.compile(r'^\+?\d{6,15}$')
+PHONE_PUNCTUATION_RE = re.compile(r'[\s\-().]')
+
+
+class FanImportError(Exception):
+    """The file cannot be imported at all"""
+
+
+class ImportResult:
+    def __init__(self):
+        self.created = 0
+        # (row number, username, [messages])
+        self.rejected = []
+
+
+def normalise_phone(phone):
+    return PHONE_PUNCTUATION_RE.sub('', phone or '')
+
+
+def normalise_header(name):
+    return str(name or '').strip().lower().replace(' ', '_')
+
+
+def cell_text(value):
+    """Spreadsheet cells as text; numeric phone numbers lose their '.0'"""
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+def read_rows(path):
+    """Yield (row number, {field: text}) for each non-blank row of a CSV or XLSX file"""
+    if Path(path).suffix.lower() == '.xlsx':
+        return _xlsx_rows(path)
+    return _csv_rows(path)
+
+
+def _csv_rows(path):
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        reader = csv.reader(f)
+        yield from _records(next(reader, None), reader)
+
+
+def _xlsx_rows(path):
+    from openpyxl import load_workbook
+
+    # Read-only mode streams rows instead of loading the whole sheet
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        yield from _records(next(rows, None), rows)
+    finally:
+        workbook.close()
+
+
+def _records(header, rows):
+    if not header:
+        raise FanImportError('The file is empty')
+    columns = [normalise_header(name) for name in header]
+    if 'username' not in columns:
+        raise FanImportError('The file has no "username" column')
+    for number, row in enumerate(rows, start=2):
+        values = [cell_text(value) for value in row]
+        if any(values):
+            record = dict.fromkeys(FIELDS, '')
+            record.update((column, value) for column, value in zip(columns, values) if column in FIELDS)
+            yield number, record
+
+
+class FanChecker:
+    """Validates rows and rejects duplicates within the file or of existing accounts"""
+
+    def __init__(self):
+        # Lower-cased username / normalised phone -> first row using it, None if already registered
+        self.usernames = dict.fromkeys(
+            username.lower() for username in User.objects.values_list('username', flat=True).iterator()
+        )
+        self.phones = dict.fromkeys(
+            normalise_phone(phone)
+            for phone in UserProfile.objects.exclude(phone='').values_list('phone', flat=True).iterator()
+        )
+        self.max_lengths = {field: User._meta.get_field(field).max_length
+                            for field in ('username', 'email', 'first_name', 'last_name')}
+
+    def check(self, number, row):
+        """Return (cleaned row, errors); a cleaned row reserves its username and phone"""
+        errors = []
+        for field, max_length in self.max_lengths.items():
+            if len(row[field]) > max_length:
+                errors.append(f'{field.replace("_", " ").capitalize()} is longer than {max_length} characters')
+
+        username = row['username']
+        if not username:
+            errors.append('Username is required')
+        else:
+            try:
+                User.username_validator(username)
+            except ValidationError as e:
+                errors.extend(e.messages)
+            errors.extend(self.duplicate('Username', self.usernames, username.lower()))
+
+        if row['email']:
+            try:
+                validate_email(row['email'])
+            except ValidationError as e:
+                errors.extend(e.messages)
+
+        phone = normalise_phone(row['phone'])
+        if phone:
+            if not PHONE_RE.match(phone):
+                errors.append('Enter a valid phone number')
+            else:
+                errors.extend(self.duplicate('Phone number', self.phones, phone))
+
+        if row['password']:
+            user = User(username=username, email=row['email'],
+                        first_name=row['first_name'], last_name=row['last_name'])
+            try:
+                validate_password(row['password'], user)
+            except ValidationError as e:
+                errors.extend(e.messages)
+
+        if errors:
+            return None, errors
+        self.usernames[username.lower()] = number
+        if phone:
+            self.phones[phone] = number
+        return dict(row, phone=phone), []
+
+    @staticmethod
+    def duplicate(label, seen, key):
+        if key not in seen:
+            return []
+        if seen[key] is None:
+            return [f'{label} is already registered']
+        return [f'{label} duplicates row {seen[key]}']
+
+
+def hash_passwords(passwords):
+    """make_password for each password; runs in the pool's worker processes"""
+    return [make_password(password) for password in passwords]
+
+
+def _setup_worker():
+    # Forked workers inherit the configured project; spawned ones start from scratch
+    import django
+    django.setup()
+
+
+def _start_hashing(pool, chunk, workers):
+    """Hash a chunk's passwords, split across the pool; returns results or futures"""
+    passwords = [row['password'] for _number, row in chunk if row['password']]
+    if pool is None:
+        return [hash_passwords(passwords)]
+    size = max(1, -(-len(passwords) // workers))
+    return [pool.submit(hash_passwords, passwords[i:i + size]) for i in range(0, len(passwords), size)]
+
+
+def _save(chunk, hashing):
+    hashes = chain.from_iterable(part.result() if isinstance(part, Future) else part for part in hashing)
+    now = timezone.now()
+    users = [
+        User(username=row['username'], email=row['email'], first_name=row['first_name'],
+             last_name=row['last_name'], date_joined=now,
+             password=next(hashes) if row['password'] else make_password(None))
+        for _number, row in chunk
+    ]
+    with transaction.atomic():
+        User.objects.bulk_create(users)
+        UserProfile.objects.bulk_create(
+            UserProfile(user=user, phone=row['phone'], role='fan') for user, (_number, row) in zip(users, chunk)
+        )
+    return len(users)
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def import_fans(path, workers=None, chunk_size=CHUNK_SIZE, dry_run=False):
+    """Register every valid row of ``path`` as a fan and return an ImportResult.
+
+    ``workers`` processes hash passwords (default: one per CPU; 1 hashes
+    in this process). With ``dry_run`` rows are only checked; ``created``
+    then counts the rows that would be created.
+    """
+    result = ImportResult()
+    checker = FanChecker()
+
+    def accepted():
+        for number, row in read_rows(path):
+            cleaned, errors = checker.check(number, row)
+            if errors:
+                result.rejected.append((number, row['username'], errors))
+            else:
+                yield number, cleaned
+
+    if dry_run:
+        result.created = sum(1 for _row in accepted())
+        return result
+
+    workers = workers or os.cpu_count() or 1
+    pool = ProcessPoolExecutor(workers, initializer=_setup_worker) if workers > 1 else None
+    try:
+        # Chunk n is hashed while chunk n-1 is saved and chunk n+1 is read
+        pending = None
+        for chunk in chain(_chunks(accepted(), chunk_size), [None]):
+            hashing = _start_hashing(pool, chunk, workers) if chunk else None
+            if pending:
+                try:
+                    result.created += _save(*pending)
+                except IntegrityError:
+                    # Someone registered one of these usernames mid-import; the chunk is rolled back
+                    result.rejected.extend(
+                        (number, row['username'], ['Username was registered while importing; import this row again'])
+                        for number, row in pending[0]
+                    )
+            pending = (chunk, hashing)
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+    return result
@@ -1,5 +1,6 @@
 from django import forms
-from .models import Ticket, News, TicketCategory, Match
+from .models import Ticket, News, TicketCategory, Match, MatchEvent, VideoUpload
+from .video_uploads import take_assembled_file
 from django.contrib.auth.models import User
 from django.contrib.auth.forms import UserCreationForm
 
@@ -44,6 +45,8 @@ class TicketBookingForm(forms.ModelForm):
 
 
 class NewsForm(forms.ModelForm):
+    video_upload = forms.UUIDField(required=False, widget=forms.HiddenInput)
+    
     class Meta:
         model = News
         fields = ['title', 'body', 'image', 'video', 'category', 'is_featured']
@@ -55,6 +58,35 @@ class NewsForm(forms.ModelForm):
             'category': forms.Select(attrs={'class': 'form-select'}),
             'is_featured': forms.CheckboxInput(attrs={'class': 'form-check-input'}),
         }
+    
+    def __init__(self, *args, user=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Only uploads this user made can be attached
+        self.user = user
+    
+    def clean_video_upload(self):
+        """Resolve a finished chunked upload of the editing user to attach as the article video"""
+        upload_id = self.cleaned_data.get('video_upload')
+        if not upload_id:
+            return None
+        upload = VideoUpload.objects.filter(
+            upload_id=upload_id, user=self.user, completed_at__isnull=False
+        ).first()
+        if upload is None:
+            raise forms.ValidationError('No finished video upload of yours has that id.')
+        return upload
+    
+    def save(self, commit=True):
+        upload = self.cleaned_data.get('video_upload')
+        if upload:
+            video = take_assembled_file(upload)
+            self.instance.video = video
+        news = super().save(commit=commit)
+        if upload and commit:
+            # The part file has been moved into storage
+            video.close()
+            upload.delete()
+        return news
 
 
 class GatemanCreationForm(UserCreationForm):
@@ -101,3 +133,11 @@ class MatchForm(forms.ModelForm):
             'status': forms.Select(attrs={'class': 'form-select'}),
             'matchday': forms.NumberInput(attrs={'class': 'form-control', 'min': 1}),
         }
+
+
+class MatchEventForm(forms.ModelForm):
+    """Validates one event posted to the live-event ingestion endpoint"""
+
+    class Meta:
+        model = MatchEvent
+        fields = ['event_type', 'minute', 'team', 'player_name', 'description', 'additional_info']
@@ -0,0 +1,200 @@
+"""
+Resized WebP/JPEG derivatives for uploaded news images and team logos.
+
+Derivatives are written next to the original under a ``derivatives/``
+folder, named after the original and the target width, so templates can
+build ``srcset`` values from the field name alone. Generation runs on a
+background thread after the upload is committed.
+
+Which derivatives exist is cached per image, for good once every width
+narrower than the original is there (none, for small images). Each time
+an image gains derivatives, ``derivatives_version`` moves on, so
+conditional pages stop answering 304 with their srcset-less first render.
+"""
+import logging
+import os
+import time
+from datetime import datetime, timezone as dt_timezone
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+DERIVATIVE_WIDTHS = tuple(getattr(settings, 'IMAGE_DERIVATIVE_WIDTHS', (96, 320, 640, 1280)))
+DERIVATIVE_FORMATS = {
+    'webp': {'format': 'WEBP', 'quality': 80, 'method': 4},
+    'jpg': {'format': 'JPEG', 'quality': 80, 'optimize': True, 'progressive': True},
+}
+DERIVATIVE_DIR = 'derivatives'
+CACHE_PREFIX = 'image-derivatives:'
+# When any image last gained derivatives
+CHANGED_KEY = CACHE_PREFIX + 'changed'
+# Seconds before derivatives still being made are looked for again
+RECHECK_INTERVAL = 60
+# EXIF orientations that turn the image on its side
+ROTATED_ORIENTATIONS = {5, 6, 7, 8}
+
+_executor = None
+
+
+def derivative_name(name, width, extension):
+    """Storage name of one derivative, e.g. news_images/derivatives/photo-640w.webp"""
+    directory, filename = os.path.split(name)
+    stem = os.path.splitext(filename)[0]
+    return os.path.join(directory, DERIVATIVE_DIR, f'{stem}-{width}w.{extension}').replace(os.sep, '/')
+
+
+def wanted_widths(original_width):
+    """Derivative widths made for an original this wide: every one narrower than it"""
+    return tuple(width for width in DERIVATIVE_WIDTHS if width < original_width)
+
+
+def original_width(name):
+    """Display width of the original, read from its header; None if it cannot be read"""
+    from PIL import Image
+
+    try:
+        with default_storage.open(name, 'rb') as source, Image.open(source) as image:
+            rotated = image.getexif().get(0x0112) in ROTATED_ORIENTATIONS
+            return image.height if rotated else image.width
+    except Exception:
+        return None
+
+
+def derivative_info(name):
+    """``(widths, original width)`` for ``name``: the derivatives that exist, cached"""
+    if not name:
+        return (), None
+    entry = cache.get(CACHE_PREFIX + name)
+    if entry is not None and (entry['complete'] or time.time() - entry['checked'] < RECHECK_INTERVAL):
+        return entry['widths'], entry['width']
+    width = entry['width'] if entry is not None and entry['width'] else original_width(name)
+    widths = tuple(
+        derivative_width for derivative_width in DERIVATIVE_WIDTHS
+        if default_storage.exists(derivative_name(name, derivative_width, 'jpg'))
+    )
+    _remember(name, widths, width, previous=entry)
+    return widths, width
+
+
+def available_widths(name):
+    """Widths for which derivatives of ``name`` exist, cached"""
+    return derivative_info(name)[0]
+
+
+def _remember(name, widths, width, previous=None):
+    complete = width is not None and widths == wanted_widths(width)
+    cache.set(CACHE_PREFIX + name, {'widths': widths, 'width': width, 'complete': complete,
+                                    'checked': time.time()}, None)
+    if widths and (previous is None or previous['widths'] != widths):
+        cache.set(CHANGED_KEY, time.time(), None)
+
+
+def derivatives_version():
+    """Content version (see caching.py) moving on whenever an image gains derivatives"""
+    changed = cache.get(CHANGED_KEY)
+    if changed is None:
+        return None, 'i0'
+    return datetime.fromtimestamp(changed, dt_timezone.utc), f'i{int(changed * 1000000)}'
+
+
+def srcset(name, extension, widths=None, width=None):
+    """A srcset attribute value listing the derivatives of ``name``, then the original"""
+    if widths is None:
+        widths, width = derivative_info(name)
+    candidates = [
+        f'{default_storage.url(derivative_name(name, derivative_width, extension))} {derivative_width}w'
+        for derivative_width in widths
+    ]
+    if width:
+        # Wide viewports get the original rather than an upscaled derivative.
+        # Browsers decode by content, so it may close the WebP list too
+        candidates.append(f'{default_storage.url(name)} {width}w')
+    return ', '.join(candidates)
+
+
+def _encode(image, extension):
+    from PIL import Image
+
+    options = dict(DERIVATIVE_FORMATS[extension])
+    image_format = options.pop('format')
+    if image_format == 'JPEG' and image.mode != 'RGB':
+        # JPEG has no alpha channel; flatten transparent logos onto white
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        rgba = image.convert('RGBA')
+        background.paste(rgba, mask=rgba.getchannel('A'))
+        image = background
+    elif image_format == 'WEBP' and image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA')
+    buffer = BytesIO()
+    image.save(buffer, image_format, **options)
+    return buffer.getvalue()
+
+
+def generate_derivatives(name, force=False):
+    """Write every derivative narrower than the original. Returns the widths made."""
+    from PIL import Image, ImageOps
+
+    if not force:
+        widths, width = derivative_info(name)
+        if width is not None and widths == wanted_widths(width):
+            return widths
+
+    widths = []
+    with default_storage.open(name, 'rb') as source:
+        with Image.open(source) as original:
+            original = ImageOps.exif_transpose(original)
+            natural_width = original.width
+            if original.mode == 'P':
+                original = original.convert('RGBA')
+            for width in DERIVATIVE_WIDTHS:
+                if width >= original.width:
+                    break
+                height = max(1, round(original.height * width / original.width))
+                resized = original.resize((width, height), Image.Resampling.LANCZOS, reducing_gap=3.0)
+                for extension in DERIVATIVE_FORMATS:
+                    target = derivative_name(name, width, extension)
+                    if default_storage.exists(target):
+                        default_storage.delete(target)
+                    default_storage.save(target, ContentFile(_encode(resized, extension)))
+                widths.append(width)
+
+    previous = cache.get(CACHE_PREFIX + name)
+    _remember(name, tuple(widths), natural_width, previous=None if force else previous)
+    return tuple(widths)
+
+
+def _generate_quietly(name):
+    try:
+        generate_derivatives(name)
+    except Exception:
+        logger.exception('Could not generate image derivatives for %s', name)
+
+
+def schedule_derivatives(*names):
+    """Generate derivatives for the given files once the current transaction commits.
+
+    Work is handed to a background thread unless IMAGE_DERIVATIVES_ASYNC is
+    False, in which case it runs inline (useful for tests and scripts).
+    """
+    names = [name for name in names if name]
+    if not names:
+        return
+
+    def run():
+        global _executor
+        if not getattr(settings, 'IMAGE_DERIVATIVES_ASYNC', True):
+            for name in names:
+                _generate_quietly(name)
+            return
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='image-derivatives')
+        for name in names:
+            _executor.submit(_generate_quietly, name)
+
+    transaction.on_commit(run)
@@ -0,0 +1,371 @@
+"""
+In-process broadcast hub for live match updates.
+
+Each match with at least one viewer gets a single publisher task. It
+wakes when this process saves the match or one of its events (see
+signals.py), or every LIVE_POLL_INTERVAL seconds to pick up writes made
+by other processes. Either way it issues one small version query, and
+only on a change loads the match and its events, diffs them against the
+last snapshot and serialises each update once. The encoded messages are
+then pushed onto every subscriber's queue, so a viewer costs a queue and
+a socket rather than queries.
+
+Messages are served as Server-Sent Events by ``live_match_stream`` and
+over WebSocket by ``websocket_application`` (mounted in asgi.py). Both
+are for logged-in users only. The WebSocket handshake must come from
+one of ALLOWED_HOSTS, and its session is read from the cookie, as the
+match pages' login_required does.
+
+Publishers run outside any request, in a context of their own, so they
+close their database connections between refreshes as Django does at
+the end of a request. A publisher that fails is logged and removed from
+the hub, and its viewers' streams end so they reconnect to a fresh one.
+"""
+import asyncio
+import contextvars
+import json
+import logging
+import re
+import secrets
+from collections import deque
+from contextlib import asynccontextmanager
+from importlib import import_module
+from types import SimpleNamespace
+from urllib.parse import urlsplit
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import aget_user
+from django.db import close_old_connections
+from django.http.cookie import parse_cookie
+from django.http.request import split_domain_port, validate_host
+from django.utils.functional import cached_property
+from .models import Match, MatchEvent
+
+logger = logging.getLogger(__name__)
+
+STAT_FIELDS = (
+    'possession_home', 'possession_away', 'shots_home', 'shots_away',
+    'shots_on_target_home', 'shots_on_target_away', 'corners_home', 'corners_away',
+    'fouls_home', 'fouls_away', 'yellow_cards_home', 'yellow_cards_away',
+    'red_cards_home', 'red_cards_away',
+)
+STATE_FIELDS = ('status', 'home_score', 'away_score') + STAT_FIELDS
+
+# Messages kept per match so reconnecting clients can catch up
+HISTORY_SIZE = 100
+# Updates buffered per viewer before a slow one is dropped (it reconnects)
+QUEUE_SIZE = 50
+# Queued to wake a viewer whose channel has closed
+CLOSED = object()
+
+
+def poll_interval():
+    return getattr(settings, 'LIVE_POLL_INTERVAL', 2.0)
+
+
+class Message:
+    """One update, encoded once however many viewers receive it"""
+
+    def __init__(self, id, name, data):
+        self.id = id
+        self.name = name
+        self.data = data
+
+    @cached_property
+    def json(self):
+        return json.dumps({'id': self.id, 'type': self.name, 'data': self.data})
+
+    @cached_property
+    def sse(self):
+        payload = json.dumps(self.data)
+        return f'id: {self.id}\nevent: {self.name}\ndata: {payload}\n\n'.encode()
+
+
+def serialise_event(event):
+    return {
+        'id': event.id,
+        'minute': event.minute,
+        'event_type': event.event_type,
+        'label': event.get_event_type_display(),
+        'team': event.team,
+        'player_name': event.player_name,
+        'description': event.description,
+        'additional_info': event.additional_info,
+    }
+
+
+class Subscriber:
+    def __init__(self):
+        self.queue = asyncio.Queue(QUEUE_SIZE)
+        self.dropped = False
+
+    def put(self, message):
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.dropped = True
+
+    def close(self):
+        """Drop the viewer, waking it if it is waiting for a message"""
+        self.dropped = True
+        try:
+            self.queue.put_nowait(CLOSED)
+        except asyncio.QueueFull:
+            pass
+
+    async def get(self, timeout=None):
+        """The next message, None on timeout; raises ConnectionAbortedError once dropped"""
+        if self.dropped:
+            raise ConnectionAbortedError
+        try:
+            message = await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            if self.dropped:
+                raise ConnectionAbortedError
+            return None
+        if message is CLOSED:
+            raise ConnectionAbortedError
+        return message
+
+
+class MatchChannel:
+    def __init__(self, match_id):
+        self.match_id = match_id
+        # Prefixes message ids, so a Last-Event-ID from another process or
+        # an earlier channel is recognised as foreign rather than replayed
+        self.epoch = secrets.token_hex(4)
+        self.loop = asyncio.get_running_loop()
+        self.subscribers = set()
+        # Connected viewers, including those still waiting for ``ready``
+        self.viewers = 0
+        self.history = deque(maxlen=HISTORY_SIZE)
+        self.sequence = 0
+        self.version = None
+        self.state = None
+        self._state_message = None
+        self.events = {}
+        self.wake = asyncio.Event()
+        # Set once the first snapshot is loaded (or the match is found missing)
+        self.ready = asyncio.Event()
+        self.missing = False
+        # Set once the publisher has stopped; a closed channel is never reused
+        self.closed = False
+        self.task = None
+
+    def _message(self, name, data):
+        self.sequence += 1
+        message = Message(f'{self.epoch}.{self.sequence}', name, data)
+        self.history.append(message)
+        return message
+
+    def state_message(self):
+        """The current state for a new viewer, shared until anything changes"""
+        id = f'{self.epoch}.{self.sequence}'
+        if self._state_message is None or self._state_message.id != id:
+            self._state_message = Message(id, 'state', self.state)
+        return self._state_message
+
+    def missed_since(self, last_event_id):
+        """Messages after ``last_event_id``, or None if they can't be replayed"""
+        epoch, _, sequence = (last_event_id or '').partition('.')
+        if epoch != self.epoch or not sequence.isdigit():
+            return None
+        sequence = int(sequence)
+        oldest = self.sequence - len(self.history) + 1
+        if not oldest - 1 <= sequence <= self.sequence:
+            return None
+        return list(self.history)[sequence - oldest + 1:]
+
+    async def refresh(self):
+        """Load the match if it changed and return the resulting messages"""
+        version = await Match.objects.filter(pk=self.match_id).values_list('updated_at', flat=True).afirst()
+        if version is None:
+            raise Match.DoesNotExist(self.match_id)
+        if version == self.version:
+            return []
+        self.version = version
+
+        match = await Match.objects.aget(pk=self.match_id)
+        events = {event.id: serialise_event(event)
+                  async for event in MatchEvent.objects.filter(match_id=self.match_id).order_by('minute', 'id')}
+        state = {field: getattr(match, field) for field in STATE_FIELDS}
+        state['minute'] = max((event['minute'] for event in events.values()), default=None)
+
+        messages = []
+        if self.state is not None:
+            for event_id, event in events.items():
+                if self.events.get(event_id) != event:
+                    messages.append(self._message('match_event', event))
+            for event_id in self.events.keys() - events.keys():
+                messages.append(self._message('removed', {'id': event_id}))
+            if state != self.state:
+                messages.append(self._message('state', state))
+        self.state = state
+        self.events = events
+        return messages
+
+    def broadcast(self, messages):
+        for subscriber in list(self.subscribers):
+            for message in messages:
+                subscriber.put(message)
+            if subscriber.dropped:
+                self.subscribers.discard(subscriber)
+
+    async def run(self):
+        try:
+            while True:
+                try:
+                    messages = await self.refresh()
+                finally:
+                    await sync_to_async(close_old_connections)()
+                self.ready.set()
+                self.broadcast(messages)
+                try:
+                    await asyncio.wait_for(self.wake.wait(), poll_interval())
+                except asyncio.TimeoutError:
+                    pass
+                self.wake.clear()
+        except Match.DoesNotExist:
+            self.missing = True
+        except Exception:
+            logger.exception('Live publisher for match %s failed', self.match_id)
+        finally:
+            # Viewers waiting for a first snapshot, or for the next update, end their streams
+            self.closed = True
+            for subscriber in self.subscribers:
+                subscriber.close()
+            self.ready.set()
+
+
+class LiveHub:
+    def __init__(self):
+        self.channels = {}
+
+    @asynccontextmanager
+    async def subscribe(self, match_id, last_event_id=None):
+        """Yield a Subscriber already holding the catch-up messages"""
+        channel = self.channels.get(match_id)
+        if channel is None or channel.closed or channel.loop is not asyncio.get_running_loop():
+            # Registered before any await, so concurrent viewers share it.
+            # The publisher outlives the viewer that started it, so it must
+            # not inherit that request's context (its sync thread, profile)
+            channel = self.channels[match_id] = MatchChannel(match_id)
+            channel.task = asyncio.create_task(channel.run(), context=contextvars.Context())
+            channel.task.add_done_callback(lambda task, channel=channel: self._forget(channel))
+
+        subscriber = Subscriber()
+        channel.viewers += 1
+        try:
+            await channel.ready.wait()
+            if channel.missing:
+                raise Match.DoesNotExist(match_id)
+            if channel.closed:
+                raise ConnectionAbortedError
+            missed = channel.missed_since(last_event_id)
+            for message in missed if missed is not None else [channel.state_message()]:
+                subscriber.put(message)
+            channel.subscribers.add(subscriber)
+            yield subscriber
+        finally:
+            channel.subscribers.discard(subscriber)
+            channel.viewers -= 1
+            if not channel.viewers and self.channels.get(match_id) is channel:
+                del self.channels[match_id]
+                channel.task.cancel()
+
+    def _forget(self, channel):
+        """Unregister a channel whose publisher has stopped"""
+        if self.channels.get(channel.match_id) is channel:
+            del self.channels[channel.match_id]
+
+    def notify(self, match_id):
+        """Wake the match's publisher; safe to call from any thread"""
+        channel = self.channels.get(match_id)
+        if channel is not None and not channel.loop.is_closed():
+            channel.loop.call_soon_threadsafe(channel.wake.set)
+
+
+hub = LiveHub()
+
+
+async def sse_stream(match_id, last_event_id=None):
+    """Yield a match's updates encoded as Server-Sent Events"""
+    heartbeat = getattr(settings, 'LIVE_HEARTBEAT_INTERVAL', 15)
+    try:
+        async with hub.subscribe(match_id, last_event_id) as subscriber:
+            yield b'retry: 3000\n\n'
+            while True:
+                try:
+                    message = await subscriber.get(heartbeat)
+                except ConnectionAbortedError:
+                    return
+                # A comment line keeps proxies from closing an idle stream
+                yield message.sse if message is not None else b': keep-alive\n\n'
+    except (Match.DoesNotExist, ConnectionAbortedError):
+        return
+
+WEBSOCKET_PATH = re.compile(r'/ws/matches/(?P<match_id>\d+)/')
+
+
+def origin_allowed(origin):
+    """Whether a handshake's Origin names one of ALLOWED_HOSTS; browsers always send one"""
+    if not origin:
+        return False
+    parsed = urlsplit(origin)
+    domain, _port = split_domain_port(parsed.netloc)
+    allowed_hosts = settings.ALLOWED_HOSTS
+    if settings.DEBUG and not allowed_hosts:
+        # What HttpRequest.get_host() allows in development
+        allowed_hosts = ['.localhost', '127.0.0.1', '[::1]']
+    return parsed.scheme in ('http', 'https') and bool(domain) and validate_host(domain, allowed_hosts)
+
+
+async def websocket_user(scope):
+    """The user logged in to the session named by the handshake's cookie"""
+    headers = dict(scope.get('headers', []))
+    cookies = parse_cookie(headers.get(b'cookie', b'').decode('latin-1'))
+    session = import_module(settings.SESSION_ENGINE).SessionStore(cookies.get(settings.SESSION_COOKIE_NAME))
+    try:
+        return await aget_user(SimpleNamespace(session=session))
+    finally:
+        await sync_to_async(close_old_connections)()
+
+
+async def websocket_application(scope, receive, send):
+    """Raw ASGI WebSocket endpoint streaming a match's updates as JSON"""
+    await receive()  # websocket.connect
+    path = WEBSOCKET_PATH.fullmatch(scope['path'])
+    if path is None:
+        await send({'type': 'websocket.close', 'code': 4404})
+        return
+    # Closing before accepting refuses the handshake with a 403
+    origin = dict(scope.get('headers', [])).get(b'origin', b'').decode('latin-1')
+    if not origin_allowed(origin) or not (await websocket_user(scope)).is_authenticated:
+        await send({'type': 'websocket.close', 'code': 4403})
+        return
+    try:
+        async with hub.subscribe(int(path['match_id'])) as subscriber:
+            await send({'type': 'websocket.accept'})
+            incoming = asyncio.ensure_future(receive())
+            while True:
+                outgoing = asyncio.ensure_future(subscriber.get())
+                done, _ = await asyncio.wait({incoming, outgoing}, return_when=asyncio.FIRST_COMPLETED)
+                if incoming in done:
+                    outgoing.cancel()
+                    if incoming.result()['type'] == 'websocket.disconnect':
+                        return
+                    # Clients have nothing to say; ignore anything they send
+                    incoming = asyncio.ensure_future(receive())
+                    continue
+                try:
+                    message = outgoing.result()
+                except ConnectionAbortedError:
+                    incoming.cancel()
+                    await send({'type': 'websocket.close', 'code': 1013})
+                    return
+                await send({'type': 'websocket.send', 'text': message.json})
+    except Match.DoesNotExist:
+        await send({'type': 'websocket.close', 'code': 4404})
+    except ConnectionAbortedError:
+        # The publisher failed before the first snapshot; the client retries
+        await send({'type': 'websocket.close', 'code': 1011})
@@ -0,0 +1,351 @@
+"""
+Load-test harness shared by the server benchmarks.
+
+``scratch_database`` points the default alias at an empty, migrated
+database so a benchmark never writes to the real one, and ``run_server``
+starts Gunicorn or Uvicorn against it in production mode. The match-day
+simulation drives the real fan journey over HTTP: register, log in, book,
+pay, download the PDF ticket and get scanned at the gate. It reports
+throughput and latency percentiles per step.
+"""
+import json
+import math
+import os
+import platform
+import re
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import timedelta
+import django
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connections
+from django.utils import timezone
+from .models import Match, TicketCategory, UserProfile
+
+SERVERS = {
+    # The current deployment: Gunicorn sync workers, one request per process at a time
+    'wsgi': ['gunicorn', 'borangersfc.wsgi:application', '--workers', '{workers}',
+             '--bind', '127.0.0.1:{port}', '--log-level', 'warning'],
+    # Uvicorn workers running the async views on an event loop
+    'asgi': ['uvicorn', 'borangersfc.asgi:application', '--workers', '{workers}',
+             '--port', '{port}', '--log-level', 'warning', '--no-access-log'],
+}
+
+MATCHDAY_STEPS = ('register', 'login', 'book_ticket', 'payment', 'download_ticket', 'scan_ticket')
+FAN_PASSWORD = 'Matchday-Load-2025'
+GATE_CSRF_TOKEN = 'g' * 32
+
+TICKET_ID_RE = re.compile(r'/payment/(\d+)/$')
+DOWNLOAD_RE = re.compile(r'/download-ticket/([0-9a-f-]{36})/')
+
+
+def _use_database(settings_dict):
+    connections.close_all()
+    connections.settings['default'] = settings_dict
+    del connections['default']
+
+
+@contextmanager
+def scratch_database():
+    """Switch the default alias to an empty, migrated database for the duration.
+
+    Yields the environment a server process needs to use the same database:
+    a temporary SQLite file with the production profile, or a throwaway
+    PostgreSQL database.
+    """
+    connection = connections['default']
+    original = dict(connections.settings['default'])
+    env = dict(os.environ, DJANGO_DEBUG='False')
+    if connection.vendor == 'sqlite':
+        folder = tempfile.mkdtemp(prefix='load-test-')
+        path = os.path.join(folder, 'bench.sqlite3')
+        try:
+            _use_database(dict(original, NAME=path, OPTIONS=dict(settings.SQLITE_PRODUCTION_OPTIONS)))
+            if connections['default'].settings_dict['NAME'] != path:
+                raise CommandError('Could not switch to the scratch database')
+            call_command('migrate', verbosity=0)
+            env.update(DJANGO_DB_NAME=path, DJANGO_SQLITE_PRODUCTION='True')
+            yield env
+        finally:
+            _use_database(original)
+            shutil.rmtree(folder, ignore_errors=True)
+    else:
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        env.update(DJANGO_DB_NAME=connection.settings_dict['NAME'])
+        try:
+            yield env
+        finally:
+            connections['default'].creation.destroy_test_db(old_name, verbosity=0)
+
+
+def ensure_static_manifest(env):
+    """Full pages need the hashed static manifest once DEBUG is off; build it like a deploy would"""
+    if not (settings.STATIC_ROOT / 'staticfiles.json').exists():
+        subprocess.run([sys.executable, 'manage.py', 'collectstatic', '--noinput', '--verbosity', '0'],
+                       env=env, cwd=settings.BASE_DIR, check=True)
+
+
+@contextmanager
+def run_server(server, workers, port, env):
+    """Start ``server`` on 127.0.0.1:``port`` and stop it on exit"""
+    argv = [part.format(workers=workers, port=port) for part in SERVERS[server]]
+    process = subprocess.Popen(
+        [sys.executable, '-m', *argv], env=env, cwd=settings.BASE_DIR,
+        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+    )
+    try:
+        deadline = time.monotonic() + 30
+        while True:
+            if process.poll() is not None:
+                raise CommandError(f'{server} server exited: {process.stderr.read().decode()[-2000:]}')
+            try:
+                socket.create_connection(('127.0.0.1', port), timeout=1).close()
+                break
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise CommandError(f'{server} server did not start on port {port}')
+                time.sleep(0.2)
+        # Let the remaining workers finish booting
+        time.sleep(2)
+        yield process
+    finally:
+        process.terminate()
+        try:
+            process.wait(10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def login_session(user):
+    """A session key for ``user``, created directly so no password is hashed"""
+    session = SessionStore()
+    session[SESSION_KEY] = str(user.pk)
+    session[BACKEND_SESSION_KEY] = 'django.contrib.auth.backends.ModelBackend'
+    session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+    session.create()
+    return session.session_key
+
+
+def percentile(ordered, p):
+    """Nearest-rank percentile of a sorted list"""
+    if not ordered:
+        return 0
+    return ordered[max(math.ceil(len(ordered) * p / 100) - 1, 0)]
+
+
+def summarise(latencies, errors, elapsed):
+    ordered = sorted(latencies)
+    requests = len(ordered)
+    return {
+        'requests': requests,
+        'errors': errors,
+        'error_rate': errors / requests if requests else 0,
+        'throughput': (requests - errors) / elapsed if elapsed else 0,
+        'p50_ms': percentile(ordered, 50) * 1000,
+        'p95_ms': percentile(ordered, 95) * 1000,
+        'p99_ms': percentile(ordered, 99) * 1000,
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+                              capture_output=True, text=True, timeout=10).stdout.strip() or None
+    except OSError:
+        return None
+
+
+class StepFailed(Exception):
+    """A response did not match what the journey expected"""
+
+
+class MatchdaySimulation:
+    """Fans going from registration to the turnstile against a running server.
+
+    Each fan thread repeats the journey with a new account until the
+    deadline, or with ``returning`` logs in to the same account each time.
+    A step's latency covers its page load and form submit; a failed step
+    ends that journey and counts as an error for the step.
+    """
+
+    def __init__(self, base_url, fans, duration, returning=False, timeout=30):
+        self.base_url = base_url.rstrip('/')
+        self.fans = fans
+        self.duration = duration
+        self.returning = returning
+        self.timeout = timeout
+        self.run_id = uuid.uuid4().hex[:8]
+        self.lock = threading.Lock()
+        self.latencies = {step: [] for step in MATCHDAY_STEPS}
+        self.errors = dict.fromkeys(MATCHDAY_STEPS, 0)
+        self.error_samples = {}
+        self.journeys = 0
+
+    def setup(self):
+        """Create the fixture, a gateman per fan and, for returning fans, their accounts"""
+        self.match = Match.objects.create(
+            title='Bo Rangers FC vs Matchday XI', date=timezone.now() + timedelta(days=7),
+            opponent='Matchday XI', venue='Bo Stadium', matchday=1,
+        )
+        self.category = TicketCategory.objects.create(name='Regular', price=50)
+        self.gate_sessions = []
+        for i in range(self.fans):
+            gateman = User.objects.create_user(username=f'gate-{self.run_id}-{i}')
+            UserProfile.objects.create(user=gateman, role='gateman')
+            self.gate_sessions.append(login_session(gateman))
+        if self.returning:
+            # One hash shared by every account keeps seeding fast; each login still checks it in full
+            password = make_password(FAN_PASSWORD)
+            users = User.objects.bulk_create(
+                User(username=self.returning_username(i), password=password) for i in range(self.fans)
+            )
+            UserProfile.objects.bulk_create(UserProfile(user=user, role='fan') for user in users)
+        connections.close_all()
+
+    def run(self):
+        threads = [threading.Thread(target=self.fan, args=(i,)) for i in range(self.fans)]
+        self.deadline = time.monotonic() + self.duration
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        steps = {step: summarise(self.latencies[step], self.errors[step], elapsed) for step in MATCHDAY_STEPS}
+        return {
+            'started_at': timezone.now().isoformat(),
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connections['default'].vendor,
+            'cpus': os.cpu_count(),
+            'fans': self.fans,
+            'duration_s': round(elapsed, 2),
+            'returning_fans': self.returning,
+            'journeys': self.journeys,
+            'tickets_sold_per_minute': steps['payment']['throughput'] * 60,
+            'fans_admitted_per_minute': steps['scan_ticket']['throughput'] * 60,
+            'steps': {step: stats for step, stats in steps.items() if stats['requests']},
+            'error_samples': self.error_samples,
+        }
+
+    def fan(self, index):
+        import requests
+
+        gate = requests.Session()
+        gate.cookies.set(settings.SESSION_COOKIE_NAME, self.gate_sessions[index])
+        gate.cookies.set(settings.CSRF_COOKIE_NAME, GATE_CSRF_TOKEN)
+        attempt = 0
+        # Every fan starts at least one journey, however late its thread got going
+        while attempt == 0 or time.monotonic() < self.deadline:
+            attempt += 1
+            username = self.returning_username(index) if self.returning else f'fan-{self.run_id}-{index}-{attempt}'
+            journey = [
+                ('login', self.log_in),
+                ('book_ticket', self.book),
+                ('payment', self.pay),
+                ('download_ticket', self.download),
+                ('scan_ticket', lambda session, state: self.scan(gate, state)),
+            ]
+            if not self.returning:
+                journey.insert(0, ('register', self.register))
+            if self.journey(requests.Session(), journey, {'username': username}):
+                with self.lock:
+                    self.journeys += 1
+
+    def journey(self, session, steps, state):
+        for step, action in steps:
+            started = time.perf_counter()
+            try:
+                action(session, state)
+                error = None
+            except Exception as e:
+                error = f'{type(e).__name__}: {e}'[:300]
+            with self.lock:
+                self.latencies[step].append(time.perf_counter() - started)
+                if error:
+                    self.errors[step] += 1
+                    self.error_samples.setdefault(step, error)
+            if error:
+                return False
+        return True
+
+    def returning_username(self, index):
+        return f'fan-{self.run_id}-{index}'
+
+    def url(self, path):
+        return self.base_url + path
+
+    def get(self, session, path, expected=200):
+        response = session.get(self.url(path), allow_redirects=False, timeout=self.timeout)
+        if response.status_code != expected:
+            raise StepFailed(f'GET {path} returned {response.status_code}')
+        return response
+
+    def post(self, session, path, data, expected=302):
+        data = dict(data, csrfmiddlewaretoken=session.cookies.get(settings.CSRF_COOKIE_NAME, ''))
+        response = session.post(self.url(path), data=data, allow_redirects=False, timeout=self.timeout,
+                                headers={'Referer': self.url(path)})
+        if response.status_code != expected:
+            raise StepFailed(f'POST {path} returned {response.status_code}')
+        return response
+
+    def register(self, session, state):
+        self.get(session, '/register/')
+        response = self.post(session, '/register/', {
+            'username': state['username'], 'password1': FAN_PASSWORD, 'password2': FAN_PASSWORD,
+            'phone': '+23276000000',
+        })
+        if not response.headers['Location'].endswith('/login/'):
+            raise StepFailed(f"Registration redirected to {response.headers['Location']}")
+
+    def log_in(self, session, state):
+        self.get(session, '/login/')
+        self.post(session, '/login/', {'username': state['username'], 'password': FAN_PASSWORD})
+
+    def book(self, session, state):
+        self.get(session, f'/book/{self.match.id}/')
+        response = self.post(session, f'/book/{self.match.id}/',
+                             {'ticket_category': self.category.id, 'quantity': 1})
+        match = TICKET_ID_RE.search(response.headers['Location'])
+        if not match:
+            raise StepFailed(f"Booking redirected to {response.headers['Location']}")
+        state['ticket'] = match.group(1)
+
+    def pay(self, session, state):
+        self.get(session, f"/payment/{state['ticket']}/")
+        response = self.post(session, f"/payment/{state['ticket']}/",
+                             {'payment_method': 'orange_money', 'phone_number': '+23276000000'})
+        page = self.get(session, response.headers['Location'])
+        match = DOWNLOAD_RE.search(page.text)
+        if not match:
+            raise StepFailed('Ticket page has no download link')
+        state['ticket_id'] = match.group(1)
+
+    def download(self, session, state):
+        response = self.get(session, f"/download-ticket/{state['ticket_id']}/")
+        if not response.content.startswith(b'%PDF'):
+            raise StepFailed('Ticket download is not a PDF')
+
+    def scan(self, gate, state):
+        response = gate.post(
+            self.url('/scan-ticket/'), data=json.dumps({'ticket_id': state['ticket_id']}), timeout=self.timeout,
+            headers={'Content-Type': 'application/json', 'Referer': self.url('/gateman-scanner/'),
+                     'X-CSRFToken': GATE_CSRF_TOKEN},
+        )
+        if response.status_code != 200 or not response.json().get('success'):
+            raise StepFailed(f'Scan returned {response.status_code}: {response.text[:200]}')
@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from ticketing.models import Match
+
+
+class Command(BaseCommand):
+    help = 'Generate and store summaries and highlights for completed matches'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Regenerate every completed match, not only those without stored texts',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Number of matches loaded and updated per batch (default: 500)',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        matches = Match.objects.filter(status='completed').order_by('id').prefetch_related('events')
+        if not options['all']:
+            matches = matches.filter(generated_summary='')
+        
+        self.stdout.write(f'Backfilling generated texts for {matches.count()} completed matches...')
+        
+        updated = 0
+        batch = []
+        for match in matches.iterator(chunk_size=batch_size):
+            match.refresh_generated_texts(events=match.events.all())
+            match.updated_at = timezone.now()
+            batch.append(match)
+            if len(batch) >= batch_size:
+                updated += self._flush(batch)
+                batch = []
+        if batch:
+            updated += self._flush(batch)
+        
+        self.stdout.write(self.style.SUCCESS(f'Stored generated texts for {updated} matches'))
+
+    def _flush(self, batch):
+        with transaction.atomic():
+            Match.objects.bulk_update(batch, ['generated_summary', 'generated_highlights', 'updated_at'])
+        self.stdout.write(f'  ...{len(batch)} matches updated')
+        return len(batch)
@@ -0,0 +1,139 @@
+import asyncio
+import json
+import time
+from itertools import cycle
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.utils import timezone
+from ticketing.load_testing import SERVERS, login_session, run_server, scratch_database, summarise
+from ticketing.models import Match, News, Ticket, TicketCategory, UserProfile
+
+CSRF_TOKEN = 'b' * 32
+
+
+class Command(BaseCommand):
+    help = 'Compare throughput and p99 latency of scan_ticket and load_more_news under Gunicorn (WSGI) and Uvicorn (ASGI)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--server', choices=list(SERVERS), action='append', help='Server to run (default: all)')
+        parser.add_argument('--workers', type=int, default=2, help='Server worker processes (default: 2)')
+        parser.add_argument('--connections', type=int, nargs='+', default=[50, 200, 800],
+                            help='Concurrent client connections to try (default: 50 200 800)')
+        parser.add_argument('--duration', type=float, default=10, help='Seconds per run (default: 10)')
+        parser.add_argument('--slow-clients', type=int, default=0,
+                            help='Extra clients that trickle each request body over --slow-seconds (default: 0)')
+        parser.add_argument('--slow-seconds', type=float, default=2, help='Upload time of a slow client request (default: 2)')
+        parser.add_argument('--timeout', type=float, default=30, help='Seconds before a request counts as failed (default: 30)')
+        parser.add_argument('--port', type=int, default=8771, help='Port the servers listen on (default: 8771)')
+
+    def handle(self, *args, **options):
+        results = []
+        with scratch_database() as env:
+            self.create_data()
+            connections.close_all()
+            for server in options['server'] or SERVERS:
+                with run_server(server, options['workers'], options['port'], env):
+                    for clients in options['connections']:
+                        result = asyncio.run(self.run(server, clients, options))
+                        results.append(result)
+                        self.stdout.write(self.style.SUCCESS(
+                            f"{server}  {clients:>5} connections  {result['throughput']:8.1f} req/s   "
+                            f"p50 {result['p50_ms']:8.1f} ms   p99 {result['p99_ms']:8.1f} ms   "
+                            f"errors {result['errors']}/{result['requests']}"
+                        ))
+                self.stdout.write(f'{server} server stopped')
+        if options['verbosity'] >= 2:
+            self.stdout.write(json.dumps(results, indent=2))
+
+    def create_data(self):
+        match = Match.objects.create(
+            title='Bo Rangers FC vs Benchmark XI', date=timezone.now(), status='live',
+            opponent='Benchmark XI', venue='Bo Stadium', matchday=1,
+        )
+        category = TicketCategory.objects.create(name='Regular', price=50)
+        fan = User.objects.create_user(username='bench-fan')
+        gateman = User.objects.create_user(username='bench-gate')
+        UserProfile.objects.create(user=gateman, role='gateman')
+        News.objects.bulk_create(
+            News(title=f'Benchmark article {i}', body='Match report. ' * 50, author=fan, category='general')
+            for i in range(25)
+        )
+        tickets = Ticket.objects.bulk_create(
+            (Ticket(user=fan, match=match, ticket_category=category, payment_status='completed')
+             for _ in range(20000)),
+            batch_size=1000,
+        )
+        # Once every ticket is used, scans continue as "already scanned" checks
+        self.tickets = cycle([str(ticket.ticket_id) for ticket in tickets])
+
+        self.cookie = f'{settings.SESSION_COOKIE_NAME}={login_session(gateman)}; {settings.CSRF_COOKIE_NAME}={CSRF_TOKEN}'
+
+    def request(self, endpoint):
+        if endpoint == 'load_more_news':
+            return b'GET /load-more-news/?page=2&category=all HTTP/1.1\r\nHost: 127.0.0.1\r\nConnection: close\r\n\r\n', b''
+        body = json.dumps({'ticket_id': next(self.tickets)}).encode()
+        head = (
+            'POST /scan-ticket/ HTTP/1.1\r\nHost: 127.0.0.1\r\nConnection: close\r\n'
+            f'Content-Type: application/json\r\nContent-Length: {len(body)}\r\n'
+            f'Cookie: {self.cookie}\r\nX-CSRFToken: {CSRF_TOKEN}\r\nReferer: http://127.0.0.1/\r\n\r\n'
+        ).encode()
+        return head, body
+
+    async def send(self, port, endpoint, trickle=0):
+        """One request on a fresh connection; returns the HTTP status"""
+        head, body = self.request(endpoint)
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        try:
+            writer.write(head)
+            if trickle and body:
+                for i in range(len(body)):
+                    writer.write(body[i:i + 1])
+                    await writer.drain()
+                    await asyncio.sleep(trickle / len(body))
+            else:
+                writer.write(body)
+            await writer.drain()
+            response = await reader.read()
+        finally:
+            writer.close()
+        return int(response.split(b' ', 2)[1]) if response else 0
+
+    async def run(self, server, clients, options):
+        port = options['port']
+        latencies = []
+        errors = 0
+        deadline = time.monotonic() + options['duration']
+
+        async def client(index):
+            nonlocal errors
+            endpoints = cycle(['scan_ticket', 'load_more_news'] if index % 2 else ['load_more_news', 'scan_ticket'])
+            while time.monotonic() < deadline:
+                started = time.perf_counter()
+                try:
+                    status = await asyncio.wait_for(self.send(port, next(endpoints)), options['timeout'])
+                except (OSError, asyncio.TimeoutError, IndexError, ValueError):
+                    status = 0
+                latencies.append(time.perf_counter() - started)
+                if status != 200:
+                    errors += 1
+
+        async def slow_client():
+            while time.monotonic() < deadline:
+                try:
+                    await asyncio.wait_for(self.send(port, 'scan_ticket', options['slow_seconds']), options['timeout'])
+                except (OSError, asyncio.TimeoutError, IndexError, ValueError):
+                    pass
+
+        started = time.perf_counter()
+        await asyncio.gather(
+            *(client(i) for i in range(clients)),
+            *(slow_client() for _ in range(options['slow_clients'])),
+        )
+        elapsed = time.perf_counter() - started
+
+        return dict(
+            summarise(latencies, errors, elapsed),
+            server=server, workers=options['workers'], connections=clients, slow_clients=options['slow_clients'],
+        )
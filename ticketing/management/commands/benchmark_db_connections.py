@@ -0,0 +1,160 @@
+import json
+import statistics
+import threading
+import time
+from datetime import timedelta
+from io import BytesIO
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.contrib.auth.models import User
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test.utils import override_settings
+from django.utils import timezone
+from ticketing.models import Match, Ticket, TicketCategory, UserProfile
+
+CSRF_TOKEN = 'b' * 32
+
+MODES = {
+    # A new connection for every request (CONN_MAX_AGE=0, the old setup)
+    'per-request': {'CONN_MAX_AGE': 0, 'OPTIONS': {}},
+    # One long-lived connection per worker thread
+    'persistent': {'CONN_MAX_AGE': 600, 'OPTIONS': {}},
+    # Connections borrowed from Django's psycopg pool
+    'pooled': {'CONN_MAX_AGE': 0, 'OPTIONS': {'pool': {'min_size': 4, 'max_size': 16}}},
+}
+
+
+class Command(BaseCommand):
+    help = 'Compare request latency on fixtures and scan_ticket with and without connection reuse'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=300, help='Requests per endpoint and mode (default: 300)')
+        parser.add_argument('--concurrency', type=int, default=4, help='Worker threads (default: 4)')
+        parser.add_argument('--mode', choices=list(MODES), action='append', help='Mode to run (default: all)')
+
+    def handle(self, *args, **options):
+        connection = connections['default']
+        if connection.vendor != 'postgresql':
+            raise CommandError('Set DJANGO_DB_ENGINE=postgresql to benchmark connection handling.')
+
+        # Work in a scratch database so the real one is never written to
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        original = dict(connections.settings['default'], NAME=connection.settings_dict['NAME'])
+        try:
+            self.create_data(options['requests'] * len(options['mode'] or MODES))
+            results = []
+            for mode in options['mode'] or MODES:
+                self.use_database(dict(original, **MODES[mode]))
+                for endpoint in ('fixtures', 'scan_ticket'):
+                    result = self.run(mode, endpoint, options['requests'], options['concurrency'])
+                    results.append(result)
+                    self.stdout.write(self.style.SUCCESS(
+                        f"{mode:<12} {endpoint:<12} p50 {result['p50_ms']:6.2f} ms   "
+                        f"p95 {result['p95_ms']:6.2f} ms   {result['throughput']:7.1f} req/s"
+                        + (f"   errors {result['errors']}" if result['errors'] else '')
+                    ))
+            if options['verbosity'] >= 2:
+                self.stdout.write(json.dumps(results, indent=2))
+        finally:
+            self.use_database(original)
+            connections['default'].creation.destroy_test_db(old_name, verbosity=0)
+
+    def use_database(self, settings_dict):
+        """Repoint the default alias; worker threads open connections from these settings"""
+        connection = connections['default']
+        connection.close()
+        if getattr(connection, 'pool', None):
+            connection.close_pool()
+        connections.settings['default'] = settings_dict
+        del connections['default']
+
+    def create_data(self, tickets):
+        match = Match.objects.create(
+            title='Bo Rangers FC vs Benchmark XI', date=timezone.now() + timedelta(days=7),
+            opponent='Benchmark XI', venue='Bo Stadium', matchday=1,
+        )
+        category = TicketCategory.objects.create(name='Regular', price=50)
+        fan = User.objects.create_user(username='bench-fan')
+        gateman = User.objects.create_user(username='bench-gate')
+        UserProfile.objects.create(user=gateman, role='gateman')
+        created = Ticket.objects.bulk_create(
+            Ticket(user=fan, match=match, ticket_category=category, payment_status='completed')
+            for _ in range(tickets)
+        )
+        self.tickets = iter([str(ticket.ticket_id) for ticket in created])
+        self.tickets_lock = threading.Lock()
+
+        session = SessionStore()
+        session[SESSION_KEY] = str(gateman.pk)
+        session[BACKEND_SESSION_KEY] = 'django.contrib.auth.backends.ModelBackend'
+        session[HASH_SESSION_KEY] = gateman.get_session_auth_hash()
+        session.create()
+        self.cookie = f'{settings.SESSION_COOKIE_NAME}={session.session_key}; {settings.CSRF_COOKIE_NAME}={CSRF_TOKEN}'
+
+    def environ(self, endpoint):
+        environ = {
+            'SERVER_NAME': 'localhost', 'SERVER_PORT': '80', 'SERVER_PROTOCOL': 'HTTP/1.1',
+            'wsgi.url_scheme': 'http', 'wsgi.errors': BytesIO(), 'wsgi.multithread': True,
+        }
+        if endpoint == 'fixtures':
+            body = b''
+            environ.update(REQUEST_METHOD='GET', PATH_INFO='/fixtures/')
+        else:
+            with self.tickets_lock:
+                body = json.dumps({'ticket_id': next(self.tickets)}).encode()
+            environ.update(
+                REQUEST_METHOD='POST', PATH_INFO='/scan-ticket/', CONTENT_TYPE='application/json',
+                HTTP_COOKIE=self.cookie, HTTP_X_CSRFTOKEN=CSRF_TOKEN,
+            )
+        environ.update(CONTENT_LENGTH=str(len(body)), **{'wsgi.input': BytesIO(body)})
+        return environ
+
+    def run(self, mode, endpoint, total, concurrency):
+        """Send ``total`` requests through the WSGI handler from ``concurrency`` threads"""
+        handler = WSGIHandler()
+        latencies = []
+        errors = []
+        lock = threading.Lock()
+        remaining = iter(range(total))
+
+        def worker():
+            while True:
+                with lock:
+                    if next(remaining, None) is None:
+                        break
+                environ = self.environ(endpoint)
+                started = time.perf_counter()
+                response = handler(environ, lambda status, headers: None)
+                body = b''.join(response)
+                # Fires request_finished, which closes or releases the connection
+                response.close()
+                elapsed = time.perf_counter() - started
+                with lock:
+                    latencies.append(elapsed)
+                    if response.status_code != 200 or (endpoint == 'scan_ticket' and b'"success": true' not in body):
+                        errors.append(response.status_code)
+            connections.close_all()
+
+        threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+        started = time.perf_counter()
+        with override_settings(ALLOWED_HOSTS=['localhost'], DEBUG=False):
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        elapsed = time.perf_counter() - started
+
+        latencies.sort()
+        return {
+            'mode': mode,
+            'endpoint': endpoint,
+            'requests': total,
+            'concurrency': concurrency,
+            'errors': len(errors),
+            'throughput': total / elapsed,
+            'p50_ms': statistics.median(latencies) * 1000,
+            'p95_ms': latencies[int(len(latencies) * 0.95) - 1] * 1000,
+        }
@@ -0,0 +1,37 @@
+import time
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import Client
+from django.test.utils import override_settings
+from ticketing.models import UserProfile
+
+
+class Command(BaseCommand):
+    help = 'Measure successful logins per second on one core through the login view'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--logins', type=int, default=20, help='Logins to time (default: 20)')
+
+    def handle(self, *args, **options):
+        total = options['logins']
+        # Everything is rolled back, so the benchmark leaves no user behind
+        with transaction.atomic():
+            user = User.objects.create_user(username='bench-login', password='bench-password-123')
+            UserProfile.objects.create(user=user, role='fan')
+            client = Client()
+            with override_settings(ALLOWED_HOSTS=['testserver']):
+                client.post('/login/', {'username': 'bench-login', 'password': 'bench-password-123'})
+                started = time.perf_counter()
+                for _ in range(total):
+                    client.logout()
+                    client.post('/login/', {'username': 'bench-login', 'password': 'bench-password-123'})
+                elapsed = time.perf_counter() - started
+            transaction.set_rollback(True)
+        cache.clear()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{total} logins in {elapsed:.2f}s: {total / elapsed:.2f} logins/s per core '
+            f'({elapsed / total * 1000:.0f} ms each)'
+        ))
@@ -0,0 +1,158 @@
+import json
+import os
+import statistics
+from collections import Counter
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import Client
+from django.test.utils import override_settings
+from django.utils import timezone
+from ticketing.models import Match, Ticket, TicketCategory, UserProfile
+
+PROFILES = {
+    # Django's stock SQLite settings: rollback journal, deferred transactions
+    'default': {},
+    # WAL and a busy timeout; deferred transactions unless DJANGO_SQLITE_IMMEDIATE
+    'production': {key: value for key, value in settings.SQLITE_PRODUCTION_OPTIONS.items()
+                   if key != 'transaction_mode'},
+    'immediate': dict(settings.SQLITE_PRODUCTION_OPTIONS, transaction_mode='IMMEDIATE'),
+}
+
+
+class RoundFailed(Exception):
+    """A step of a round answered without doing its write"""
+
+
+class Command(BaseCommand):
+    help = 'Run concurrent book/pay/scan traffic against a scratch SQLite file under each profile'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=8, help='Concurrent clients (default: 8)')
+        parser.add_argument('--iterations', type=int, default=25, help='Book/pay/scan rounds per client (default: 25)')
+        parser.add_argument('--profile', choices=sorted(PROFILES), action='append',
+                            help='Profile to run (default: all)')
+
+    def handle(self, *args, **options):
+        if connections['default'].vendor != 'sqlite':
+            self.stderr.write('The default database is not SQLite; nothing to benchmark.')
+            return
+        original = dict(connections.settings['default'])
+        try:
+            for name in options['profile'] or sorted(PROFILES):
+                result = self.run_profile(name, options['workers'], options['iterations'])
+                self.stdout.write(self.style.SUCCESS(
+                    f"{name:<11} {result['throughput']:7.1f} rounds/s   "
+                    f"p50 {result['p50_ms']:6.1f} ms   p95 {result['p95_ms']:6.1f} ms   "
+                    f"failures {result['failures']}/{result['requests']} ({result['failure_rate']:.1%}), "
+                    f"lock errors {result['lock_errors']}"
+                ))
+                for kind, count in result['failures_by_type'].items():
+                    self.stdout.write(f'  {count:5d}  {kind}')
+                if options['verbosity'] >= 2:
+                    self.stdout.write(json.dumps(result, indent=2))
+        finally:
+            self.use_database(original)
+
+    def use_database(self, settings_dict):
+        """Repoint the default alias; each thread opens its own connection from these settings"""
+        connections.close_all()
+        connections.settings['default'] = settings_dict
+        del connections['default']
+
+    def run_profile(self, name, workers, iterations):
+        """Point the default alias at a fresh database file and hammer it"""
+        path = os.path.join(tempfile.mkdtemp(prefix='sqlite-bench-'), 'bench.sqlite3')
+        self.use_database(dict(connections.settings['default'], NAME=path, OPTIONS=dict(PROFILES[name])))
+        if connections['default'].settings_dict['NAME'] != path:
+            raise CommandError('Could not switch to the scratch database')
+        call_command('migrate', verbosity=0)
+
+        match = Match.objects.create(
+            title='Bo Rangers FC vs Benchmark XI', date=timezone.now() + timedelta(days=7),
+            opponent='Benchmark XI', venue='Bo Stadium', matchday=1,
+        )
+        category = TicketCategory.objects.create(name='Regular', price=50)
+        gateman = User.objects.create_user(username='bench-gate')
+        UserProfile.objects.create(user=gateman, role='gateman')
+        fans = [User.objects.create_user(username=f'bench-fan-{i}') for i in range(workers)]
+        connections.close_all()
+
+        latencies = []
+        counts = {'requests': 0, 'lock_errors': 0}
+        # 'ExceptionType: message' or 'step: what went wrong' -> rounds
+        failures = Counter()
+        lock = threading.Lock()
+        barrier = threading.Barrier(workers)
+
+        def record(elapsed, failure=None):
+            with lock:
+                counts['requests'] += 1
+                latencies.append(elapsed)
+                if failure is not None:
+                    failures[failure] += 1
+                    if 'locked' in failure:
+                        counts['lock_errors'] += 1
+
+        def worker(fan):
+            fan_client = Client(raise_request_exception=True)
+            gate_client = Client(raise_request_exception=True)
+            fan_client.force_login(fan)
+            gate_client.force_login(gateman)
+            barrier.wait()
+            for _ in range(iterations):
+                started = time.perf_counter()
+                # A round only counts as done if every step did its write
+                try:
+                    response = fan_client.post(f'/book/{match.id}/', {'ticket_category': category.id, 'quantity': 1})
+                    if response.status_code != 302:
+                        raise RoundFailed(f'book: HTTP {response.status_code}')
+                    ticket = Ticket.objects.filter(user=fan).latest('id')
+                    response = fan_client.post(f'/payment/{ticket.id}/', {'payment_method': 'orange_money'})
+                    if response.status_code != 302:
+                        raise RoundFailed(f'payment: HTTP {response.status_code}')
+                    response = gate_client.post(
+                        '/scan-ticket/', data=json.dumps({'ticket_id': str(ticket.ticket_id)}),
+                        content_type='application/json',
+                    )
+                    if not response.json().get('success'):
+                        # The scan view reports its exceptions in the JSON
+                        raise RoundFailed(f"scan: {response.json().get('error')}")
+                except RoundFailed as exc:
+                    record(time.perf_counter() - started, str(exc))
+                except Exception as exc:
+                    record(time.perf_counter() - started, f'{type(exc).__name__}: {exc}')
+                else:
+                    record(time.perf_counter() - started)
+            connections.close_all()
+
+        threads = [threading.Thread(target=worker, args=(fan,)) for fan in fans]
+        started = time.perf_counter()
+        with override_settings(ALLOWED_HOSTS=['testserver'], DEBUG=False):
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        elapsed = time.perf_counter() - started
+
+        latencies.sort()
+        failed = sum(failures.values())
+        return {
+            'profile': name,
+            'workers': workers,
+            'iterations': iterations,
+            'requests': counts['requests'],
+            'failures': failed,
+            'failure_rate': failed / counts['requests'] if counts['requests'] else 0,
+            'failures_by_type': dict(failures.most_common()),
+            'lock_errors': counts['lock_errors'],
+            'throughput': (counts['requests'] - failed) / elapsed if elapsed else 0,
+            'p50_ms': statistics.median(latencies) * 1000 if latencies else 0,
+            'p95_ms': latencies[int(len(latencies) * 0.95) - 1] * 1000 if latencies else 0,
+        }
@@ -0,0 +1,89 @@
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Only the PDF, QR and spreadsheet code paths use these, so a worker should boot without them
+LAZY_MODULES = ('reportlab', 'qrcode', 'PIL', 'openpyxl')
+
+# What a worker does before serving its first request: load settings, apps and the
+# middleware chain, then resolve the URLconf, which imports every view module
+BOOT = f'''
+import json, os, sys, time
+started = time.perf_counter()
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', {os.environ.get('DJANGO_SETTINGS_MODULE', 'borangersfc.settings')!r})
+from django.core.asgi import get_asgi_application
+from django.urls import get_resolver
+get_asgi_application()
+get_resolver().url_patterns
+print(json.dumps({{
+    'boot_ms': (time.perf_counter() - started) * 1000,
+    'lazy_loaded': sorted(name for name in {LAZY_MODULES!r} if name in sys.modules),
+}}))
+'''
+
+IMPORT_LINE = re.compile(r'^import time:\s+(\d+) \|\s+\d+ \| (\s*)(\S+)$')
+
+
+class Command(BaseCommand):
+    help = 'Measure worker cold-start time with python -X importtime and fail when it exceeds a budget'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=5, help='Cold starts to time (default: 5)')
+        parser.add_argument('--budget', type=float, default=450,
+                            help='Maximum median boot time in milliseconds (default: 450)')
+        parser.add_argument('--top', type=int, default=10, help='Slowest top-level packages to list (default: 10)')
+
+    def handle(self, *args, **options):
+        # Deployed workers start from compiled bytecode, so write it even if this shell
+        # disables that, and let a first, uncounted run bring it up to date
+        self.env = {key: value for key, value in os.environ.items() if key != 'PYTHONDONTWRITEBYTECODE'}
+        self.boot()
+        runs = [self.boot() for _ in range(options['runs'])]
+
+        boot_ms = statistics.median(run['boot_ms'] for run in runs)
+        process_ms = statistics.median(run['process_ms'] for run in runs)
+        packages = defaultdict(list)
+        for run in runs:
+            for package, ms in run['packages'].items():
+                packages[package].append(ms)
+        slowest = sorted(((statistics.median(times), package) for package, times in packages.items()), reverse=True)
+
+        self.stdout.write(f'Slowest packages to import (median self time over {len(runs)} runs):')
+        for ms, package in slowest[:options['top']]:
+            self.stdout.write(f'  {package:<24} {ms:8.1f} ms')
+
+        lazy_loaded = sorted({name for run in runs for name in run['lazy_loaded']})
+        if lazy_loaded:
+            raise CommandError(f"Imported at startup but should load lazily: {', '.join(lazy_loaded)}")
+        if boot_ms > options['budget']:
+            raise CommandError(f"Worker boot took {boot_ms:.0f} ms, over the {options['budget']:.0f} ms budget")
+        self.stdout.write(self.style.SUCCESS(
+            f"Worker boot {boot_ms:.0f} ms (budget {options['budget']:.0f} ms), "
+            f'whole process {process_ms:.0f} ms'
+        ))
+
+    def boot(self):
+        """Start a fresh interpreter, boot the project and return its timings"""
+        started = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', BOOT],
+            cwd=settings.BASE_DIR, env=self.env, capture_output=True, text=True,
+        )
+        process_ms = (time.perf_counter() - started) * 1000
+        if result.returncode:
+            raise CommandError(f'Boot failed:\n{result.stderr[-2000:]}')
+
+        # Self time summed per top-level package
+        packages = defaultdict(float)
+        for line in result.stderr.splitlines():
+            match = IMPORT_LINE.match(line)
+            if match:
+                packages[match.group(3).split('.')[0]] += int(match.group(1)) / 1000
+        return dict(json.loads(result.stdout.splitlines()[-1]), process_ms=process_ms, packages=packages)
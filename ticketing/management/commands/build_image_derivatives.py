@@ -0,0 +1,66 @@
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from ticketing.images import DERIVATIVE_WIDTHS, derivative_name, generate_derivatives
+from ticketing.models import Match, News
+
+
+class Command(BaseCommand):
+    help = 'Generate responsive image derivatives for existing news images and team logos'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Regenerate derivatives that already exist',
+        )
+        parser.add_argument(
+            '--report-width',
+            type=int,
+            default=640,
+            help='Compare originals with the derivative a browser would pick for this slot width (default: 640)',
+        )
+
+    def image_names(self):
+        """Distinct stored names of every news image and team logo"""
+        names = set(News.objects.exclude(image='').exclude(image__isnull=True).values_list('image', flat=True))
+        for field in ('home_team_logo', 'opponent_logo'):
+            filters = {f'{field}__isnull': True}
+            names.update(Match.objects.exclude(**{field: ''}).exclude(**filters).values_list(field, flat=True))
+        return sorted(names)
+
+    def handle(self, *args, **options):
+        report_width = options['report_width']
+        names = self.image_names()
+        self.stdout.write(f'Processing {len(names)} images...')
+        
+        original_bytes = 0
+        served_bytes = 0
+        failed = 0
+        for name in names:
+            if not default_storage.exists(name):
+                self.stdout.write(self.style.WARNING(f'  Missing file: {name}'))
+                continue
+            try:
+                widths = generate_derivatives(name, force=options['force'])
+            except Exception as e:
+                failed += 1
+                self.stdout.write(self.style.ERROR(f'  Could not process {name}: {str(e)}'))
+                continue
+            
+            size = default_storage.size(name)
+            original_bytes += size
+            # The smallest derivative covering the slot, or the original if none does
+            chosen = next((width for width in widths if width >= report_width), None)
+            if chosen is None and widths and widths[-1] == max(DERIVATIVE_WIDTHS):
+                chosen = widths[-1]
+            served = default_storage.size(derivative_name(name, chosen, 'webp')) if chosen else size
+            served_bytes += served
+            self.stdout.write(f'  {name}: {widths or "no derivatives (already small)"}')
+        
+        self.stdout.write(self.style.SUCCESS(f'Processed {len(names) - failed} images ({failed} failed)'))
+        if original_bytes:
+            saving = 100 * (1 - served_bytes / original_bytes)
+            self.stdout.write(
+                f'Bytes for a {report_width}px slot: originals {original_bytes:,} B, '
+                f'WebP derivatives {served_bytes:,} B ({saving:.1f}% smaller)'
+            )
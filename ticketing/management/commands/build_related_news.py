@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from ticketing.models import News
+from ticketing.related_news import rebuild_related_news, TOP_K
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the related-articles index used on news pages'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--top-k',
+            type=int,
+            default=TOP_K,
+            help=f'Number of related articles stored per article (default: {TOP_K})',
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'Indexing {News.objects.count()} news articles...')
+        stored = rebuild_related_news(top_k=options['top_k'])
+        self.stdout.write(self.style.SUCCESS(f'Stored {stored} related-article links'))
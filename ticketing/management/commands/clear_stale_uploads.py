@@ -0,0 +1,30 @@
+import os
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from ticketing.models import VideoUpload
+
+
+class Command(BaseCommand):
+    help = 'Delete chunked video uploads that were abandoned or never attached to an article'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--hours',
+            type=int,
+            default=24,
+            help='Remove uploads started more than this many hours ago (default: 24)',
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(hours=options['hours'])
+        stale = VideoUpload.objects.filter(created_at__lt=cutoff)
+        
+        removed = 0
+        for upload in stale.iterator():
+            if os.path.exists(upload.temp_path):
+                os.remove(upload.temp_path)
+            upload.delete()
+            removed += 1
+        
+        self.stdout.write(self.style.SUCCESS(f'Removed {removed} stale uploads'))
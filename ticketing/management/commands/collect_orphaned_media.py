@@ -0,0 +1,78 @@
+import os
+from itertools import islice
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from ticketing.media_gc import MediaCollector, keep_patterns, remove
+
+
+class Command(BaseCommand):
+    help = 'Delete or quarantine media files that no database row references'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report orphans without touching them',
+        )
+        parser.add_argument(
+            '--quarantine',
+            metavar='DIR',
+            help='Move orphans into a timestamped folder under DIR instead of deleting them',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Orphans removed per batch (default: 500)',
+        )
+        parser.add_argument(
+            '--grace-hours',
+            type=float,
+            default=24,
+            help='Keep files modified within this many hours (default: 24)',
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        quarantine = options['quarantine']
+        if quarantine:
+            quarantine = os.path.join(
+                os.path.abspath(quarantine), timezone.now().strftime('%Y%m%d-%H%M%S')
+            )
+
+        collector = MediaCollector(
+            settings.MEDIA_ROOT,
+            upload_dir=getattr(settings, 'CHUNKED_UPLOAD_DIR', None),
+            keep=keep_patterns(),
+            grace_seconds=options['grace_hours'] * 3600,
+            skip=[options['quarantine']] if options['quarantine'] else [],
+        )
+
+        found = 0
+        freed = 0
+        removed = 0
+        orphans = collector.orphans()
+        while True:
+            batch = list(islice(orphans, options['batch_size']))
+            if not batch:
+                break
+            found += len(batch)
+            for name, path in batch:
+                try:
+                    freed += os.path.getsize(path)
+                except OSError:
+                    pass
+                if options['verbosity'] >= 2:
+                    self.stdout.write(f'  {name}')
+            if not dry_run:
+                removed += remove(batch, quarantine)
+                self.stdout.write(f'Processed {found} orphans...')
+
+        summary = f'Scanned {collector.scanned} files, found {found} orphans ({freed / (1024 * 1024):.1f} MB)'
+        if dry_run:
+            self.stdout.write(self.style.SUCCESS(f'{summary}; dry run, nothing removed'))
+        elif quarantine:
+            self.stdout.write(self.style.SUCCESS(f'{summary}; quarantined {removed} in {quarantine}'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'{summary}; removed {removed}'))
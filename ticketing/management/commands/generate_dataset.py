@@ -0,0 +1,60 @@
+import secrets
+import time
+from datetime import date
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from ticketing.synthetic_data import CHUNK_SIZE, SyntheticDataError, SyntheticDataset
+
+
+class Command(BaseCommand):
+    help = ('Generate a deterministic, production-sized dataset: seasons of matches with events, '
+            'fans, gatemen, tickets, gate scans, sales reports and news')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=1, help='Random seed (default: 1)')
+        parser.add_argument('--seasons', type=int, default=3, help='Seasons of fixtures, the last one in progress (default: 3)')
+        parser.add_argument('--fans', type=int, default=100_000, help='Fan accounts (default: 100000)')
+        parser.add_argument('--tickets', type=int, default=1_000_000,
+                            help='Tickets across the home matches (default: 1000000)')
+        parser.add_argument('--gatemen', type=int, default=40, help='Gateman accounts (default: 40)')
+        parser.add_argument('--admins', type=int, default=5, help='Staff accounts (default: 5)')
+        parser.add_argument('--news', type=int, default=300, help='News articles (default: 300)')
+        parser.add_argument('--today', type=date.fromisoformat,
+                            help='Day the dataset is laid out around, YYYY-MM-DD (default: today)')
+        parser.add_argument('--password',
+                            help='Password of every generated account (default: a random one, printed at the end)')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE,
+                            help=f'Rows saved per transaction (default: {CHUNK_SIZE})')
+        parser.add_argument('--disable-constraints', action='store_true',
+                            help='Skip foreign key checks while loading and check every table once at the end')
+        parser.add_argument('--force', action='store_true',
+                            help='Generate even though DEBUG is off, as it is in production')
+
+    def handle(self, *args, **options):
+        if not settings.DEBUG and not options['force']:
+            # The dataset includes staff accounts sharing one password
+            raise CommandError('DEBUG is off, so this may be a production database. '
+                               'Use --force to generate the dataset anyway.')
+        password = options['password'] or secrets.token_urlsafe(12)
+        started = time.perf_counter()
+
+        def log(message):
+            self.stdout.write(f'  {message} ({time.perf_counter() - started:.1f}s)')
+
+        dataset = SyntheticDataset(
+            seed=options['seed'], seasons=options['seasons'], fans=options['fans'], tickets=options['tickets'],
+            gatemen=options['gatemen'], admins=options['admins'], news=options['news'], today=options['today'],
+            password=password, chunk_size=options['chunk_size'], log=log,
+        )
+        try:
+            counts = dataset.generate(disable_constraints=options['disable_constraints'])
+        except SyntheticDataError as e:
+            raise CommandError(str(e))
+
+        total = sum(counts.values())
+        self.stdout.write(self.style.SUCCESS(
+            f'Generated {total:,} rows in {time.perf_counter() - started:.1f}s'
+        ))
+        if not options['password']:
+            self.stdout.write(f'Password of every generated account: {password}')
+        self.stdout.write('Run "python manage.py build_related_news" to index the new articles')
@@ -0,0 +1,43 @@
+import csv
+import time
+from django.core.management.base import BaseCommand, CommandError
+from ticketing.fan_import import CHUNK_SIZE, FanImportError, import_fans
+
+SHOWN_REJECTIONS = 20
+
+
+class Command(BaseCommand):
+    help = ('Register supporter-club members as fans from a CSV or XLSX file with columns '
+            'username, password, email, first_name, last_name, phone (only username is required)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV or .xlsx file; the first row names the columns')
+        parser.add_argument('--workers', type=int, help='Processes hashing passwords (default: one per CPU)')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE,
+                            help=f'Fans saved per transaction (default: {CHUNK_SIZE})')
+        parser.add_argument('--dry-run', action='store_true', help='Check the file without creating anyone')
+        parser.add_argument('--rejects', help='Write rejected rows and their errors to this CSV file')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        try:
+            result = import_fans(options['path'], workers=options['workers'],
+                                 chunk_size=options['chunk_size'], dry_run=options['dry_run'])
+        except (OSError, FanImportError) as e:
+            raise CommandError(str(e))
+        elapsed = time.perf_counter() - started
+
+        for number, username, errors in result.rejected[:SHOWN_REJECTIONS]:
+            self.stdout.write(self.style.WARNING(f'  Row {number} ({username or "no username"}): {" ".join(errors)}'))
+        if len(result.rejected) > SHOWN_REJECTIONS:
+            self.stdout.write(self.style.WARNING(f'  ... and {len(result.rejected) - SHOWN_REJECTIONS} more'))
+        if options['rejects']:
+            with open(options['rejects'], 'w', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(['row', 'username', 'errors'])
+                writer.writerows((number, username, ' '.join(errors)) for number, username, errors in result.rejected)
+
+        verb = 'Would create' if options['dry_run'] else 'Created'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {result.created} fans, rejected {len(result.rejected)} rows in {elapsed:.1f}s'
+        ))
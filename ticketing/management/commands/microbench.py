@@ -0,0 +1,102 @@
+import json
+import shutil
+import tempfile
+from pathlib import Path
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from ticketing.microbench import BENCHMARKS, compare, run
+
+DEFAULT_BASELINE = Path(__file__).resolve().parents[2] / 'microbench_baseline.json'
+
+
+class Command(BaseCommand):
+    help = ('Time the CPU hot paths (QR codes, PDFs, match summaries, scan JSON) in isolation and '
+            'fail when one is slower or allocates more than the committed baseline')
+
+    def add_arguments(self, parser):
+        parser.add_argument('names', nargs='*', choices=[[]] + list(BENCHMARKS), metavar='name',
+                            help=f"Benchmarks to run (default: all of {', '.join(BENCHMARKS)})")
+        parser.add_argument('--warmup', type=int, default=3, help='Untimed calls before timing (default: 3)')
+        parser.add_argument('--repeat', type=int, default=7, help='Timed rounds; the fastest counts (default: 7)')
+        parser.add_argument('--threshold', type=float, default=0.25,
+                            help='Allowed slowdown or extra peak memory as a fraction (default: 0.25)')
+        parser.add_argument('--baseline', default=str(DEFAULT_BASELINE),
+                            help='Baseline JSON file (default: ticketing/microbench_baseline.json)')
+        parser.add_argument('--confirm', type=int, default=2,
+                            help='Re-runs of a benchmark that looks regressed before it counts (default: 2)')
+        parser.add_argument('--save-baseline', action='store_true',
+                            help='Write these results to the baseline file instead of comparing')
+        parser.add_argument('--output', help='Also write the results to this JSON file')
+
+    def handle(self, *args, **options):
+        # QR renders would otherwise land in the real on-disk cache
+        qr_cache = tempfile.mkdtemp(prefix='microbench-qr-')
+        try:
+            with override_settings(QR_CACHE_DIR=Path(qr_cache)):
+                self.benchmark(options)
+        finally:
+            shutil.rmtree(qr_cache, ignore_errors=True)
+
+    def benchmark(self, options):
+        repeat = max(options['repeat'], 1)
+        results = run(options['names'], options['warmup'], repeat)
+
+        if options['save_baseline']:
+            baseline = self.read(options['baseline'], missing_ok=True)
+            # Keep entries for benchmarks that were not run this time
+            baseline.update(results, benchmarks={**baseline.get('benchmarks', {}), **results['benchmarks']})
+            self.write(options['baseline'], baseline)
+            for name, result in results['benchmarks'].items():
+                self.stdout.write(f"  {name:<20} {result['us_per_op']:11.1f} us   {result['peak_kib']:9.1f} KiB")
+            self.stdout.write(self.style.SUCCESS(f"Baseline saved to {options['baseline']}"))
+            if options['output']:
+                self.write(options['output'], results)
+            return
+        try:
+            self.check_regressions(results, repeat, options)
+        finally:
+            if options['output']:
+                self.write(options['output'], results)
+
+    def check_regressions(self, results, repeat, options):
+        baseline = self.read(options['baseline'], missing_ok=False)
+        rows = compare(results, baseline, options['threshold'])
+        # A shared machine has slow spells; a regression has to survive re-runs to count
+        for _attempt in range(options['confirm']):
+            suspects = [name for name, _time, _memory, regressed in rows if regressed]
+            if not suspects:
+                break
+            for name, result in run(suspects, options['warmup'], repeat)['benchmarks'].items():
+                if result['relative'] < results['benchmarks'][name]['relative']:
+                    results['benchmarks'][name] = result
+            rows = compare(results, baseline, options['threshold'])
+        self.stdout.write(f"{'benchmark':<20} {'us/op':>11} {'vs base':>8} {'peak KiB':>10} {'vs base':>8}")
+        for name, time_change, memory_change, regressed in rows:
+            result = results['benchmarks'][name]
+            changes = ('new', '') if time_change is None else (f'{time_change:+.0%}', f'{memory_change:+.0%}')
+            line = (f"{name:<20} {result['us_per_op']:11.1f} {changes[0]:>8} "
+                    f"{result['peak_kib']:10.1f} {changes[1]:>8}")
+            self.stdout.write(self.style.ERROR(line) if regressed else line)
+
+        regressions = [name for name, _time, _memory, regressed in rows if regressed]
+        if regressions:
+            raise CommandError(
+                f"Regressed beyond {options['threshold']:.0%} of the baseline: {', '.join(regressions)}"
+            )
+        self.stdout.write(self.style.SUCCESS(f"No regressions beyond {options['threshold']:.0%}"))
+
+    def read(self, path, missing_ok):
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            if missing_ok:
+                return {}
+            raise CommandError(f'No baseline at {path}; record one with --save-baseline')
+        except ValueError as e:
+            raise CommandError(f'Cannot read {path}: {e}')
+
+    def write(self, path, results):
+        with open(path, 'w') as f:
+            json.dump(results, f, indent=2)
+            f.write('\n')
@@ -0,0 +1,51 @@
+import fnmatch
+import os
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from ticketing.qr_codes import prune_disk_cache
+
+# Per-ticket QR images written before codes were rendered on demand
+LEGACY_QR_PATTERN = 'ticket_*.png'
+
+
+class Command(BaseCommand):
+    help = 'Delete per-ticket QR images left in media/qr_codes/ and trim the QR render cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report what would be deleted without deleting anything',
+        )
+        parser.add_argument(
+            '--max-cache-files',
+            type=int,
+            default=None,
+            help='Trim the on-disk QR cache to this many files (default: QR_DISK_CACHE_MAX_FILES)',
+        )
+
+    def handle(self, *args, **options):
+        directory = os.path.join(settings.MEDIA_ROOT, 'qr_codes')
+        dry_run = options['dry_run']
+
+        removed = 0
+        freed = 0
+        if os.path.isdir(directory):
+            # scandir streams entries, so huge directories are never listed in full
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if not entry.is_file() or not fnmatch.fnmatchcase(entry.name, LEGACY_QR_PATTERN):
+                        continue
+                    freed += entry.stat().st_size
+                    if not dry_run:
+                        os.remove(entry.path)
+                    removed += 1
+
+        action = 'Would remove' if dry_run else 'Removed'
+        self.stdout.write(self.style.SUCCESS(
+            f'{action} {removed} stored QR images ({freed / 1024:.1f} KB)'
+        ))
+
+        if not dry_run:
+            pruned = prune_disk_cache(options['max_cache_files'])
+            self.stdout.write(self.style.SUCCESS(f'Pruned {pruned} cached QR renders'))
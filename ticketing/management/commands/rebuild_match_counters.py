@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+from ticketing.match_stats import EVENT_COUNTERS, rebuild_counters
+from ticketing.models import Match
+
+
+class Command(BaseCommand):
+    help = 'Rebuild match scores and event counters (cards, corners, fouls) by replaying MatchEvents'
+
+    def add_arguments(self, parser):
+        parser.add_argument('match_ids', nargs='*', type=int, help='Matches to rebuild')
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Rebuild every live and completed match',
+        )
+
+    def handle(self, *args, **options):
+        if options['all']:
+            matches = Match.objects.filter(status__in=['live', 'completed'])
+        elif options['match_ids']:
+            matches = Match.objects.filter(id__in=options['match_ids'])
+            missing = set(options['match_ids']) - set(matches.values_list('id', flat=True))
+            if missing:
+                raise CommandError(f'No match with id {", ".join(map(str, sorted(missing)))}')
+        else:
+            raise CommandError('Give match ids or --all')
+
+        updated = rebuild_counters(matches)
+        fields = ', '.join(field for pair in EVENT_COUNTERS.values() for field in pair)
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {fields} for {updated} matches'))
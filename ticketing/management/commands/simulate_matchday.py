@@ -0,0 +1,76 @@
+import json
+from django.core.management.base import BaseCommand, CommandError
+from ticketing.load_testing import (
+    MATCHDAY_STEPS, SERVERS, MatchdaySimulation, ensure_static_manifest, run_server, scratch_database,
+)
+
+
+class Command(BaseCommand):
+    help = ('Simulate match-day fans (register, log in, book, pay, download, get scanned) against a local '
+            'server on a scratch database and report throughput and p50/p95/p99 latency per step')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--server', choices=sorted(SERVERS), default='asgi', help='Server to run (default: asgi)')
+        parser.add_argument('--workers', type=int, default=2, help='Server worker processes (default: 2)')
+        parser.add_argument('--fans', type=int, default=10, help='Fans going through the journey at once (default: 10)')
+        parser.add_argument('--duration', type=float, default=60,
+                            help='Seconds to keep starting new journeys (default: 60)')
+        parser.add_argument('--returning', action='store_true',
+                            help='Fans already have accounts: skip registration and log in each time')
+        parser.add_argument('--timeout', type=float, default=30, help='Seconds before a request fails (default: 30)')
+        parser.add_argument('--port', type=int, default=8772, help='Port the server listens on (default: 8772)')
+        parser.add_argument('--output', help='Write the results to this JSON file')
+        parser.add_argument('--compare', help='Earlier results JSON to compare this run with')
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options['compare']:
+            try:
+                with open(options['compare']) as f:
+                    baseline = json.load(f)
+            except (OSError, ValueError) as e:
+                raise CommandError(f"Cannot read {options['compare']}: {e}")
+
+        simulation = MatchdaySimulation(
+            f"http://127.0.0.1:{options['port']}", options['fans'], options['duration'],
+            returning=options['returning'], timeout=options['timeout'],
+        )
+        with scratch_database() as env:
+            ensure_static_manifest(env)
+            simulation.setup()
+            with run_server(options['server'], options['workers'], options['port'], env):
+                results = simulation.run()
+        results.update(server=options['server'], workers=options['workers'])
+
+        self.stdout.write(f"{'step':<16} {'ok/s':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}  errors")
+        for step in MATCHDAY_STEPS:
+            stats = results['steps'].get(step)
+            if stats:
+                line = (f"{step:<16} {stats['throughput']:7.2f} {stats['p50_ms']:8.0f} {stats['p95_ms']:8.0f} "
+                        f"{stats['p99_ms']:8.0f}  {stats['errors']}/{stats['requests']} ({stats['error_rate']:.1%})")
+                self.stdout.write(self.style.WARNING(line) if stats['errors'] else line)
+        for step, error in results['error_samples'].items():
+            self.stdout.write(self.style.ERROR(f'  {step}: {error}'))
+        self.stdout.write(self.style.SUCCESS(
+            f"{results['journeys']} journeys in {results['duration_s']:.0f}s: "
+            f"{results['tickets_sold_per_minute']:.1f} tickets sold and "
+            f"{results['fans_admitted_per_minute']:.1f} fans admitted per minute"
+        ))
+
+        if baseline:
+            self.compare(baseline, results)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(results, f, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
+
+    def compare(self, baseline, results):
+        self.stdout.write(f"Compared with {baseline.get('revision') or 'the baseline'} "
+                          f"({baseline.get('server')}, {baseline.get('fans')} fans):")
+        for step in MATCHDAY_STEPS:
+            before, after = baseline.get('steps', {}).get(step), results['steps'].get(step)
+            if before and after:
+                self.stdout.write(
+                    f"  {step:<16} ok/s {before['throughput']:7.2f} -> {after['throughput']:7.2f}   "
+                    f"p95 {before['p95_ms']:7.0f} -> {after['p95_ms']:7.0f} ms"
+                )
@@ -0,0 +1,99 @@
+"""
+Match score and counters derived from MatchEvent rows.
+
+Goals, cards, corners and fouls each bump one Match field for the team
+involved (see EVENT_COUNTERS). ``ingest_events`` stores a batch of events
+and applies their increments in the same transaction, so the counters
+never drift from the events that produced them. ``rebuild_counters``
+replays the events from scratch for matches whose events were edited or
+deleted, or whose counters were typed in by hand.
+"""
+from collections import Counter
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from .live import hub as live_hub
+from .models import Match, MatchEvent
+
+# event_type -> (home field, away field)
+EVENT_COUNTERS = {
+    'goal': ('home_score', 'away_score'),
+    'yellow_card': ('yellow_cards_home', 'yellow_cards_away'),
+    'red_card': ('red_cards_home', 'red_cards_away'),
+    'corner': ('corners_home', 'corners_away'),
+    'foul': ('fouls_home', 'fouls_away'),
+}
+
+
+def counter_field(event_type, team):
+    """The Match field an event of this type counts towards, or None"""
+    fields = EVENT_COUNTERS.get(event_type)
+    if fields is None:
+        return None
+    return fields[0] if team == 'home' else fields[1]
+
+
+def counter_deltas(events):
+    return Counter(
+        field for field in (counter_field(event.event_type, event.team) for event in events) if field
+    )
+
+
+def _events_changed(match):
+    """Publish the change and refresh texts stored on completed matches"""
+    if match.is_completed:
+        match.refresh_from_db()
+        match.save_event_texts()
+    transaction.on_commit(lambda: live_hub.notify(match.pk))
+
+
+def ingest_events(match, events, replay=False):
+    """Store unsaved MatchEvents for ``match`` and update its counters.
+
+    Counters are incremented in the database by the batch's own events,
+    so concurrent batches for one match cannot lose each other's updates.
+    With ``replay`` they are rebuilt from all of the match's events instead.
+    """
+    for event in events:
+        event.match = match
+    with transaction.atomic():
+        created = MatchEvent.objects.bulk_create(events)
+        if replay:
+            rebuild_counters(Match.objects.filter(pk=match.pk))
+        else:
+            # Both scores are always set, so the first goal reads "1 - 0"
+            deltas = Counter(dict.fromkeys(EVENT_COUNTERS['goal'], 0)) + counter_deltas(events)
+            increments = {
+                field: Coalesce(F(field), Value(0)) + deltas[field]
+                for field in {*EVENT_COUNTERS['goal'], *deltas}
+            }
+            Match.objects.filter(pk=match.pk).update(updated_at=timezone.now(), **increments)
+            _events_changed(match)
+    return created
+
+
+def rebuild_counters(matches):
+    """Recompute the score and counters of ``matches`` from their events.
+
+    One UPDATE with a counting subquery per field, then the stored texts
+    of the completed ones are rebuilt in bulk from their prefetched events,
+    so the query count does not grow with the matches. Returns the number
+    of matches updated.
+    """
+    counts = {}
+    for event_type, fields in EVENT_COUNTERS.items():
+        for team, field in zip(('home', 'away'), fields):
+            count = (MatchEvent.objects
+                     .filter(match=OuterRef('pk'), event_type=event_type, team=team)
+                     .order_by().values('match').annotate(total=Count('pk')).values('total'))
+            counts[field] = Coalesce(Subquery(count), Value(0))
+    with transaction.atomic():
+        updated = matches.update(updated_at=timezone.now(), **counts)
+        completed = list(matches.filter(status='completed').prefetch_related('events'))
+        for match in completed:
+            match.refresh_generated_texts(list(match.events.all()))
+        Match.objects.bulk_update(completed, ['generated_summary', 'generated_highlights'])
+        for match_id in matches.values_list('pk', flat=True):
+            transaction.on_commit(lambda match_id=match_id: live_hub.notify(match_id))
+    return updated
@@ -0,0 +1,82 @@
+from collections import Counter
+
+
+def generate_match_summary(match):
+    """Generate an auto-generated match summary based on match data."""
+    if not match.is_completed:
+        return ""
+    
+    summary_parts = []
+    
+    # Basic result - handle None case
+    if match.result is None:
+        summary_parts.append(f"Bo Rangers FC played against {match.opponent}")
+    elif match.result == 'Win':
+        summary_parts.append(f"Bo Rangers FC secured a {match.result.lower()} against {match.opponent}")
+    elif match.result == 'Loss':
+        summary_parts.append(f"Bo Rangers FC suffered a {match.result.lower()} to {match.opponent}")
+    elif match.result == 'Draw':
+        summary_parts.append(f"Bo Rangers FC played to a {match.result.lower()} with {match.opponent}")
+    else:
+        summary_parts.append(f"Bo Rangers FC played against {match.opponent}")
+    
+    summary_parts.append(f"in a thrilling encounter at {match.venue}.")
+    
+    # Score details
+    if match.home_score is not None and match.away_score is not None:
+        summary_parts.append(f"The final score was {match.score_display}.")
+    else:
+        summary_parts.append("The match has been completed.")
+    
+    # Attendance
+    if match.attendance:
+        summary_parts.append(f"The match was attended by {match.attendance:,} passionate fans.")
+    
+    # Weather
+    if match.weather:
+        summary_parts.append(f"Match conditions were {match.weather}.")
+    
+    # Key statistics
+    if match.shots_home and match.shots_away:
+        summary_parts.append(f"Bo Rangers had {match.shots_home} shots compared to {match.shots_away} from {match.opponent}.")
+    
+    if match.possession_home and match.possession_away:
+        summary_parts.append(f"Possession was {match.possession_home}% - {match.possession_away}%.")
+    
+    return " ".join(summary_parts)
+
+
+def generate_match_highlights(match, events):
+    """Generate match highlights based on events and statistics."""
+    if not match.is_completed:
+        return ""
+    
+    highlights = []
+    
+    # Count every event type in a single pass over the events
+    counts = Counter(e.event_type for e in events)
+    
+    # Goals
+    if counts['goal']:
+        highlights.append(f"⚽ {counts['goal']} goals were scored during the match.")
+    
+    # Cards
+    if counts['yellow_card']:
+        highlights.append(f"🟨 {counts['yellow_card']} yellow cards were shown.")
+    if counts['red_card']:
+        highlights.append(f"🟥 {counts['red_card']} red cards were shown.")
+    
+    # Substitutions
+    if counts['substitution']:
+        highlights.append(f"🔄 {counts['substitution']} substitutions were made.")
+    
+    # Key moments
+    if match.shots_on_target_home and match.shots_on_target_away:
+        total_shots_on_target = match.shots_on_target_home + match.shots_on_target_away
+        highlights.append(f"🎯 {total_shots_on_target} shots were on target.")
+    
+    if match.corners_home and match.corners_away:
+        total_corners = match.corners_home + match.corners_away
+        highlights.append(f"🏁 {total_corners} corners were awarded.")
+    
+    return " ".join(highlights)
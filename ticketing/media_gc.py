@@ -0,0 +1,250 @@
+"""
+Find media files that no database row references any more.
+
+Both sides of the comparison are streamed in sorted order and merged, so
+memory stays bounded however many files or rows there are:
+
+* the storage tree is walked directory by directory, with each listing
+  sorted through on-disk runs once it grows past ``run_size`` names;
+* every FileField is read with ``ORDER BY`` under a binary collation, so
+  the database orders names exactly as Python compares them.
+
+Image derivatives are orphaned when their original is, and partial video
+uploads when their VideoUpload row is gone. Files modified within the
+grace period are always kept so uploads in flight are never touched, as
+are files a template links to by path (see keep_patterns).
+"""
+import fnmatch
+import glob
+import heapq
+import os
+import re
+import shutil
+import tempfile
+import time
+from urllib.parse import urlsplit
+from django.apps import apps
+from django.conf import settings
+from django.db import connection
+from django.db.models import FileField, Q
+from django.db.models.functions import Collate
+from django.template import engines
+from .images import DERIVATIVE_DIR
+from .models import VideoUpload
+
+# Collations that compare strings by code point, per database vendor
+BINARY_COLLATIONS = {
+    'sqlite': 'BINARY',
+    'postgresql': 'C',
+    'mysql': 'utf8mb4_bin',
+    'oracle': 'BINARY',
+}
+
+RUN_SIZE = 100_000
+DERIVATIVE_BATCH_SIZE = 200
+
+
+def file_fields():
+    """(model, field name) for every FileField of every installed model"""
+    return [
+        (model, field.name)
+        for model in apps.get_models()
+        for field in model._meta.concrete_fields
+        if isinstance(field, FileField)
+    ]
+
+
+def template_media_names():
+    """Media files templates link to by path, e.g. /media/qr_codes/Logo.png"""
+    # MEDIA_URL's path or {{ MEDIA_URL }}, then the name up to the end of the URL
+    prefix = '(?:' + re.escape(urlsplit(settings.MEDIA_URL).path) + r'|\{\{\s*MEDIA_URL\s*\}\})'
+    reference = re.compile(prefix + r'''([^"'\s()?#{}<>]+)''')
+    names = set()
+    for engine in engines.all():
+        for directory in engine.template_dirs:
+            for root, _dirs, filenames in os.walk(directory):
+                for filename in filenames:
+                    with open(os.path.join(root, filename), encoding='utf-8', errors='replace') as f:
+                        names.update(reference.findall(f.read()))
+    return sorted(names)
+
+
+def keep_patterns():
+    """MEDIA_GC_KEEP plus every media file a template links to"""
+    return [*getattr(settings, 'MEDIA_GC_KEEP', ()), *(glob.escape(name) for name in template_media_names())]
+
+
+def _ordered(queryset, field_name):
+    collation = BINARY_COLLATIONS.get(connection.vendor)
+    if collation:
+        return queryset.order_by(Collate(field_name, collation))
+    return queryset.order_by(field_name)
+
+
+def referenced_names(chunk_size=2000):
+    """Every stored file name, in sorted order, possibly with repeats"""
+    streams = []
+    for model, field_name in file_fields():
+        queryset = model._default_manager.exclude(**{f'{field_name}__isnull': True}).exclude(**{field_name: ''})
+        streams.append(_ordered(queryset, field_name).values_list(field_name, flat=True).iterator(chunk_size=chunk_size))
+    return heapq.merge(*streams)
+
+
+def _spill(names):
+    run = tempfile.TemporaryFile('w+', encoding='utf-8', errors='surrogateescape')
+    run.writelines(name + '\n' for name in names)
+    run.seek(0)
+    return run
+
+
+def sorted_listing(path, run_size=RUN_SIZE):
+    """Names in ``path`` in sorted order, directories suffixed with '/'.
+
+    The suffix makes a directory sort where its contents would, so walking
+    directories in this order yields full paths in sorted order.
+    """
+    runs = []
+    chunk = []
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                chunk.append(entry.name + '/' if entry.is_dir(follow_symlinks=False) else entry.name)
+                if len(chunk) >= run_size:
+                    chunk.sort()
+                    runs.append(_spill(chunk))
+                    chunk = []
+        chunk.sort()
+        if not runs:
+            yield from chunk
+            return
+        runs.append(_spill(chunk))
+        chunk = []
+        yield from heapq.merge(*((line[:-1] for line in run) for run in runs))
+    finally:
+        for run in runs:
+            run.close()
+
+
+def walk_sorted(root, prefix='', skip=(), run_size=RUN_SIZE):
+    """Yield ``(relative name, absolute path)`` for every file under ``root`` in sorted order"""
+    for name in sorted_listing(os.path.join(root, prefix), run_size):
+        if name.endswith('/'):
+            directory = prefix + name
+            if os.path.realpath(os.path.join(root, directory)) in skip:
+                continue
+            yield from walk_sorted(root, directory, skip, run_size)
+        else:
+            yield prefix + name, os.path.join(root, prefix, name)
+
+
+def _derivative_stem(name):
+    """``dir/stem`` of the original a derivative was made from, or None"""
+    directory, _, filename = name.rpartition('/')
+    parent, _, folder = directory.rpartition('/')
+    if folder != DERIVATIVE_DIR:
+        return None
+    stem, dash, _width = os.path.splitext(filename)[0].rpartition('-')
+    if not dash:
+        return None
+    return f'{parent}/{stem}' if parent else stem
+
+
+def _referenced_stems(stems):
+    """The subset of ``stems`` for which a referenced file ``stem.<ext>`` exists"""
+    found = set()
+    for model, field_name in file_fields():
+        query = Q()
+        for stem in stems:
+            query |= Q(**{f'{field_name}__startswith': stem + '.'})
+        for name in model._default_manager.filter(query).values_list(field_name, flat=True):
+            found.add(name.rpartition('.')[0])
+    return found
+
+
+class MediaCollector:
+    """Stream orphans out of MEDIA_ROOT and CHUNKED_UPLOAD_DIR"""
+
+    def __init__(self, media_root, upload_dir=None, keep=(), grace_seconds=86400,
+                 skip=(), run_size=RUN_SIZE):
+        self.media_root = str(media_root)
+        self.upload_dir = str(upload_dir) if upload_dir else None
+        self.keep = tuple(keep)
+        self.cutoff = time.time() - grace_seconds
+        self.skip = {os.path.realpath(path) for path in skip}
+        self.run_size = run_size
+        self.scanned = 0
+
+    def _is_recent(self, path):
+        try:
+            return os.stat(path).st_mtime > self.cutoff
+        except FileNotFoundError:
+            return True
+
+    def _candidates(self, files, references):
+        """Merge-diff a sorted file stream against a sorted reference stream"""
+        reference = next(references, None)
+        for name, path in files:
+            self.scanned += 1
+            while reference is not None and reference < name:
+                reference = next(references, None)
+            if reference == name:
+                continue
+            if any(fnmatch.fnmatchcase(name, pattern) for pattern in self.keep):
+                continue
+            if self._is_recent(path):
+                continue
+            yield name, path
+
+    def _media_orphans(self):
+        pending = []
+
+        def flush():
+            found = _referenced_stems({stem for _name, _path, stem in pending})
+            orphans = [(name, path) for name, path, stem in pending if stem not in found]
+            pending.clear()
+            return orphans
+
+        files = walk_sorted(self.media_root, skip=self.skip, run_size=self.run_size)
+        for name, path in self._candidates(files, referenced_names()):
+            stem = _derivative_stem(name)
+            if stem is None:
+                yield name, path
+                continue
+            pending.append((name, path, stem))
+            if len(pending) >= DERIVATIVE_BATCH_SIZE:
+                yield from flush()
+        if pending:
+            yield from flush()
+
+    def _upload_orphans(self):
+        if not self.upload_dir or not os.path.isdir(self.upload_dir):
+            return
+        references = (
+            f'{upload_id}.part'
+            for upload_id in VideoUpload.objects.order_by('upload_id').values_list('upload_id', flat=True).iterator(chunk_size=2000)
+        )
+        files = walk_sorted(self.upload_dir, skip=self.skip, run_size=self.run_size)
+        for name, path in self._candidates(files, references):
+            yield f'{os.path.basename(self.upload_dir.rstrip(os.sep))}/{name}', path
+
+    def orphans(self):
+        """Yield ``(display name, absolute path)`` for every orphaned file"""
+        yield from self._media_orphans()
+        yield from self._upload_orphans()
+
+
+def remove(orphans, quarantine=None):
+    """Delete ``(name, path)`` pairs, or move them to ``quarantine/<name>``. Returns the count."""
+    removed = 0
+    for name, path in orphans:
+        try:
+            if quarantine:
+                target = os.path.join(quarantine, name)
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                shutil.move(path, target)
+            else:
+                os.remove(path)
+        except FileNotFoundError:
+            continue
+        removed += 1
+    return removed
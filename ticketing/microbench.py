@@ -0,0 +1,228 @@
+"""
+Micro-benchmarks for the CPU-heavy paths of a request.
+
+Each benchmark builds its inputs once, in memory and without touching
+the database, and returns the operation to time. The runner calls it a
+few times to warm up, then times ``repeat`` rounds of ``number`` calls.
+``number`` is calibrated so that one round lasts about ROUND_SECONDS, and
+the fastest round gives the per-op time. A separate call under
+tracemalloc records the peak memory the operation allocates.
+
+Times are also stored relative to a fixed pure-Python workload, so a
+baseline recorded on one machine can still flag regressions on another.
+"""
+import gc
+import json
+import platform
+import statistics
+import time
+import tracemalloc
+from datetime import timedelta
+from decimal import Decimal
+from django.contrib.auth.models import User
+from django.http import JsonResponse
+from django.utils import timezone
+from .match_summaries import generate_match_highlights, generate_match_summary
+from .models import Match, MatchEvent, Report, Ticket, TicketCategory
+from .pdfs import match_report_pdf, sales_reports_pdf, ticket_pdf
+from .qr_codes import clear_memory_cache, qr_payload, render_png, ticket_qr_png
+
+ROUND_SECONDS = 0.2
+# Peak allocations within this many KiB of the baseline are noise, not regressions
+MEMORY_SLACK_KIB = 4
+
+BENCHMARKS = {}
+
+
+def benchmark(name):
+    """Register a setup function that returns the zero-argument operation to time"""
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+
+def sample_match(**fields):
+    return Match(**{
+        'id': 1, 'title': 'Bo Rangers FC vs East End Lions', 'opponent': 'East End Lions',
+        'venue': 'Bo Stadium', 'date': timezone.now(), 'matchday': 1, **fields,
+    })
+
+
+def sample_ticket():
+    return Ticket(
+        id=1, match=sample_match(), user=User(id=1, username='kamara', first_name='Abu', last_name='Kamara'),
+        ticket_category=TicketCategory(id=1, name='VIP', price=Decimal('150.00')),
+        quantity=2, payment_status='completed', created_at=timezone.now(),
+    )
+
+
+@benchmark('qr_render')
+def qr_render():
+    """Encoding a ticket's QR code from scratch, as on a cache miss"""
+    payload = qr_payload(sample_ticket())
+    return lambda: render_png(payload)
+
+
+@benchmark('qr_cached')
+def qr_cached():
+    """Serving a ticket's QR code from the in-process cache"""
+    ticket = sample_ticket()
+    clear_memory_cache()
+    ticket_qr_png(ticket)
+    return lambda: ticket_qr_png(ticket)
+
+
+@benchmark('ticket_pdf')
+def ticket_pdf_bench():
+    """download_ticket: the A4 ticket, QR code already cached"""
+    ticket = sample_ticket()
+    return lambda: ticket_pdf(ticket)
+
+
+@benchmark('match_report_pdf')
+def match_report_pdf_bench():
+    """download_report: one match with four categories"""
+    report = Report(match=sample_match(), tickets_sold=1200, revenue=Decimal('84000.00'),
+                    generated_at=timezone.now())
+    categories = [{'ticket_category__name': name, 'count': 300, 'total': Decimal('21000.00')}
+                  for name in ('VIP', 'Regular', 'Student', 'Family')]
+    return lambda: match_report_pdf(report, categories)
+
+
+@benchmark('sales_reports_pdf')
+def sales_reports_pdf_bench():
+    """export_reports_pdf: a season of 60 reports, three pages"""
+    reports = [Report(match=sample_match(date=timezone.now() - timedelta(days=7 * i)), tickets_sold=900 + i,
+                      revenue=Decimal('45000.00') + i, generated_at=timezone.now()) for i in range(60)]
+    return lambda: sales_reports_pdf(reports, 'admin')
+
+
+@benchmark('match_summary')
+def match_summary():
+    """Summary and highlights for a completed match with 90 events"""
+    match = sample_match(status='completed', home_score=3, away_score=1, attendance=12500,
+                         weather='Sunny', shots_home=14, shots_away=8, possession_home=58, possession_away=42,
+                         shots_on_target_home=6, shots_on_target_away=3, corners_home=7, corners_away=4)
+    event_types = [event_type for event_type, _label in MatchEvent.EVENT_TYPES]
+    events = [MatchEvent(match=match, event_type=event_types[i % len(event_types)], minute=i, team='home')
+              for i in range(90)]
+    return lambda: (generate_match_summary(match), generate_match_highlights(match, events))
+
+
+@benchmark('scan_ticket_json')
+def scan_ticket_json():
+    """scan_ticket: decoding the scanner's body and encoding the admitted response"""
+    ticket = sample_ticket()
+    ticket.scanned_at = timezone.now()
+    body = json.dumps({'ticket_id': str(ticket.ticket_id)}).encode()
+
+    def scan():
+        if not json.loads(body).get('ticket_id'):
+            raise ValueError('Missing ticket ID')
+        return JsonResponse({
+            'success': True,
+            'message': 'Ticket scanned successfully',
+            'ticket_info': {
+                'id': ticket.id,
+                'match': ticket.match.title,
+                'ticket_category': ticket.ticket_category.name,
+                'quantity': ticket.quantity,
+                'user': ticket.user.get_full_name() or ticket.user.username,
+                'scanned_at': ticket.scanned_at.strftime("%Y-%m-%d %H:%M:%S")
+            }
+        }).content
+    return scan
+
+
+def reference_workload():
+    """Fixed pure-Python work that times are expressed relative to"""
+    return sum(i * i % 7 for i in range(20000))
+
+
+def time_per_op(op, warmup, repeat):
+    """Fastest and median seconds per call over ``repeat`` rounds, and calls per round"""
+    for _ in range(warmup):
+        op()
+
+    def timed(number):
+        started = time.perf_counter()
+        for _ in range(number):
+            op()
+        return time.perf_counter() - started
+
+    # Like timeit, keep garbage collection pauses out of the rounds
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        number = 1
+        while (elapsed := timed(number)) < ROUND_SECONDS and number < 1_000_000:
+            number = max(number * 2, int(number * ROUND_SECONDS / max(elapsed, 1e-9)))
+        rounds = [elapsed / number] + [timed(number) / number for _ in range(repeat - 1)]
+    finally:
+        if gc_enabled:
+            gc.enable()
+    return min(rounds), statistics.median(rounds), number
+
+
+def peak_allocation(op):
+    """Peak bytes held by allocations made during one call"""
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        baseline, _peak = tracemalloc.get_traced_memory()
+        op()
+        _current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak - baseline
+
+
+def run(names=None, warmup=3, repeat=7):
+    """Run the named benchmarks (default: all) and return the results document"""
+    results = {}
+    references = []
+    for name in names or BENCHMARKS:
+        op = BENCHMARKS[name]()
+        # The reference is timed either side of each benchmark so that slow
+        # spells on a shared machine scale both alike
+        before, _median, _number = time_per_op(reference_workload, 1, repeat)
+        best, median, number = time_per_op(op, warmup, repeat)
+        after, _median, _number = time_per_op(reference_workload, 1, repeat)
+        reference = (before + after) / 2
+        references.append(reference)
+        results[name] = {
+            'us_per_op': best * 1e6,
+            'median_us_per_op': median * 1e6,
+            'relative': best / reference,
+            'peak_kib': peak_allocation(op) / 1024,
+            'number': number,
+            'repeat': repeat,
+        }
+    return {
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'reference_us': statistics.median(references) * 1e6 if references else None,
+        'benchmarks': results,
+    }
+
+
+def compare(results, baseline, threshold):
+    """Return rows of (name, time change, memory change, regressed) against ``baseline``.
+
+    Changes are fractions (0.3 is 30% slower or larger); None when the
+    baseline has no entry for the benchmark.
+    """
+    rows = []
+    for name, result in results['benchmarks'].items():
+        before = baseline.get('benchmarks', {}).get(name)
+        if before is None:
+            rows.append((name, None, None, False))
+            continue
+        time_change = result['relative'] / before['relative'] - 1
+        memory_change = result['peak_kib'] / before['peak_kib'] - 1 if before['peak_kib'] else 0
+        regressed = time_change > threshold or (
+            memory_change > threshold and result['peak_kib'] - before['peak_kib'] > MEMORY_SLACK_KIB
+        )
+        rows.append((name, time_change, memory_change, regressed))
+    return rows
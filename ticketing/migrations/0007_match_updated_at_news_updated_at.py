@@ -0,0 +1,33 @@
+# Generated by Django 5.2.4 on 2026-10-19 11:54
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_updated_at(apps, schema_editor):
+    # Existing rows would otherwise all share the migration timestamp
+    Match = apps.get_model('ticketing', 'Match')
+    News = apps.get_model('ticketing', 'News')
+    Match.objects.update(updated_at=F('created_at'))
+    News.objects.update(updated_at=F('date_posted'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ticketing', '0006_match_opponent_logo'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='match',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.AddField(
+            model_name='news',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.RunPython(backfill_updated_at, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-19 11:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ticketing', '0007_match_updated_at_news_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='match',
+            name='generated_highlights',
+            field=models.TextField(blank=True, editable=False, help_text='Highlights stored when the match is completed'),
+        ),
+        migrations.AddField(
+            model_name='match',
+            name='generated_summary',
+            field=models.TextField(blank=True, editable=False, help_text='Summary stored when the match is completed'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.4 on 2026-10-19 11:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ticketing', '0008_match_generated_texts'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='news',
+            name='category',
+            field=models.CharField(choices=[('match_recap', 'Match Recap'), ('press_release', 'Press Release'), ('club_news', 'Club News'), ('transfer', 'Transfer News'), ('general', 'General')], db_index=True, default='general', max_length=20),
+        ),
+        migrations.CreateModel(
+            name='RelatedNews',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField(help_text='Cosine similarity of the TF-IDF vectors')),
+                ('article', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='related_entries', to='ticketing.news')),
+                ('related', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='ticketing.news')),
+            ],
+            options={
+                'verbose_name_plural': 'Related News',
+                'ordering': ['-score'],
+                'unique_together': {('article', 'related')},
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-19 11:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ticketing', '0009_relatednews'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='match',
+            name='date',
+            field=models.DateTimeField(db_index=True),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.4 on 2026-10-19 12:06
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ticketing', '0011_videoupload'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='ticket',
+            name='qr_code',
+        ),
+    ]
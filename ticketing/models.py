@@ -1,21 +1,64 @@
 from django.db import models
+from django.conf import settings
 from django.contrib.auth.models import User
 from django.utils import timezone
-import qrcode
-from io import BytesIO
-from django.core.files import File
+import os
 import uuid
+from .match_summaries import generate_match_summary, generate_match_highlights
 
 
-class Match(models.Model):
+class StoredValuesMixin:
+    """Remembers the stored values of a model's TRACKED_FIELDS, so saves can tell what changed"""
+    TRACKED_FIELDS = frozenset()
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._remember_stored_values(cls.TRACKED_FIELDS)
+        return instance
+    
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        super().refresh_from_db(using, fields, from_queryset)
+        self._remember_stored_values(self.TRACKED_FIELDS if fields is None else self.TRACKED_FIELDS & set(fields))
+    
+    def _current_value(self, name):
+        value = self.__dict__[name]
+        # Files compare by name
+        return getattr(value, 'name', value)
+    
+    def _remember_stored_values(self, fields):
+        """Note the stored values of ``fields``; deferred ones are left out rather than loaded"""
+        stored = self.__dict__.setdefault('_stored_values', {})
+        for name in fields:
+            if name in self.__dict__:
+                stored[name] = self._current_value(name)
+    
+    def _changed_fields(self, fields):
+        """Those of ``fields`` set to something other than their stored value"""
+        stored = self.__dict__.get('_stored_values', {})
+        return {name for name in fields
+                if name in self.__dict__ and (name not in stored or stored[name] != self._current_value(name))}
+
+
+class Match(StoredValuesMixin, models.Model):
     STATUS_CHOICES = [
         ('upcoming', 'Upcoming'),
         ('live', 'Live'),
         ('completed', 'Completed'),
     ]
+    # Fields the stored summary and highlights are generated from. Event
+    # changes regenerate them through save_event_texts (see signals.py)
+    GENERATED_TEXT_FIELDS = frozenset({
+        'status', 'opponent', 'venue', 'home_score', 'away_score', 'attendance', 'weather',
+        'possession_home', 'possession_away', 'shots_home', 'shots_away',
+        'shots_on_target_home', 'shots_on_target_away', 'corners_home', 'corners_away',
+    })
+    LOGO_FIELDS = ('home_team_logo', 'opponent_logo')
+    # Fields whose stored values are remembered, so saves can tell what changed
+    TRACKED_FIELDS = GENERATED_TEXT_FIELDS | frozenset(LOGO_FIELDS)
     
     title = models.CharField(max_length=200)
-    date = models.DateTimeField()
+    date = models.DateTimeField(db_index=True)
     home_team = models.CharField(max_length=100, default='Bo Rangers FC', help_text='Home team name')
     home_team_logo = models.ImageField(upload_to='team_logos/', blank=True, null=True, help_text='Home team logo')
     opponent = models.CharField(max_length=100)
@@ -24,12 +67,15 @@ class Match(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='upcoming')
     matchday = models.IntegerField()
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
     
     # Match result fields for completed matches
     home_score = models.PositiveIntegerField(null=True, blank=True)
     away_score = models.PositiveIntegerField(null=True, blank=True)
     match_summary = models.TextField(blank=True, help_text='Auto-generated match summary')
     highlights = models.TextField(blank=True, help_text='Key moments and highlights')
+    generated_summary = models.TextField(blank=True, editable=False, help_text='Summary stored when the match is completed')
+    generated_highlights = models.TextField(blank=True, editable=False, help_text='Highlights stored when the match is completed')
     attendance = models.PositiveIntegerField(null=True, blank=True)
     weather = models.CharField(max_length=50, blank=True)
     referee = models.CharField(max_length=100, blank=True)
@@ -56,6 +102,41 @@ class Match(models.Model):
     def __str__(self):
         return f"{self.title} vs {self.opponent}"
     
+    def changed_logos(self, update_fields=None):
+        """Names of the logo files this save stores anew; for post_save receivers"""
+        fields = self.LOGO_FIELDS if update_fields is None else set(self.LOGO_FIELDS) & set(update_fields)
+        return [getattr(self, name).name for name in self._changed_fields(fields) if getattr(self, name)]
+    
+    def save(self, *args, **kwargs):
+        # Store the generated texts so match pages never rebuild them per
+        # view, regenerating them only when a field they use has changed
+        update_fields = kwargs.get('update_fields')
+        saving = self.TRACKED_FIELDS if update_fields is None else self.TRACKED_FIELDS & set(update_fields)
+        if self._state.adding or self._changed_fields(saving & self.GENERATED_TEXT_FIELDS):
+            texts = (self.generated_summary, self.generated_highlights)
+            self.refresh_generated_texts()
+            if update_fields is not None and texts != (self.generated_summary, self.generated_highlights):
+                kwargs['update_fields'] = set(update_fields) | {'generated_summary', 'generated_highlights'}
+        super().save(*args, **kwargs)
+        # After post_save, so its receivers still see what changed
+        self._remember_stored_values(saving)
+    
+    def save_event_texts(self):
+        """Regenerate and store the texts after the match's events changed"""
+        self.refresh_generated_texts()
+        self.save(update_fields=['updated_at', 'generated_summary', 'generated_highlights'])
+    
+    def refresh_generated_texts(self, events=None):
+        """Regenerate the stored summary and highlights from current data"""
+        if not self.is_completed:
+            self.generated_summary = ''
+            self.generated_highlights = ''
+            return
+        if events is None:
+            events = list(self.events.all()) if self.pk else []
+        self.generated_summary = generate_match_summary(self)
+        self.generated_highlights = generate_match_highlights(self, events)
+    
     @property
     def is_completed(self):
         return self.status == 'completed'
@@ -102,7 +183,6 @@ class Ticket(models.Model):
     ticket_category = models.ForeignKey(TicketCategory, on_delete=models.CASCADE)
     quantity = models.PositiveIntegerField(default=1)
     payment_status = models.CharField(max_length=20, choices=PAYMENT_STATUS_CHOICES, default='pending')
-    qr_code = models.ImageField(upload_to='qr_codes/', blank=True, null=True)
     ticket_id = models.UUIDField(default=uuid.uuid4, editable=False, unique=True)
     created_at = models.DateTimeField(auto_now_add=True)
     
@@ -111,32 +191,6 @@ class Ticket(models.Model):
     scanned_at = models.DateTimeField(null=True, blank=True)
     scanned_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='scanned_tickets')
 
-    def save(self, *args, **kwargs):
-        # Generate QR code if payment is completed and QR code doesn't exist
-        if self.payment_status == 'completed' and not self.qr_code:
-            qr_data = f"Ticket ID: {self.ticket_id}\nMatch: {self.match.title}\nUser: {self.user.username}\nCategory: {self.ticket_category.name}\nQuantity: {self.quantity}"
-            
-            qr = qrcode.QRCode(
-                version=1,
-                error_correction=qrcode.constants.ERROR_CORRECT_L,
-                box_size=10,
-                border=4,
-            )
-            qr.add_data(qr_data)
-            qr.make(fit=True)
-            
-            qr_img = qr.make_image(fill_color="black", back_color="white")
-            
-            # Save QR code to file
-            buffer = BytesIO()
-            qr_img.save(buffer, format='PNG')
-            buffer.seek(0)
-            
-            filename = f'ticket_{self.ticket_id}.png'
-            self.qr_code.save(filename, File(buffer), save=False)
-        
-        super().save(*args, **kwargs)
-    
     def total_price(self):
         return self.ticket_category.price * self.quantity
     
@@ -144,7 +198,7 @@ class Ticket(models.Model):
         return f"Ticket for {self.match.title} - {self.user.username}"
 
 
-class News(models.Model):
+class News(StoredValuesMixin, models.Model):
     CATEGORY_CHOICES = [
         ('match_recap', 'Match Recap'),
         ('press_release', 'Press Release'),
@@ -157,17 +211,71 @@ class News(models.Model):
     body = models.TextField()
     image = models.ImageField(upload_to='news_images/', blank=True, null=True)
     video = models.FileField(upload_to='news_videos/', blank=True, null=True, help_text='Upload a video file to accompany the news article')
-    category = models.CharField(max_length=20, choices=CATEGORY_CHOICES, default='general')
+    category = models.CharField(max_length=20, choices=CATEGORY_CHOICES, default='general', db_index=True)
     author = models.ForeignKey(User, on_delete=models.CASCADE)
     date_posted = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
     is_featured = models.BooleanField(default=False)
     
     class Meta:
         ordering = ['-date_posted']
         verbose_name_plural = "News"
     
+    # Remembered so saves that keep the same image do not redo its derivatives
+    TRACKED_FIELDS = frozenset({'image'})
+    
     def __str__(self):
         return self.title
+    
+    def changed_images(self, update_fields=None):
+        """Names of the image files this save stores anew; for post_save receivers"""
+        fields = self.TRACKED_FIELDS if update_fields is None else self.TRACKED_FIELDS & set(update_fields)
+        return [getattr(self, name).name for name in self._changed_fields(fields) if getattr(self, name)]
+    
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        # After post_save, so its receivers still see what changed
+        update_fields = kwargs.get('update_fields')
+        self._remember_stored_values(self.TRACKED_FIELDS if update_fields is None
+                                     else self.TRACKED_FIELDS & set(update_fields))
+
+
+class VideoUpload(models.Model):
+    """A news video being uploaded in chunks, reassembled under CHUNKED_UPLOAD_DIR"""
+    upload_id = models.UUIDField(default=uuid.uuid4, editable=False, unique=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    filename = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField(help_text='Total size of the file in bytes')
+    offset = models.PositiveBigIntegerField(default=0, help_text='Bytes received so far')
+    checksum = models.CharField(max_length=64, blank=True, help_text='SHA-256 of the whole file')
+    created_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    
+    def __str__(self):
+        return f"{self.filename} ({self.offset}/{self.size} bytes)"
+    
+    @property
+    def is_complete(self):
+        return self.completed_at is not None
+    
+    @property
+    def temp_path(self):
+        return os.path.join(settings.CHUNKED_UPLOAD_DIR, f'{self.upload_id}.part')
+
+
+class RelatedNews(models.Model):
+    """Precomputed nearest neighbours of an article, see ticketing.related_news"""
+    article = models.ForeignKey(News, on_delete=models.CASCADE, related_name='related_entries')
+    related = models.ForeignKey(News, on_delete=models.CASCADE, related_name='+')
+    score = models.FloatField(help_text='Cosine similarity of the TF-IDF vectors')
+    
+    class Meta:
+        ordering = ['-score']
+        unique_together = ['article', 'related']
+        verbose_name_plural = "Related News"
+    
+    def __str__(self):
+        return f"{self.article.title} -> {self.related.title} ({self.score:.3f})"
 
 
 class UserProfile(models.Model):
@@ -0,0 +1,254 @@
+"""
+PDF documents: sales reports and printable tickets.
+
+reportlab is large and slow to import, and only these downloads use it,
+so it is imported inside each builder rather than at module level. That
+keeps it out of worker boot, URL resolution and management commands.
+"""
+import os
+from datetime import datetime
+from io import BytesIO
+from django.conf import settings
+from .qr_codes import ticket_qr_png
+
+REPORT_COLUMNS = (
+    (30, 'Match'),
+    (180, 'Date'),
+    (260, 'Tickets'),
+    (320, 'Revenue (Nle)'),
+    (420, 'Generated'),
+)
+
+
+def _report_table_header(p, y_position, width):
+    p.setFont('Helvetica-Bold', 10)
+    for x, label in REPORT_COLUMNS:
+        p.drawString(x, y_position, label)
+    p.line(30, y_position - 10, width - 30, y_position - 10)
+
+
+def _confidential_footer(p):
+    p.showPage()
+    p.setFont('Helvetica', 8)
+    p.drawString(30, 30, 'Bo Rangers FC Ticketing System - Confidential')
+    p.save()
+
+
+def sales_reports_pdf(reports, generated_by):
+    """All sales reports in one table, with totals"""
+    from reportlab.lib.pagesizes import letter
+    from reportlab.pdfgen import canvas
+
+    reports = list(reports)
+    buffer = BytesIO()
+    p = canvas.Canvas(buffer, pagesize=letter)
+    width, height = letter
+
+    # Set up the document with a header
+    p.setFont('Helvetica-Bold', 16)
+    p.drawString(30, height - 50, 'Bo Rangers FC - Sales Reports')
+    p.setFont('Helvetica', 10)
+    p.drawString(30, height - 70, f'Generated on: {datetime.now().strftime("%Y-%m-%d %H:%M")}')
+    p.drawString(30, height - 90, f'Generated by: {generated_by}')
+    p.line(30, height - 100, width - 30, height - 100)
+
+    # Add summary section
+    total_tickets = sum(report.tickets_sold for report in reports)
+    total_revenue = sum(report.revenue for report in reports)
+    p.setFont('Helvetica-Bold', 12)
+    p.drawString(30, height - 130, 'Summary')
+    p.setFont('Helvetica', 10)
+    p.drawString(30, height - 150, f'Total Reports: {len(reports)}')
+    p.drawString(30, height - 170, f'Total Tickets Sold: {total_tickets}')
+    p.drawString(30, height - 190, f'Total Revenue: Nle{float(total_revenue):.2f}')
+
+    y_position = height - 230
+    _report_table_header(p, y_position, width)
+    y_position -= 30
+    p.setFont('Helvetica', 9)
+
+    for report in reports:
+        # Check if we need a new page
+        if y_position < 50:
+            p.showPage()
+            p.setFont('Helvetica-Bold', 12)
+            p.drawString(30, height - 50, 'Bo Rangers FC - Sales Reports (Continued)')
+            _report_table_header(p, height - 80, width)
+            y_position = height - 110
+            p.setFont('Helvetica', 9)
+
+        match_title = f"{report.match.title} vs {report.match.opponent}"
+        if len(match_title) > 25:
+            match_title = match_title[:22] + '...'
+
+        p.drawString(30, y_position, match_title)
+        p.drawString(180, y_position, report.match.date.strftime('%Y-%m-%d'))
+        p.drawString(260, y_position, str(report.tickets_sold))
+        p.drawString(320, y_position, f"{float(report.revenue):.2f}")
+        p.drawString(420, y_position, report.generated_at.strftime('%Y-%m-%d'))
+        y_position -= 20
+
+    _confidential_footer(p)
+    return buffer.getvalue()
+
+
+def match_report_pdf(report, categories):
+    """One match's sales report with its per-category breakdown"""
+    from reportlab.lib.pagesizes import letter
+    from reportlab.pdfgen import canvas
+
+    buffer = BytesIO()
+    p = canvas.Canvas(buffer, pagesize=letter)
+    width, height = letter
+
+    # Set up the document with a header
+    p.setFont('Helvetica-Bold', 16)
+    p.drawString(30, height - 50, 'Bo Rangers FC - Match Sales Report')
+    p.setFont('Helvetica-Bold', 14)
+    p.drawString(30, height - 80, f'{report.match.title} vs {report.match.opponent}')
+
+    p.setFont('Helvetica', 10)
+    p.drawString(30, height - 100, f'Match Date: {report.match.date.strftime("%Y-%m-%d %H:%M")}')
+    p.drawString(30, height - 120, f'Venue: {report.match.venue}')
+    p.drawString(30, height - 140, f'Report Generated: {report.generated_at.strftime("%Y-%m-%d %H:%M")}')
+    p.line(30, height - 160, width - 30, height - 160)
+
+    # Add summary section
+    p.setFont('Helvetica-Bold', 12)
+    p.drawString(30, height - 190, 'Sales Summary')
+    p.setFont('Helvetica', 10)
+    p.drawString(30, height - 220, f'Tickets Sold: {report.tickets_sold}')
+    p.drawString(30, height - 240, f'Total Revenue: Nle{float(report.revenue):.2f}')
+    avg_price = report.revenue / report.tickets_sold if report.tickets_sold > 0 else 0
+    p.drawString(30, height - 260, f'Average Ticket Price: Nle{float(avg_price):.2f}')
+
+    # Add category breakdown
+    if categories:
+        p.setFont('Helvetica-Bold', 12)
+        p.drawString(30, height - 300, 'Category Breakdown')
+
+        y_position = height - 330
+        p.setFont('Helvetica-Bold', 10)
+        p.drawString(30, y_position, 'Category')
+        p.drawString(200, y_position, 'Tickets Sold')
+        p.drawString(300, y_position, 'Revenue (Nle)')
+        p.line(30, y_position - 10, width - 30, y_position - 10)
+
+        y_position -= 30
+        p.setFont('Helvetica', 10)
+        for category in categories:
+            p.drawString(30, y_position, category['ticket_category__name'])
+            p.drawString(200, y_position, str(category['count']))
+            p.drawString(300, y_position, f"{float(category['total']):.2f}")
+            y_position -= 20
+
+    _confidential_footer(p)
+    return buffer.getvalue()
+
+
+def ticket_pdf(ticket):
+    """A printable A4 ticket with the entry QR code"""
+    from reportlab.lib.colors import black, green
+    from reportlab.lib.enums import TA_CENTER, TA_LEFT
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.lib.units import inch
+    from reportlab.platypus import Image, Paragraph, SimpleDocTemplate, Spacer
+
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=A4, rightMargin=72, leftMargin=72, topMargin=72, bottomMargin=18)
+    elements = []
+
+    # Define styles
+    styles = getSampleStyleSheet()
+    title_style = styles['Title']
+    title_style.alignment = TA_CENTER
+    title_style.fontSize = 24
+    title_style.textColor = green
+
+    heading_style = styles['Heading2']
+    heading_style.alignment = TA_CENTER
+    heading_style.fontSize = 18
+    heading_style.textColor = black
+
+    normal_style = styles['Normal']
+    normal_style.fontSize = 12
+    normal_style.alignment = TA_LEFT
+
+    # Add logo if exists
+    logo_path = os.path.join(settings.MEDIA_ROOT, 'qr_codes', 'Logo.png')
+    if os.path.exists(logo_path):
+        try:
+            logo = Image(logo_path, width=2*inch, height=2*inch)
+            logo.hAlign = 'CENTER'
+            elements.append(logo)
+            elements.append(Spacer(1, 12))
+        except Exception:
+            pass  # Skip logo if there's an issue
+
+    # Title
+    elements.append(Paragraph("BO RANGERS FC", title_style))
+    elements.append(Paragraph("OFFICIAL MATCH TICKET", heading_style))
+    elements.append(Spacer(1, 24))
+
+    # Ticket border (decorative line)
+    elements.append(Paragraph("━" * 50, normal_style))
+    elements.append(Spacer(1, 12))
+
+    # Match Information
+    elements.append(Paragraph(f"<b>MATCH:</b> {ticket.match.title}", normal_style))
+    elements.append(Paragraph(f"<b>OPPONENT:</b> vs {ticket.match.opponent}", normal_style))
+    elements.append(Spacer(1, 12))
+
+    # Date and Time
+    elements.append(Paragraph(f"<b>DATE:</b> {ticket.match.date.strftime('%A, %B %d, %Y')}", normal_style))
+    elements.append(Paragraph(f"<b>TIME:</b> {ticket.match.date.strftime('%H:%M')}", normal_style))
+    elements.append(Paragraph(f"<b>VENUE:</b> {ticket.match.venue}", normal_style))
+    elements.append(Spacer(1, 12))
+
+    # Ticket Details
+    elements.append(Paragraph(f"<b>CATEGORY:</b> {ticket.ticket_category.name}", normal_style))
+    elements.append(Paragraph(f"<b>QUANTITY:</b> {ticket.quantity} ticket{'s' if ticket.quantity > 1 else ''}", normal_style))
+    elements.append(Paragraph(f"<b>TICKET HOLDER:</b> {ticket.user.get_full_name() or ticket.user.username}", normal_style))
+    elements.append(Spacer(1, 12))
+
+    # Price
+    elements.append(Paragraph(f"<b>TOTAL PAID:</b> Nle{ticket.total_price()}", normal_style))
+    elements.append(Spacer(1, 12))
+
+    # Ticket ID
+    elements.append(Paragraph("━" * 50, normal_style))
+    elements.append(Spacer(1, 12))
+    elements.append(Paragraph(f"<b>TICKET ID:</b> {ticket.ticket_id}", normal_style))
+    elements.append(Paragraph(f"<b>PURCHASED:</b> {ticket.created_at.strftime('%B %d, %Y at %H:%M')}", normal_style))
+    elements.append(Spacer(1, 12))
+
+    # QR Code
+    try:
+        png, _digest = ticket_qr_png(ticket)
+        qr_image = Image(BytesIO(png), width=2*inch, height=2*inch)
+        qr_image.hAlign = 'CENTER'
+        elements.append(Paragraph("SCAN QR CODE AT ENTRANCE", heading_style))
+        elements.append(Spacer(1, 12))
+        elements.append(qr_image)
+        elements.append(Spacer(1, 12))
+    except Exception:
+        pass
+
+    # Important Information
+    elements.append(Paragraph("━" * 50, normal_style))
+    elements.append(Spacer(1, 12))
+    elements.append(Paragraph("<b>IMPORTANT INFORMATION:</b>", normal_style))
+    elements.append(Paragraph("• Arrive at stadium 30 minutes before kickoff", normal_style))
+    elements.append(Paragraph("• Present QR code at entrance for scanning", normal_style))
+    elements.append(Paragraph("• This ticket is non-transferable", normal_style))
+    elements.append(Paragraph("• Keep this ticket safe until match day", normal_style))
+    elements.append(Paragraph("• Contact: tickets@borangersfc.com for support", normal_style))
+    elements.append(Spacer(1, 24))
+
+    # Footer
+    elements.append(Paragraph("━" * 50, normal_style))
+    elements.append(Paragraph("Thank you for supporting Bo Rangers FC!", heading_style))
+
+    doc.build(elements)
+    return buffer.getvalue()
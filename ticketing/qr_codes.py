@@ -0,0 +1,187 @@
+"""
+On-demand QR codes for tickets.
+
+QR images are rendered from the ticket's payload when first requested and
+kept in two bounded LRU caches: a small in-process one and a larger one
+on disk. Disk entries are content-addressed by the SHA-256 of the payload
+and sharded into two levels of sub-directories, so no single directory
+grows large and a changed payload never serves a stale image.
+"""
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from io import BytesIO
+from pathlib import Path
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+MEMORY_CACHE_SIZE = getattr(settings, 'QR_MEMORY_CACHE_SIZE', 256)
+DISK_CACHE_MAX_FILES = getattr(settings, 'QR_DISK_CACHE_MAX_FILES', 100_000)
+# Prune the disk cache after this many writes from one process
+DISK_PRUNE_INTERVAL = max(1, DISK_CACHE_MAX_FILES // 10)
+
+
+class LRUCache:
+    """A thread-safe mapping that forgets its least recently used entries"""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+_memory_cache = LRUCache(MEMORY_CACHE_SIZE)
+_writes_since_prune = 0
+_prune_lock = threading.Lock()
+
+
+def qr_payload(ticket):
+    """Text encoded in a ticket's QR code, as read by the gateman scanner"""
+    return (
+        f"Ticket ID: {ticket.ticket_id}\n"
+        f"Match: {ticket.match.title}\n"
+        f"User: {ticket.user.username}\n"
+        f"Category: {ticket.ticket_category.name}\n"
+        f"Quantity: {ticket.quantity}"
+    )
+
+
+def payload_digest(payload):
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def cache_dir():
+    return Path(getattr(settings, 'QR_CACHE_DIR', Path(settings.BASE_DIR) / 'qr_cache'))
+
+
+def cache_path(digest):
+    """Sharded disk location for a digest, e.g. qr_cache/ab/cd/abcd....png"""
+    return cache_dir() / digest[:2] / digest[2:4] / f'{digest}.png'
+
+
+def render_png(payload):
+    """Encode ``payload`` as a PNG QR code"""
+    import qrcode
+
+    qr = qrcode.QRCode(
+        version=1,
+        error_correction=qrcode.constants.ERROR_CORRECT_L,
+        box_size=10,
+        border=4,
+    )
+    qr.add_data(payload)
+    qr.make(fit=True)
+
+    buffer = BytesIO()
+    qr.make_image(fill_color="black", back_color="white").save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def _read_disk(path):
+    try:
+        data = path.read_bytes()
+    except OSError:
+        return None
+    try:
+        # Record the hit so pruning keeps recently served codes
+        os.utime(path)
+    except OSError:
+        pass
+    return data
+
+
+def _write_disk(path, data):
+    global _writes_since_prune
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, temp_name = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as temp:
+            temp.write(data)
+        os.replace(temp_name, path)
+    except OSError:
+        logger.exception('Could not write QR cache file %s', path)
+        return
+
+    with _prune_lock:
+        _writes_since_prune += 1
+        due = _writes_since_prune >= DISK_PRUNE_INTERVAL
+        if due:
+            _writes_since_prune = 0
+    if due:
+        threading.Thread(target=prune_disk_cache, name='qr-cache-prune', daemon=True).start()
+
+
+def ticket_qr_png(ticket):
+    """Return ``(png_bytes, digest)`` for a ticket, rendering it if not cached"""
+    payload = qr_payload(ticket)
+    digest = payload_digest(payload)
+    return qr_png(payload, digest), digest
+
+
+def qr_png(payload, digest):
+    """PNG for ``payload`` (whose digest the caller already has), from cache if possible"""
+    data = _memory_cache.get(digest)
+    if data is None:
+        path = cache_path(digest)
+        data = _read_disk(path)
+        if data is None:
+            data = render_png(payload)
+            _write_disk(path, data)
+        _memory_cache.set(digest, data)
+    return data
+
+
+def prune_disk_cache(max_files=None):
+    """Delete the least recently used files beyond ``max_files``. Returns the number removed."""
+    if max_files is None:
+        max_files = DISK_CACHE_MAX_FILES
+    entries = []
+    for root, _dirs, files in os.walk(cache_dir()):
+        for name in files:
+            path = os.path.join(root, name)
+            try:
+                entries.append((os.stat(path).st_mtime, path))
+            except OSError:
+                continue
+
+    surplus = len(entries) - max_files
+    if surplus <= 0:
+        return 0
+    entries.sort()
+    removed = 0
+    for _mtime, path in entries[:surplus]:
+        try:
+            os.remove(path)
+            removed += 1
+        except OSError:
+            continue
+    return removed
+
+
+def clear_memory_cache():
+    _memory_cache.clear()
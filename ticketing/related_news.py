@@ -0,0 +1,199 @@
+"""
+Related-articles index for news_detail.
+
+Articles are compared by cosine similarity of TF-IDF vectors over title
+and body, and the top neighbours of each are stored as RelatedNews rows.
+Vectors are sparse dicts scored through an inverted index, so the batch
+job scales with shared terms rather than with every pair of articles.
+
+Saving an article only queues it. After the transaction commits, a
+background thread reads and vectorises the corpus once for all the
+articles queued meanwhile, so an admin request never pays O(corpus).
+"""
+import heapq
+import logging
+import math
+import re
+import threading
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from operator import itemgetter
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Count, Min, Q
+from .models import News, RelatedNews
+
+logger = logging.getLogger(__name__)
+
+TOP_K = 5
+TITLE_WEIGHT = 2
+
+# Terms found in more than this share of a large corpus carry no signal
+# and would make the inverted index quadratic, so they are dropped.
+MAX_DOCUMENT_FREQUENCY = 0.5
+MIN_CORPUS_FOR_PRUNING = 20
+
+STOP_WORDS = frozenset("""
+    about after again against all also and any are because been before being
+    between both but can could did does doing down during each few for from
+    further had has have having her here hers him his how into its itself just
+    more most not now off once only other our ours out over own same she should
+    some such than that the their theirs them then there these they this those
+    through too under until very was were what when where which while who whom
+    why will with would you your yours
+""".split())
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text):
+    """Split text into lowercase terms, skipping stop words and short tokens"""
+    return [term for term in TOKEN_RE.findall(text.lower())
+            if len(term) > 2 and term not in STOP_WORDS]
+
+
+def term_counts(title, body):
+    """Term frequencies for an article, with title terms weighted up"""
+    counts = Counter(tokenize(body))
+    for term in tokenize(title):
+        counts[term] += TITLE_WEIGHT
+    return counts
+
+
+def load_corpus():
+    """Term counts for every article, keyed by article id"""
+    rows = News.objects.values_list('id', 'title', 'body').iterator(chunk_size=500)
+    return {pk: term_counts(title, body) for pk, title, body in rows}
+
+
+def vectorise(corpus):
+    """Return L2-normalised TF-IDF vectors and an inverted index over them"""
+    total = len(corpus)
+    document_frequency = Counter(term for counts in corpus.values() for term in counts)
+    prune = total >= MIN_CORPUS_FOR_PRUNING
+    idf = {
+        term: math.log((1 + total) / (1 + frequency)) + 1
+        for term, frequency in document_frequency.items()
+        if not prune or frequency <= MAX_DOCUMENT_FREQUENCY * total
+    }
+
+    vectors = {}
+    postings = defaultdict(list)
+    for pk, counts in corpus.items():
+        weights = {term: (1 + math.log(count)) * idf[term] for term, count in counts.items() if term in idf}
+        norm = math.sqrt(sum(weight * weight for weight in weights.values()))
+        if norm:
+            weights = {term: weight / norm for term, weight in weights.items()}
+        vectors[pk] = weights
+        for term, weight in weights.items():
+            postings[term].append((pk, weight))
+    return vectors, postings
+
+
+def similarities(pk, vector, postings):
+    """Cosine similarity between one article and every article sharing a term"""
+    scores = defaultdict(float)
+    for term, weight in vector.items():
+        for other, other_weight in postings[term]:
+            if other != pk:
+                scores[other] += weight * other_weight
+    return scores
+
+
+def rebuild_related_news(top_k=TOP_K):
+    """Recompute the whole index. Returns the number of rows stored."""
+    vectors, postings = vectorise(load_corpus())
+    rows = []
+    for pk, vector in vectors.items():
+        scores = similarities(pk, vector, postings)
+        for other, score in heapq.nlargest(top_k, scores.items(), key=itemgetter(1)):
+            rows.append(RelatedNews(article_id=pk, related_id=other, score=score))
+
+    with transaction.atomic():
+        RelatedNews.objects.all().delete()
+        RelatedNews.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+def update_related_news(article_ids, top_k=TOP_K):
+    """Refresh the index after the given articles were created or edited.
+
+    Each article's own neighbours are recomputed, and it is inserted into
+    the lists of other articles it now outranks. Lists it drops out of are
+    left one entry short until the next full rebuild. The corpus is read
+    and vectorised once for all of them; deleted articles are skipped.
+    """
+    vectors, postings = vectorise(load_corpus())
+    for pk in article_ids:
+        if pk in vectors:
+            _update_article(pk, similarities(pk, vectors[pk], postings), top_k)
+
+
+def _update_article(pk, scores, top_k):
+    with transaction.atomic():
+        RelatedNews.objects.filter(Q(article_id=pk) | Q(related_id=pk)).delete()
+
+        rows = [
+            RelatedNews(article_id=pk, related_id=other, score=score)
+            for other, score in heapq.nlargest(top_k, scores.items(), key=itemgetter(1))
+        ]
+
+        current = {
+            row['article_id']: (row['total'], row['lowest'])
+            for row in RelatedNews.objects.filter(article_id__in=list(scores))
+            .values('article_id').annotate(total=Count('id'), lowest=Min('score'))
+        }
+        overfull = []
+        for other, score in scores.items():
+            total, lowest = current.get(other, (0, 0.0))
+            if total < top_k or score > lowest:
+                rows.append(RelatedNews(article_id=other, related_id=pk, score=score))
+                if total >= top_k:
+                    overfull.append(other)
+        RelatedNews.objects.bulk_create(rows, batch_size=1000)
+
+        # Drop the entry the article pushed out of each full list
+        for other in overfull:
+            surplus = RelatedNews.objects.filter(article_id=other).order_by('-score').values_list('id', flat=True)[top_k:]
+            RelatedNews.objects.filter(id__in=list(surplus)).delete()
+
+
+_executor = None
+_pending = set()
+_pending_lock = threading.Lock()
+
+
+def _update_pending():
+    with _pending_lock:
+        article_ids = sorted(_pending)
+        _pending.clear()
+    try:
+        update_related_news(article_ids)
+    except Exception:
+        logger.exception('Could not update related news for articles %s', article_ids)
+    finally:
+        # This thread serves no requests, so nothing else recycles its connection
+        close_old_connections()
+
+
+def schedule_related_news_update(article_id):
+    """Update the index for ``article_id`` once the current transaction commits.
+
+    The update runs on a background thread unless RELATED_NEWS_ASYNC is
+    False, in which case it runs inline (useful for tests and scripts).
+    Articles saved while an update is waiting join it.
+    """
+    def run():
+        global _executor
+        if not getattr(settings, 'RELATED_NEWS_ASYNC', True):
+            update_related_news([article_id])
+            return
+        with _pending_lock:
+            queued = bool(_pending)
+            _pending.add(article_id)
+        if not queued:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='related-news')
+            _executor.submit(_update_pending)
+
+    transaction.on_commit(run)
@@ -0,0 +1,240 @@
+"""
+Per-request SQL and render timing, with N+1 detection.
+
+RequestProfilingMiddleware gives each request a RequestProfile held in a
+ContextVar. A database execute wrapper, installed on every connection as
+it opens (see signals.py), adds each query's time and shape to the
+profile of the request running in the current context; ORM calls made
+through sync_to_async copy the context, so async views are counted too.
+Templates rendered through ProfiledDjangoTemplates add their render
+time, which includes any queries the template itself triggers.
+
+When the response is ready the middleware logs a warning on the
+``ticketing.performance`` logger if the request went over
+REQUEST_QUERY_BUDGET or its time budget (REQUEST_TIME_BUDGETS_MS for the
+view, else REQUEST_TIME_BUDGET_MS), or ran one query shape
+N_PLUS_ONE_THRESHOLD times or more (a probable N+1), and adds the
+request to a rolling per-view window that staff see at
+/admin-performance/. The windows live in this process, like the
+default LocMemCache, so each server worker reports its own traffic.
+
+The middleware is only installed when REQUEST_PROFILING is on, which by
+default it is under DEBUG alone. Outside a profiled request the wrapper
+and template backend cost one ContextVar lookup per query or render;
+inside one, a timer and a dictionary update. Query shapes are cached by
+SQL text, which repeats, so each distinct statement is normalised once.
+"""
+import logging
+import re
+import statistics
+import threading
+import time
+from collections import Counter, deque
+from contextvars import ContextVar
+from functools import lru_cache
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.template import TemplateDoesNotExist
+from django.template.backends.django import DjangoTemplates, Template, reraise
+
+logger = logging.getLogger('ticketing.performance')
+
+# Literal values, as in LIMIT clauses or SQL with its parameters
+# interpolated; numbers inside names such as the T3 alias are kept
+STRING_RE = re.compile(r"'(?:[^']|'')*'")
+# Generated savepoint and server-side cursor names
+GENERATED_NAME_RE = re.compile(r'((?:SAVEPOINT|DECLARE)\s+)"[^"]+"')
+NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+# A parenthesised list of placeholders: IN (...) lists and bulk insert rows
+PLACEHOLDER_LIST_RE = re.compile(r'\(\s*%s(?:\s*,\s*%s)*\s*\)')
+REPEATED_ROWS_RE = re.compile(r'\(\.\.\.\)(?:\s*,\s*\(\.\.\.\))+')
+
+_current = ContextVar('request_profile', default=None)
+
+
+@lru_cache(maxsize=2048)
+def fingerprint(sql):
+    """The query's shape: ``sql`` with literal values and lists of them collapsed"""
+    shape = NUMBER_RE.sub('%s', STRING_RE.sub('%s', GENERATED_NAME_RE.sub(r'\1%s', sql)))
+    shape = PLACEHOLDER_LIST_RE.sub('(...)', shape)
+    return REPEATED_ROWS_RE.sub('(...), ...', shape)
+
+
+class RequestProfile:
+    def __init__(self):
+        self.queries = 0
+        self.sql_time = 0.0
+        self.render_time = 0.0
+        self.rendering = False
+        self.shapes = Counter()
+
+    def repeated_shapes(self, threshold):
+        """[(shape, count)] for shapes run at least ``threshold`` times, most frequent first"""
+        return [(shape, count) for shape, count in self.shapes.most_common() if count >= threshold]
+
+
+def record_queries(execute, sql, params, many, context):
+    """Database execute wrapper adding each query to the current request's profile"""
+    profile = _current.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        profile.sql_time += time.perf_counter() - started
+        profile.queries += 1
+        profile.shapes[fingerprint(sql)] += 1
+
+
+def install_query_recorder(connection):
+    if record_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_queries)
+
+
+class ProfiledTemplate(Template):
+    def render(self, context=None, request=None):
+        profile = _current.get()
+        if profile is None or profile.rendering:
+            # Templates rendered from inside another are already being timed
+            return super().render(context, request)
+        profile.rendering = True
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            profile.render_time += time.perf_counter() - started
+            profile.rendering = False
+
+
+class ProfiledDjangoTemplates(DjangoTemplates):
+    """The Django template backend, timing renders for the request profile"""
+
+    def from_string(self, template_code):
+        return ProfiledTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return ProfiledTemplate(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
+
+
+class ViewStats:
+    def __init__(self, window):
+        # (total ms, queries, SQL ms, render ms, over budget, probable N+1)
+        self.samples = deque(maxlen=window)
+        # Shapes repeated in the most recent probable N+1 request
+        self.last_repeated = []
+
+    def summary(self, view_name):
+        totals = sorted(sample[0] for sample in self.samples)
+        queries = [sample[1] for sample in self.samples]
+        return {
+            'view': view_name,
+            'requests': len(totals),
+            'mean_ms': statistics.fmean(totals),
+            'p95_ms': totals[min(len(totals) - 1, int(len(totals) * 0.95))],
+            'max_ms': totals[-1],
+            'mean_queries': statistics.fmean(queries),
+            'max_queries': max(queries),
+            'mean_sql_ms': statistics.fmean(sample[2] for sample in self.samples),
+            'mean_render_ms': statistics.fmean(sample[3] for sample in self.samples),
+            'over_budget': sum(1 for sample in self.samples if sample[4]),
+            'n_plus_one': sum(1 for sample in self.samples if sample[5]),
+            'repeated_shapes': self.last_repeated,
+        }
+
+
+_stats = {}
+_stats_lock = threading.Lock()
+
+
+def time_budget_ms(view_name):
+    """The view's time budget: its own from REQUEST_TIME_BUDGETS_MS, else the default"""
+    budgets = getattr(settings, 'REQUEST_TIME_BUDGETS_MS', {})
+    return budgets.get(view_name, getattr(settings, 'REQUEST_TIME_BUDGET_MS', 500))
+
+
+def record_request(view_name, total, profile, over_budget, repeated):
+    sample = (total * 1000, profile.queries, profile.sql_time * 1000, profile.render_time * 1000,
+              over_budget, bool(repeated))
+    with _stats_lock:
+        stats = _stats.get(view_name)
+        if stats is None:
+            stats = _stats[view_name] = ViewStats(getattr(settings, 'REQUEST_PROFILE_WINDOW', 200))
+        stats.samples.append(sample)
+        if repeated:
+            stats.last_repeated = repeated
+
+
+def view_summaries():
+    """Rolling figures for each view this process has served, most total time first"""
+    with _stats_lock:
+        summaries = [stats.summary(view_name) for view_name, stats in _stats.items()]
+    summaries.sort(key=lambda summary: summary['mean_ms'] * summary['requests'], reverse=True)
+    return summaries
+
+
+def reset_view_stats():
+    with _stats_lock:
+        _stats.clear()
+
+
+class RequestProfilingMiddleware:
+    """Profile each request's queries and rendering against the configured budgets"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'REQUEST_PROFILING', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        profile = RequestProfile()
+        token = _current.set(profile)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.finish(request, profile, time.perf_counter() - started)
+        return response
+
+    async def __acall__(self, request):
+        profile = RequestProfile()
+        token = _current.set(profile)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.finish(request, profile, time.perf_counter() - started)
+        return response
+
+    def finish(self, request, profile, total):
+        resolver_match = getattr(request, 'resolver_match', None)
+        if resolver_match is None:
+            # Nothing was routed to a view (a 404 or a redirect to add a slash)
+            return
+        # The URL name, or the view's dotted path for unnamed routes
+        view_name = resolver_match.view_name
+        repeated = profile.repeated_shapes(getattr(settings, 'N_PLUS_ONE_THRESHOLD', 5))
+        over_budget = (profile.queries > getattr(settings, 'REQUEST_QUERY_BUDGET', 25)
+                       or total * 1000 > time_budget_ms(view_name))
+        record_request(view_name, total, profile, over_budget, repeated)
+
+        if over_budget or repeated:
+            logger.warning(
+                '%s %s (%s): %d queries, %.1f ms SQL, %.1f ms render, %.1f ms total%s',
+                request.method, request.path, view_name, profile.queries, profile.sql_time * 1000,
+                profile.render_time * 1000, total * 1000,
+                ''.join(f'\n  probable N+1, {count} times: {shape}' for shape, count in repeated),
+            )
@@ -0,0 +1,113 @@
+"""
+Resolve a user's UserProfile role once and cache it.
+
+RoleMiddleware exposes the role as ``request.role`` (None for anonymous
+users and users without a profile). It is read from the Django cache, so
+repeat visitors, such as a gateman scanning all afternoon, pay no query.
+Saving or deleting a UserProfile drops the cached value (see signals.py).
+With the default per-process LocMemCache, other processes pick up a
+change within ROLE_CACHE_TIMEOUT; a shared cache makes it immediate.
+"""
+from functools import wraps
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.contrib import messages
+from django.core.cache import cache
+from django.http import JsonResponse
+from django.shortcuts import redirect
+from .models import UserProfile
+
+CACHE_PREFIX = 'user-role:'
+NO_PROFILE = ''
+
+
+def role_cache_key(user_id):
+    return f'{CACHE_PREFIX}{user_id}'
+
+
+def get_role(user):
+    """The user's profile role, or None"""
+    if not user.is_authenticated:
+        return None
+    key = role_cache_key(user.pk)
+    role = cache.get(key)
+    if role is None:
+        role = UserProfile.objects.filter(user_id=user.pk).values_list('role', flat=True).first() or NO_PROFILE
+        cache.set(key, role, getattr(settings, 'ROLE_CACHE_TIMEOUT', 300))
+    return role or None
+
+
+async def aget_role(user):
+    """Async version of get_role"""
+    if not user.is_authenticated:
+        return None
+    key = role_cache_key(user.pk)
+    role = await cache.aget(key)
+    if role is None:
+        role = await UserProfile.objects.filter(user_id=user.pk).values_list('role', flat=True).afirst() or NO_PROFILE
+        await cache.aset(key, role, getattr(settings, 'ROLE_CACHE_TIMEOUT', 300))
+    return role or None
+
+
+def invalidate_role(user_id):
+    cache.delete(role_cache_key(user_id))
+
+
+class RoleMiddleware:
+    """Attach ``request.role``; must come after AuthenticationMiddleware"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        request.role = get_role(request.user)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        request.role = await aget_role(await request.auser())
+        return await self.get_response(request)
+
+
+def role_required(*roles, ajax=False):
+    """Allow only users whose role is one of ``roles``.
+
+    Others are redirected home with a message, or get a JSON error when
+    ``ajax`` is set.
+    """
+    label = ' or '.join(role.capitalize() for role in roles)
+
+    def denied(request, role):
+        if role is None:
+            error = 'Access denied. User profile not found.'
+        else:
+            error = f'Access denied. {label} privileges required.'
+        if ajax:
+            return JsonResponse({'success': False, 'error': error})
+        messages.error(request, error)
+        return redirect('home')
+
+    def decorator(view):
+        if iscoroutinefunction(view):
+            @wraps(view)
+            async def async_wrapper(request, *args, **kwargs):
+                role = request.role if hasattr(request, 'role') else await aget_role(await request.auser())
+                if role in roles:
+                    return await view(request, *args, **kwargs)
+                return denied(request, role)
+            return async_wrapper
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            role = request.role if hasattr(request, 'role') else get_role(request.user)
+            if role in roles:
+                return view(request, *args, **kwargs)
+            return denied(request, role)
+        return wrapper
+    return decorator
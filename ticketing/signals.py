@@ -0,0 +1,69 @@
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+from .models import Match, MatchEvent, News, UserProfile
+from .related_news import schedule_related_news_update
+from .images import schedule_derivatives
+from .roles import invalidate_role
+from .live import hub as live_hub
+from .request_profiling import install_query_recorder
+
+
+@receiver(connection_created)
+def profile_queries(sender, connection, **kwargs):
+    """Count each new connection's queries towards the request that runs them"""
+    install_query_recorder(connection)
+
+
+@receiver([post_save, post_delete], sender=MatchEvent)
+def refresh_match_on_event_change(sender, instance, **kwargs):
+    """Keep the parent match's stored highlights and updated_at in step with its events"""
+    match = Match.objects.filter(id=instance.match_id).first()
+    if match is None:
+        # The match itself is being deleted
+        return
+    if match.is_completed:
+        match.save_event_texts()
+    else:
+        Match.objects.filter(id=match.id).update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=Match)
+@receiver([post_save, post_delete], sender=MatchEvent)
+def push_live_update(sender, instance, raw=False, **kwargs):
+    """Wake this process's live publisher once the change is committed"""
+    if not raw:
+        match_id = instance.pk if sender is Match else instance.match_id
+        transaction.on_commit(lambda: live_hub.notify(match_id))
+
+
+@receiver(post_save, sender=News)
+def refresh_related_news(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Keep the related-articles index current when an article's text changes"""
+    if raw:
+        return
+    if update_fields is not None and not {'title', 'body'} & set(update_fields):
+        return
+    schedule_related_news_update(instance.pk)
+
+
+@receiver(post_save, sender=News)
+def resize_news_image(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Queue responsive derivatives for a newly uploaded article image"""
+    if not raw:
+        schedule_derivatives(*instance.changed_images(update_fields))
+
+
+@receiver(post_save, sender=Match)
+def resize_team_logos(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Queue responsive derivatives for newly uploaded team logos"""
+    if not raw:
+        schedule_derivatives(*instance.changed_logos(update_fields))
+
+
+@receiver([post_save, post_delete], sender=UserProfile)
+def forget_cached_role(sender, instance, **kwargs):
+    """Drop the cached role so the next request sees the change"""
+    invalidate_role(instance.user_id)
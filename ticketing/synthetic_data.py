@@ -0,0 +1,460 @@
+"""
+Deterministic synthetic datasets at production scale.
+
+SyntheticDataset builds seasons of league fixtures for Bo Rangers FC with
+results, match statistics and events, a fan base with staff and
+gatemen, the tickets sold for every home match with the gate scans of
+those that were used, the sales reports, and news coverage. Everything
+is drawn from one random.Random(seed), with dates laid out around an
+anchor day. The same seed, sizes and anchor day on an empty database
+give the same rows.
+
+The distributions follow match-day patterns rather than uniform noise:
+- fan activity is heavy-tailed, with regulars buying for every match;
+- demand rises for popular opponents, weekend fixtures and the run-in;
+- tickets are bought days ahead, with a spike on the day;
+- a few payments fail or stay pending;
+- most paid tickets are scanned in the hour and a half before kick-off.
+Event counts follow real match rates, about 75 per match, so events
+grow with --seasons rather than with tickets.
+
+Rows are written with chunked bulk_create, one transaction per chunk,
+so signals and save() do not run. Stored match summaries are generated
+here instead. Every account shares one password, hashed once; without
+one the accounts cannot log in.
+"""
+import math
+import random
+import string
+import uuid
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from itertools import accumulate, islice
+from django.contrib.auth.hashers import UNUSABLE_PASSWORD_PREFIX, make_password
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.utils import timezone
+from .models import Match, MatchEvent, News, Report, Ticket, TicketCategory, UserProfile
+
+CHUNK_SIZE = 10_000
+HOME_TEAM = 'Bo Rangers FC'
+HOME_VENUE = 'Bo Stadium'
+# Tickets on sale for each home match; one ticket admits up to four
+TICKETS_PER_MATCH = 30_000
+# Marks generated accounts
+EMAIL_DOMAIN = 'fans.example.com'
+KICK_OFF = time(16, 0)
+MATCH_LENGTH = timedelta(hours=2)
+# Weeks of the current season already played on the anchor day
+WEEKS_PLAYED = 20
+
+# (club, drawing power, home ground)
+OPPONENTS = [
+    ('East End Lions', 3.0, 'National Stadium'),
+    ('Mighty Blackpool', 3.0, 'National Stadium'),
+    ('FC Kallon', 2.2, 'National Stadium'),
+    ('Kamboi Eagles', 2.0, 'Kenema Town Field'),
+    ('Diamond Stars', 1.8, 'Koidu Stadium'),
+    ('Bhantal FC', 1.5, 'Moyamba Stadium'),
+    ('Real Republicans', 1.4, 'National Stadium'),
+    ('Kahunla Rangers', 1.3, 'Kenema Town Field'),
+    ('Ports Authority', 1.3, 'National Stadium'),
+    ('Freetown City FC', 1.2, 'National Stadium'),
+    ('Luawa FC', 1.2, 'Kailahun Stadium'),
+    ('Old Edwardians', 1.1, 'National Stadium'),
+    ('Central Parade', 1.0, 'Approved School Field'),
+    ('Wilberforce Strikers', 1.0, 'Approved School Field'),
+    ('East End Tigers', 1.0, 'National Stadium'),
+    ('Mount Aureol', 0.9, 'Approved School Field'),
+]
+
+# (name, price, description, share of tickets)
+CATEGORIES = [
+    ('Regular', Decimal('20.00'), 'Standard stadium seating', 70),
+    ('Student', Decimal('10.00'), 'Discounted seating with a student card', 15),
+    ('Family', Decimal('35.00'), 'Seating for two adults and children', 10),
+    ('VIP', Decimal('50.00'), 'Premium seating with exclusive amenities', 5),
+]
+
+FIRST_NAMES = [
+    'Mohamed', 'Abu', 'Ibrahim', 'Fatmata', 'Aminata', 'Mariama', 'Isatu', 'Alhaji', 'Sheku', 'Foday',
+    'Musa', 'Kadiatu', 'Hawa', 'Sallieu', 'Abdul', 'Sorie', 'Alusine', 'Christiana', 'Joseph', 'John',
+    'Emmanuel', 'Augustine', 'Francis', 'Mary', 'Adama', 'Zainab', 'Umaru', 'Lansana', 'Momoh', 'Tamba',
+    'Sahr', 'Finda', 'Jenneh', 'Komba', 'Musu', 'Brima', 'Osman', 'Yusuf', 'Haja', 'Saidu',
+]
+LAST_NAMES = [
+    'Kamara', 'Bangura', 'Sesay', 'Conteh', 'Koroma', 'Turay', 'Kanu', 'Jalloh', 'Mansaray', 'Kargbo',
+    'Fofanah', 'Kallon', 'Massaquoi', 'Sankoh', 'Bah', 'Barrie', 'Kabia', 'Kai', 'Lahai', 'Swaray',
+    'Tucker', 'Williams', 'Cole', 'Johnson', 'Gbla', 'Jusu', 'Samura', 'Koker', 'Mustapha', 'Vandi',
+]
+
+# Mean events of each type per team per match, besides goals
+EVENT_RATES = {
+    'foul': 12, 'free_kick': 11, 'corner': 5, 'yellow_card': 2, 'substitution': 4,
+    'injury': 1, 'other': 1, 'red_card': 0.1, 'penalty': 0.15,
+}
+
+NEWS_CATEGORIES = [('club_news', 30), ('press_release', 20), ('transfer', 20), ('general', 30)]
+NEWS_TITLES = {
+    'club_news': ['Training update ahead of matchday {n}', 'Academy graduates join the first team squad',
+                  'Community day at {venue}', 'Supporters club reaches a new membership record'],
+    'press_release': ['Statement on ticket prices for the run-in', 'Stadium improvements at {venue}',
+                      'Club announces new kit partner', 'Match-day travel advice for supporters'],
+    'transfer': ['{name} signs a two-year contract', '{name} joins on loan until the end of the season',
+                 '{name} extends his stay at the club', 'Bo Rangers complete the signing of {name}'],
+    'general': ['Player of the month: {name}', 'Fixture list for the new season confirmed',
+                'Five things we learned from matchday {n}', 'Meet the gatemen keeping {venue} safe'],
+}
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def poisson(rng, mean):
+    """A Poisson-distributed count (Knuth's method; the means here are small)"""
+    limit, count, product = math.exp(-mean), 0, rng.random()
+    while product > limit:
+        count += 1
+        product *= rng.random()
+    return count
+
+
+@contextmanager
+def explicit_timestamps(*fields):
+    """Let bulk_create keep the values set on auto_now / auto_now_add fields"""
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class SyntheticDataError(Exception):
+    """The dataset cannot be generated into this database"""
+
+
+class SyntheticDataset:
+    def __init__(self, seed=1, seasons=3, fans=100_000, tickets=1_000_000, gatemen=40, admins=5, news=300,
+                 today=None, password=None, chunk_size=CHUNK_SIZE, log=None):
+        self.rng = random.Random(seed)
+        self.seasons = seasons
+        self.fans = fans
+        self.tickets = tickets
+        self.gatemen = gatemen
+        self.admins = admins
+        self.news = news
+        self.anchor = datetime.combine(today or timezone.now().date(), time(12, 0), tzinfo=dt_timezone.utc)
+        self.password = password
+        self.chunk_size = chunk_size
+        self.log = log or (lambda message: None)
+        self.counts = {}
+
+    def generate(self, disable_constraints=False):
+        """Create the dataset and return the number of rows of each kind"""
+        # As loaddata does: no foreign key checks while loading, one pass at the end
+        checks_off = connection.constraint_checks_disabled() if disable_constraints else nullcontext()
+        with checks_off:
+            self.create_categories()
+            self.create_users()
+            self.create_matches()
+            self.create_tickets()
+            self.create_news()
+        if disable_constraints:
+            connection.check_constraints(table_names=[
+                model._meta.db_table for model in (UserProfile, Match, MatchEvent, Ticket, Report, News)
+            ])
+        return self.counts
+
+    def insert(self, model, objects, after_chunk=None):
+        """bulk_create ``objects`` in transactions of chunk_size rows; returns the row count"""
+        total = 0
+        for chunk in chunked(objects, self.chunk_size):
+            with transaction.atomic():
+                model.objects.bulk_create(chunk)
+                if after_chunk:
+                    after_chunk(chunk)
+            total += len(chunk)
+        return total
+
+    def random_uuid(self):
+        return uuid.UUID(int=self.rng.getrandbits(128), version=4)
+
+    def create_categories(self):
+        self.categories = []
+        for name, price, description, _share in CATEGORIES:
+            category, _created = TicketCategory.objects.get_or_create(
+                name=name, defaults={'price': price, 'description': description}
+            )
+            self.categories.append(category)
+        self.category_weights = list(accumulate(share for *_rest, share in CATEGORIES))
+
+    def create_users(self):
+        if User.objects.filter(email__endswith=f'@{EMAIL_DOMAIN}').exists():
+            raise SyntheticDataError('A synthetic dataset is already loaded; flush the database first')
+        rng = self.rng
+        salt = ''.join(rng.choices(string.ascii_letters + string.digits, k=22))
+        # Unusable without a password; the prefix alone, so seeded runs still match
+        password = make_password(self.password, salt=salt) if self.password else UNUSABLE_PASSWORD_PREFIX
+        first_day = self.season_start(0) - timedelta(days=90)
+        span = (self.anchor - first_day).total_seconds()
+        total = self.fans + self.gatemen + self.admins
+        phones = rng.sample(range(10_000_000), total)
+
+        def accounts():
+            for index in range(total):
+                first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+                if index < self.admins:
+                    username, role = f'admin.{last.lower()}{index}', 'admin'
+                elif index < self.admins + self.gatemen:
+                    username, role = f'gate.{last.lower()}{index}', 'gateman'
+                else:
+                    username, role = f'{first.lower()}.{last.lower()}{index}', 'fan'
+                user = User(username=username, first_name=first, last_name=last, email=f'{username}@{EMAIL_DOMAIN}',
+                            password=password, is_staff=role == 'admin',
+                            date_joined=first_day + timedelta(seconds=rng.random() * span))
+                user.role, user.phone = role, f'2327{phones[index]:07d}'
+                yield user
+
+
+        self.admin_ids, self.gateman_ids, self.fan_ids = [], [], []
+        ids = {'admin': self.admin_ids, 'gateman': self.gateman_ids, 'fan': self.fan_ids}
+
+        def add_profiles(users):
+            UserProfile.objects.bulk_create(UserProfile(user=user, phone=user.phone, role=user.role) for user in users)
+            for user in users:
+                ids[user.role].append(user.pk)
+
+        self.counts['users'] = self.insert(User, accounts(), after_chunk=add_profiles)
+        # Heavy-tailed activity: regulars come to every match, often with friends
+        self.fan_weights = list(accumulate(min(20.0, rng.paretovariate(2)) for _fan in self.fan_ids))
+        self.log(f"{self.counts['users']:,} users ({self.admins} admins, {self.gatemen} gatemen)")
+
+    def season_start(self, season):
+        """The first Saturday of a season; the last season is the current one"""
+        start = self.anchor - timedelta(weeks=WEEKS_PLAYED + 52 * (self.seasons - 1 - season))
+        start += timedelta(days=(5 - start.weekday()) % 7)
+        return datetime.combine(start.date(), KICK_OFF, tzinfo=dt_timezone.utc)
+
+    def status(self, date):
+        if date + MATCH_LENGTH <= self.anchor:
+            return 'completed'
+        return 'live' if date <= self.anchor else 'upcoming'
+
+    def create_matches(self):
+        rng = self.rng
+        self.matches = []
+        for season in range(self.seasons):
+            opponents = OPPONENTS[:]
+            rng.shuffle(opponents)
+            fixtures = [(opponent, number % 2 == 0) for number, opponent in enumerate(opponents)]
+            # Second half of the season: the same opponents, venues swapped
+            fixtures += [(opponent, not home) for opponent, home in fixtures]
+            for matchday, ((club, draw, ground), home) in enumerate(fixtures, start=1):
+                date = self.season_start(season) + timedelta(weeks=matchday - 1)
+                if rng.random() < 0.2:
+                    # Some fixtures move to Sunday
+                    date += timedelta(days=1)
+                match = Match(
+                    title=f'{HOME_TEAM} vs {club}' if home else f'{club} vs {HOME_TEAM}',
+                    home_team=HOME_TEAM if home else club, opponent=club if home else HOME_TEAM,
+                    venue=HOME_VENUE if home else ground, date=date, matchday=matchday,
+                    status=self.status(date), referee=f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}',
+                )
+                match.is_home, match.draw, match.season_progress = home, draw, matchday / len(fixtures)
+                if match.status != 'upcoming':
+                    self.play(match)
+                self.matches.append(match)
+
+        with explicit_timestamps(Match._meta.get_field('created_at')):
+            for match in self.matches:
+                match.created_at = self.season_start(0) - timedelta(days=30)
+            self.insert(Match, self.matches)
+        events = [event for match in self.matches for event in getattr(match, 'played_events', [])]
+        self.counts['matches'] = len(self.matches)
+        self.counts['match_events'] = self.insert(MatchEvent, events)
+        self.log(f"{len(self.matches):,} matches over {self.seasons} seasons, {len(events):,} match events")
+
+    def play(self, match):
+        """Draw a result, its events and the statistics that agree with them"""
+        rng = self.rng
+        # Home advantage, and a stronger draw makes a stronger side
+        strength = 1.0 + 0.15 * (match.draw - 1.5)
+        home_goals = poisson(rng, 1.5 / strength if match.is_home else 1.5 * strength)
+        away_goals = poisson(rng, 1.1 * strength if match.is_home else 1.1 / strength)
+        minutes_played = 90 if match.status == 'completed' else max(1, int(
+            (self.anchor - match.date).total_seconds() // 60))
+        events = []
+
+        def add(event_type, team):
+            minute = rng.randint(1, 90)
+            if minute <= minutes_played:
+                events.append(MatchEvent(
+                    match=match, event_type=event_type, minute=minute, team=team,
+                    player_name=f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}',
+                ))
+
+        for team, goals in (('home', home_goals), ('away', away_goals)):
+            for _goal in range(goals):
+                add('goal', team)
+            for event_type, rate in EVENT_RATES.items():
+                for _event in range(poisson(rng, rate)):
+                    add(event_type, team)
+        events.sort(key=lambda event: event.minute)
+        match.played_events = events
+
+        def count(event_type, team):
+            return sum(1 for event in events if event.event_type == event_type and event.team == team)
+
+        match.home_score, match.away_score = count('goal', 'home'), count('goal', 'away')
+        match.possession_home = min(75, max(25, round(rng.gauss(54 if match.is_home else 46, 7))))
+        match.possession_away = 100 - match.possession_home
+        for team in ('home', 'away'):
+            goals = count('goal', team)
+            on_target = goals + poisson(rng, 3)
+            setattr(match, f'shots_on_target_{team}', on_target)
+            setattr(match, f'shots_{team}', on_target + poisson(rng, 6))
+            for field, event_type in (('corners', 'corner'), ('fouls', 'foul'),
+                                      ('yellow_cards', 'yellow_card'), ('red_cards', 'red_card')):
+                setattr(match, f'{field}_{team}', count(event_type, team))
+        match.weather = rng.choice(['Sunny', 'Sunny', 'Cloudy', 'Humid', 'Light rain', 'Heavy rain'])
+        if not match.is_home:
+            match.attendance = rng.randint(3_000, 15_000)
+        match.refresh_generated_texts(events)
+
+    def ticket_allocation(self):
+        """Tickets to create for each home match, scaled to the requested total"""
+        rng = self.rng
+        demand = {}
+        for match in self.matches:
+            if not match.is_home:
+                continue
+            weight = match.draw * (1 + 0.5 * match.season_progress) * rng.lognormvariate(0, 0.25)
+            if match.date.weekday() == 6:
+                weight *= 0.85
+            if match.status == 'upcoming':
+                # Sales so far: most tickets go in the last fortnight
+                days_ahead = (match.date - self.anchor).days
+                weight *= max(0.02, 1 - days_ahead / 14) ** 2
+            demand[match] = weight
+        # Sold-out matches pass their excess demand on to the others
+        allocation, remaining, tickets = {}, dict(demand), self.tickets
+        while remaining:
+            total_weight = sum(remaining.values())
+            sold_out = [match for match, weight in remaining.items()
+                        if tickets * weight / total_weight >= TICKETS_PER_MATCH]
+            if not sold_out:
+                # Rounding the running total keeps the sum exact
+                share = placed = 0
+                for match, weight in remaining.items():
+                    share += tickets * weight / total_weight
+                    allocation[match] = round(share) - placed
+                    placed += allocation[match]
+                break
+            for match in sold_out:
+                allocation[match] = TICKETS_PER_MATCH
+                tickets -= TICKETS_PER_MATCH
+                del remaining[match]
+        return [(match, allocation[match]) for match in demand]
+
+    def create_tickets(self):
+        rng = self.rng
+        reports = {}
+        attendance = {}
+
+        def tickets():
+            if not self.fan_ids:
+                return
+            for match, count in self.ticket_allocation():
+                fans = rng.choices(self.fan_ids, cum_weights=self.fan_weights, k=count)
+                categories = rng.choices(self.categories, cum_weights=self.category_weights, k=count)
+                on_duty = rng.sample(self.gateman_ids, min(len(self.gateman_ids), 12)) if self.gateman_ids else []
+                opened = match.date - timedelta(days=30)
+                for fan, category in zip(fans, categories):
+                    # Bought days ahead, or on the day
+                    if rng.random() < 0.25:
+                        created_at = match.date - timedelta(minutes=rng.uniform(30, 600))
+                    else:
+                        created_at = max(opened, match.date - timedelta(days=rng.expovariate(1 / 6)))
+                    if created_at > self.anchor:
+                        created_at = self.anchor - timedelta(minutes=rng.uniform(1, 600))
+                    quantity = rng.choices((1, 2, 3, 4), cum_weights=(78, 93, 97, 100))[0]
+                    roll = rng.random()
+                    status = 'completed' if roll < 0.93 else 'pending' if roll < 0.97 else 'failed'
+                    ticket = Ticket(
+                        user_id=fan, match_id=match.pk, ticket_category_id=category.pk, quantity=quantity,
+                        payment_status=status, ticket_id=self.random_uuid(), created_at=created_at,
+                    )
+                    if status == 'completed':
+                        sold, revenue, last = reports.get(match, (0, 0, created_at))
+                        reports[match] = (sold + quantity, revenue + category.price * quantity, max(last, created_at))
+                        # Most paid tickets are used; the gates open three hours before kick-off
+                        if match.status != 'upcoming' and on_duty and rng.random() < 0.92:
+                            scanned_at = match.date - timedelta(minutes=min(180, max(-30, rng.gauss(45, 35))))
+                            if scanned_at <= self.anchor:
+                                ticket.is_scanned, ticket.scanned_at = True, scanned_at
+                                ticket.scanned_by_id = rng.choice(on_duty)
+                                attendance[match] = attendance.get(match, 0) + quantity
+                    yield ticket
+
+        with explicit_timestamps(Ticket._meta.get_field('created_at')):
+            self.counts['tickets'] = self.insert(Ticket, tickets())
+
+        with explicit_timestamps(Report._meta.get_field('generated_at')):
+            self.counts['reports'] = self.insert(Report, (
+                Report(match=match, tickets_sold=sold, revenue=revenue, generated_at=last)
+                for match, (sold, revenue, last) in reports.items()
+            ))
+
+        # Home attendance is the scanned crowd; the stored summaries mention it
+        played = [match for match in self.matches if match.is_home and match.status != 'upcoming']
+        for match in played:
+            match.attendance = attendance.get(match, 0)
+            match.refresh_generated_texts(getattr(match, 'played_events', []))
+        with transaction.atomic():
+            Match.objects.bulk_update(played, ['attendance', 'generated_summary', 'generated_highlights'])
+        scans = Ticket.objects.filter(is_scanned=True, match__in=played).count()
+        self.log(f"{self.counts['tickets']:,} tickets, {scans:,} scanned, "
+                 f"{self.counts['reports']:,} sales reports")
+
+    def create_news(self):
+        rng = self.rng
+        if not self.admin_ids:
+            self.counts['news'] = 0
+            return
+        completed = [match for match in self.matches if match.status == 'completed']
+        recaps = completed[-self.news // 2:] if self.news > 1 else []
+        first_day, last_day = self.season_start(0) - timedelta(days=60), self.anchor
+
+        def articles():
+            for match in recaps:
+                posted = match.date + timedelta(hours=rng.uniform(2.5, 20))
+                yield News(
+                    title=f'{match.home_team} {match.home_score}-{match.away_score} {match.opponent}',
+                    body=match.generated_summary, category='match_recap', author_id=rng.choice(self.admin_ids),
+                    date_posted=posted, updated_at=posted, is_featured=rng.random() < 0.15,
+                )
+            categories, weights = zip(*NEWS_CATEGORIES)
+            span = (last_day - first_day).total_seconds()
+            for number in range(self.news - len(recaps)):
+                category = rng.choices(categories, weights=weights)[0]
+                title = rng.choice(NEWS_TITLES[category]).format(
+                    n=rng.randint(1, 2 * len(OPPONENTS)), venue=HOME_VENUE,
+                    name=f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}',
+                )
+                posted = first_day + timedelta(seconds=rng.random() * span)
+                yield News(
+                    title=title, body=f'{title}.\n\nMore on this story from {HOME_TEAM} to follow.',
+                    category=category, author_id=rng.choice(self.admin_ids),
+                    date_posted=posted, updated_at=posted, is_featured=rng.random() < 0.1,
+                )
+
+        with explicit_timestamps(News._meta.get_field('date_posted'), News._meta.get_field('updated_at')):
+            self.counts['news'] = self.insert(News, articles())
+        self.log(f"{self.counts['news']:,} news articles")
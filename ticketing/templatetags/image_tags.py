@@ -0,0 +1,19 @@
+from django import template
+from ticketing.images import derivative_info, srcset
+
+register = template.Library()
+
+
+@register.inclusion_tag('ticketing/responsive_image_partial.html')
+def responsive_image(image, sizes='100vw', alt='', css_class='', style=''):
+    """Render an <img> with WebP and JPEG srcsets built from the image's derivatives"""
+    widths, width = derivative_info(image.name) if image else ((), None)
+    return {
+        'image': image,
+        'webp_srcset': srcset(image.name, 'webp', widths, width) if widths else '',
+        'jpeg_srcset': srcset(image.name, 'jpg', widths, width) if widths else '',
+        'sizes': sizes,
+        'alt': alt,
+        'css_class': css_class,
+        'style': style,
+    }
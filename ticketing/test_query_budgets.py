@@ -0,0 +1,290 @@
+"""
+Query-count budgets for every named route in ticketing/urls.py.
+
+Each route is requested once against a dataset with SMALL rows of
+everything (matches, tickets, news, reports, events, gatemen, admins)
+and again after it has grown to LARGE rows. A view must issue the same
+queries at both sizes, so nothing is fetched per row, and no more than
+its budget. When either check fails the message names the first query
+shape whose count changed, which is usually the N+1.
+
+Budgets are exact: adding a query to a route means raising its budget
+here in the same change, where a reviewer can see it.
+"""
+import json
+import shutil
+import tempfile
+from collections import Counter
+from datetime import timedelta
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from . import urls
+from .models import Match, MatchEvent, News, Report, Ticket, TicketCategory, UserProfile, VideoUpload
+from .request_profiling import fingerprint
+
+SMALL = 10
+LARGE = 1000
+
+MEDIA_ROOT = tempfile.mkdtemp()
+UPLOAD_DIR = tempfile.mkdtemp()
+QR_CACHE_DIR = tempfile.mkdtemp()
+
+
+class Route:
+    """How to request one named route, as whom, and its query budget.
+
+    ``kwargs`` and ``data`` may be callables taking the test case, for
+    routes that need a fresh target each time (deleting, scanning).
+    """
+
+    def __init__(self, name, budget, user=None, method='get', kwargs=None, data=None, json=None,
+                 query='', status=200, headers=None):
+        self.name = name
+        self.budget = budget
+        self.user = user
+        self.method = method
+        self.kwargs = kwargs
+        self.data = data
+        self.json = json
+        self.query = query
+        self.status = status
+        self.headers = headers or {}
+
+
+def resolve_value(value, case):
+    return value(case) if callable(value) else value
+
+
+def fresh_news(case):
+    return {'news_id': News.objects.create(title='Old news', body='Body', author=case.staff).id}
+
+
+def fresh_gateman(case):
+    user = User.objects.create(username=f'gate-{User.objects.count()}')
+    UserProfile.objects.create(user=user, role='gateman')
+    return {'user_id': user.id}
+
+
+def fresh_admin(case):
+    user = User.objects.create(username=f'admin-{User.objects.count()}', is_staff=True)
+    UserProfile.objects.create(user=user, role='admin')
+    return {'user_id': user.id}
+
+
+def fresh_paid_ticket(case):
+    ticket = Ticket.objects.create(user=case.fan, match=case.upcoming, ticket_category=case.categories[0],
+                                   payment_status='completed')
+    return {'ticket_id': str(ticket.ticket_id)}
+
+
+def fresh_upload(case):
+    return {'upload_id': VideoUpload.objects.create(user=case.staff, filename='clip.mp4', size=4).upload_id}
+
+
+ROUTES = [
+    # Public pages
+    Route('home', 4),
+    Route('fixtures', 2),
+    Route('news_list', 3),
+    Route('news_detail', 4, kwargs=lambda case: {'news_id': case.article.id}),
+    Route('load_more_news', 3, query='?page=2&category=all'),
+    Route('stream_news_video', 1, kwargs=lambda case: {'news_id': case.video_article.id}),
+
+    # User authentication
+    Route('login', 0),
+    Route('register', 0),
+    Route('profile', 7, user='fan'),
+    Route('ticket_wallet', 4, user='fan', query='?tab=past'),
+    Route('logout', 5, user='fan', status=302),
+
+    # Ticket booking
+    Route('book_ticket', 6, user='fan', kwargs=lambda case: {'match_id': case.upcoming.id}),
+    Route('payment', 4, user='fan', kwargs=lambda case: {'ticket_id': case.pending_ticket.id}),
+    Route('ticket_detail', 4, user='fan', kwargs=lambda case: {'ticket_id': case.paid_ticket.id}),
+    Route('download_ticket', 4, user='fan', kwargs=lambda case: {'ticket_id': case.paid_ticket.ticket_id}),
+    Route('ticket_qr', 4, user='fan', kwargs=lambda case: {'ticket_id': case.paid_ticket.ticket_id}),
+
+    # Gateman pages
+    Route('gateman_scanner', 5, user='gateman'),
+    Route('scan_ticket', 6, user='gateman', method='post', json=fresh_paid_ticket),
+
+    # Admin pages
+    Route('admin_dashboard', 9, user='staff'),
+    Route('admin_matches', 5, user='staff'),
+    Route('add_match', 3, user='staff'),
+    Route('edit_match', 4, user='staff', kwargs=lambda case: {'match_id': case.upcoming.id}),
+    Route('match_preview', 6, user='staff', kwargs=lambda case: {'match_id': case.completed.id}),
+    Route('live_match_stream', 5, user='staff', kwargs=lambda case: {'match_id': case.live.id}, status=204),
+    Route('admin_news', 6, user='staff'),
+    Route('edit_news', 4, user='staff', kwargs=lambda case: {'news_id': case.article.id}),
+    Route('delete_news', 6, user='staff', method='post', kwargs=fresh_news),
+    Route('start_video_upload', 4, user='staff', method='post', json={'filename': 'clip.mp4', 'size': 4}),
+    Route('video_upload_status', 4, user='staff', kwargs=lambda case: {'upload_id': case.upload.upload_id}),
+    Route('upload_video_chunk', 7, user='staff', method='put', kwargs=fresh_upload,
+          data=b'clip', headers={'Upload-Offset': '0'}),
+    Route('admin_reports', 6, user='staff'),
+    Route('export_reports_csv', 4, user='staff'),
+    Route('export_reports_pdf', 4, user='staff'),
+    Route('download_report', 5, user='staff', kwargs=lambda case: {'report_id': case.report.id}),
+    Route('admin_gatemen', 4, user='staff'),
+    Route('admin_users', 4, user='staff'),
+    Route('delete_gateman', 15, user='staff', method='post', kwargs=fresh_gateman),
+    Route('delete_admin', 15, user='staff', method='post', kwargs=fresh_admin),
+    Route('admin_performance', 3, user='staff'),
+    Route('update_match_status', 5, user='staff', method='post',
+          json=lambda case: {'match_id': case.status_match.id, 'new_status': 'live'}),
+    Route('ingest_match_events', 10, user='staff', method='post', kwargs=lambda case: {'match_id': case.live.id},
+          json={'events': [{'event_type': 'corner', 'minute': 12, 'team': 'home'}]}),
+]
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, CHUNKED_UPLOAD_DIR=UPLOAD_DIR, QR_CACHE_DIR=QR_CACHE_DIR,
+                   IMAGE_DERIVATIVES_ASYNC=False, RELATED_NEWS_ASYNC=False)
+class RouteQueryBudgetTest(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        for folder in (MEDIA_ROOT, UPLOAD_DIR, QR_CACHE_DIR):
+            shutil.rmtree(folder, ignore_errors=True)
+
+    def setUp(self):
+        """The objects routes are requested for; grow() adds the rows around them"""
+        now = timezone.now()
+        self.fan = User.objects.create(username='fan', first_name='Abu', last_name='Kamara')
+        UserProfile.objects.create(user=self.fan, role='fan')
+        self.staff = User.objects.create(username='staff', is_staff=True, is_superuser=True)
+        UserProfile.objects.create(user=self.staff, role='admin')
+        self.gateman = User.objects.create(username='gate')
+        UserProfile.objects.create(user=self.gateman, role='gateman')
+        self.categories = TicketCategory.objects.bulk_create(
+            TicketCategory(name=name, price=price) for name, price in (('Regular', 50), ('VIP', 150), ('Student', 25))
+        )
+
+        def match(status, days, **fields):
+            return Match.objects.create(title=f'Bo Rangers FC vs {status.title()} FC', opponent=f'{status.title()} FC',
+                                        venue='Bo Stadium', date=now + timedelta(days=days), matchday=1,
+                                        status=status, **fields)
+
+        self.upcoming = match('upcoming', 7)
+        self.live = match('live', 0, home_score=1, away_score=0)
+        self.completed = match('completed', -7, home_score=2, away_score=1)
+        self.status_match = match('upcoming', 14)
+        self.report = Report.objects.create(match=self.completed, tickets_sold=1, revenue=50)
+        self.paid_ticket = Ticket.objects.create(user=self.fan, match=self.upcoming, ticket_category=self.categories[1],
+                                                 payment_status='completed')
+        self.pending_ticket = Ticket.objects.create(user=self.fan, match=self.upcoming,
+                                                    ticket_category=self.categories[0])
+        # Saving an article indexes its related articles once committed (see signals.py)
+        with self.captureOnCommitCallbacks(execute=True):
+            for i in range(3):
+                News.objects.create(title=f'Season tickets for the {i + 1}st round', body='Season tickets',
+                                    author=self.staff)
+            self.article = News.objects.create(title='Season tickets on sale', body='Season tickets', author=self.staff)
+        self.video_article = News.objects.create(title='Highlights', body='Body', author=self.staff,
+                                                 video=ContentFile(b'0123456789', name='highlights.mp4'))
+        self.upload = VideoUpload.objects.create(user=self.staff, filename='clip.mp4', size=4)
+        self.size = 0
+
+    def grow(self, size):
+        """Add rows until there are ``size`` of each kind"""
+        count = size - self.size
+        start = self.size
+        self.size = size
+        now = timezone.now()
+        statuses = ('upcoming', 'completed', 'live')
+        matches = Match.objects.bulk_create(
+            Match(title=f'Bo Rangers FC vs Team {i}', opponent=f'Team {i}', venue='Bo Stadium', matchday=i + 1,
+                  date=now + timedelta(days=(i - size // 2) * 3), status=statuses[i % 3],
+                  home_score=i % 4 if i % 3 else None, away_score=i % 3 if i % 3 else None)
+            for i in range(start, size)
+        )
+        Report.objects.bulk_create(Report(match=match, tickets_sold=10, revenue=500) for match in matches)
+
+        users = User.objects.bulk_create(
+            [User(username=f'gateman-{i}') for i in range(start, size)]
+            + [User(username=f'admin-{i}', is_staff=True) for i in range(start, size)]
+            + [User(username=f'fan-{i}') for i in range(start, size)]
+        )
+        gatemen, admins, fans = users[:count], users[count:2 * count], users[2 * count:]
+        UserProfile.objects.bulk_create(
+            [UserProfile(user=user, role='gateman') for user in gatemen]
+            + [UserProfile(user=user, role='admin') for user in admins]
+            + [UserProfile(user=user, role='fan') for user in fans]
+        )
+
+        # The subject fan's wallet and the gatemen's scans both grow
+        scanners = [self.gateman, *gatemen]
+        Ticket.objects.bulk_create(
+            Ticket(user=self.fan if i % 2 else fans[i - start], match=matches[i - start],
+                   ticket_category=self.categories[i % 3], payment_status='completed',
+                   is_scanned=i % 4 == 0, scanned_at=now if i % 4 == 0 else None,
+                   scanned_by=scanners[i % len(scanners)] if i % 4 == 0 else None)
+            for i in range(start, size)
+        )
+        News.objects.bulk_create(
+            News(title=f'Article {i}', body='Body', author=admins[i - start], category=News.CATEGORY_CHOICES[i % 5][0],
+                 is_featured=i % 7 == 0)
+            for i in range(start, size)
+        )
+        event_types = [event_type for event_type, _label in MatchEvent.EVENT_TYPES]
+        MatchEvent.objects.bulk_create(
+            MatchEvent(match=match, event_type=event_types[i % len(event_types)], minute=i % 90,
+                       team='home' if i % 2 else 'away', player_name=f'Player {i % 11}')
+            for i in range(start, size) for match in (self.live, self.completed)
+        )
+
+    def request(self, route):
+        """Request ``route`` as its user and return the SQL of every query it ran"""
+        cache.clear()
+        client = Client()
+        if route.user:
+            client.force_login(getattr(self, route.user))
+        kwargs = resolve_value(route.kwargs, self)
+        url = reverse(route.name, kwargs=kwargs) + route.query
+        options = {'headers': route.headers}
+        if route.json is not None:
+            options.update(data=json.dumps(resolve_value(route.json, self)), content_type='application/json')
+        elif route.data is not None:
+            options.update(data=resolve_value(route.data, self), content_type='application/octet-stream')
+
+        with CaptureQueriesContext(connection) as queries:
+            response = getattr(client, route.method)(url, **options)
+        self.assertEqual(response.status_code, route.status, f'{route.name} returned {response.status_code}')
+        if response.get('Content-Type') == 'application/json':
+            # Make sure the happy path ran, not an early error return
+            self.assertIs(response.json().get('success', True), True, response.json())
+        return [query['sql'] for query in queries.captured_queries]
+
+    def first_changed_shape(self, small, large):
+        before, after = Counter(map(fingerprint, small)), Counter(map(fingerprint, large))
+        for shape in map(fingerprint, large + small):
+            if before[shape] != after[shape]:
+                return f'{before[shape]} -> {after[shape]} times: {shape}'
+        return None
+
+    def test_every_route_has_a_budget(self):
+        """New routes must be added to ROUTES"""
+        names = {pattern.name for pattern in urls.urlpatterns if pattern.name}
+        self.assertEqual(names, {route.name for route in ROUTES})
+
+    def test_query_counts_do_not_grow_with_data(self):
+        """Every route runs the same queries with SMALL and LARGE rows, within its budget"""
+        self.grow(SMALL)
+        small = {route.name: self.request(route) for route in ROUTES}
+        self.grow(LARGE)
+        for route in ROUTES:
+            large = self.request(route)
+            with self.subTest(route=route.name):
+                changed = self.first_changed_shape(small[route.name], large)
+                if changed:
+                    self.fail(f'{route.name} ran {len(small[route.name])} queries with {SMALL} rows and '
+                              f'{len(large)} with {LARGE}; first query-shape change, {changed}')
+                if len(large) > route.budget:
+                    self.fail(f'{route.name} ran {len(large)} queries, over its budget of {route.budget}:\n'
+                              + '\n'.join(large))
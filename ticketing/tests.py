@@ -1,8 +1,50 @@
-from django.test import TestCase, Client
+from django.test import TestCase, TransactionTestCase, LiveServerTestCase, Client, RequestFactory, override_settings
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.handlers.asgi import ASGIHandler
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import OperationalError, connection, connections, router
+from django.db.models import Sum
+from django.db.backends.sqlite3.base import DatabaseWrapper as SQLiteDatabaseWrapper
+from django.http import HttpResponse
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve
 from django.contrib.auth.models import User
 from django.utils import timezone
-from datetime import timedelta
-from .models import Match, News
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from importlib.util import find_spec
+from io import BytesIO, StringIO
+from PIL import Image as PILImage
+from unittest import mock, skipUnless
+import asyncio
+import csv
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+import uuid
+from .models import Match, MatchEvent, News, RelatedNews, Report, Ticket, TicketCategory, UserProfile, VideoUpload
+from .fan_import import import_fans
+from .images import available_widths, derivative_info, derivative_name, generate_derivatives
+from .live import MatchChannel, hub as live_hub, sse_stream, websocket_application
+from .load_testing import MATCHDAY_STEPS, MatchdaySimulation, summarise
+from .match_stats import rebuild_counters
+from .match_summaries import generate_match_highlights
+from .db_router import PIN_COOKIE, ReplicaRoutingMiddleware
+from .media_gc import MediaCollector, keep_patterns, sorted_listing, template_media_names
+from .microbench import BENCHMARKS
+from .request_profiling import RequestProfilingMiddleware, fingerprint, reset_view_stats, view_summaries
+from .synthetic_data import EMAIL_DOMAIN, SyntheticDataset
+from .throttling import SlidingWindowThrottle, check_shared_cache
+from .video_uploads import ChunkError, receive_chunk
+from .qr_codes import cache_path, clear_memory_cache, payload_digest, qr_payload, render_png
 
 
 class MatchConsistencyTest(TestCase):
@@ -121,3 +163,1610 @@ class NewsPaginationTest(TestCase):
         self.assertIn('articles_html', data)
         self.assertIn('has_next', data)
         self.assertFalse(data['has_next'])  # Should be false for page 2 with 15 articles
+
+
+class ConditionalGetTest(TestCase):
+    def setUp(self):
+        """Set up a match and an article for conditional requests"""
+        self.client = Client()
+        self.user = User.objects.create_user(username='fan', password='testpass')
+        self.match = Match.objects.create(
+            title="Bo Rangers FC vs Team A",
+            date=timezone.now() + timedelta(days=7),
+            opponent="Team A",
+            venue="Bo Stadium",
+            matchday=1
+        )
+        self.article = News.objects.create(
+            title="Season opener",
+            body="Tickets are on sale now",
+            author=self.user
+        )
+
+    def test_fixtures_not_modified(self):
+        """A repeat request with the ETag gets a 304 until a match changes"""
+        response = self.client.get('/fixtures/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('public', response['Cache-Control'])
+        self.assertIn('Cookie', response['Vary'])
+        self.assertTrue(response.has_header('Last-Modified'))
+        etag = response['ETag']
+        
+        response = self.client.get('/fixtures/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        
+        self.match.venue = "National Stadium"
+        self.match.save()
+        response = self.client.get('/fixtures/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_news_detail_if_modified_since(self):
+        """Last-Modified round-trips for anonymous visitors"""
+        response = self.client.get(f'/news/{self.article.id}/')
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get(
+            f'/news/{self.article.id}/',
+            HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_load_more_news_etag(self):
+        """The JSON endpoint revalidates and changes when news is deleted"""
+        response = self.client.get('/load-more-news/?page=1')
+        etag = response['ETag']
+        self.assertEqual(self.client.get('/load-more-news/?page=1', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        
+        self.article.delete()
+        self.assertEqual(self.client.get('/load-more-news/?page=1', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_personalised_pages_are_private(self):
+        """Logged-in responses are private and keyed to the user"""
+        anonymous_etag = self.client.get('/fixtures/')['ETag']
+        self.client.login(username='fan', password='testpass')
+        response = self.client.get('/fixtures/')
+        self.assertIn('private', response['Cache-Control'])
+        self.assertFalse(response.has_header('Last-Modified'))
+        self.assertNotEqual(response['ETag'], anonymous_etag)
+
+    def test_new_login_or_role_invalidates_personal_etag(self):
+        """A re-login rotates the CSRF token in the page, and staff see another nav"""
+        credentials = {'username': 'fan', 'password': 'testpass'}
+        self.client.post('/login/', credentials)
+        etag = self.client.get('/fixtures/')['ETag']
+        self.assertEqual(self.client.get('/fixtures/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.client.post('/login/', credentials)
+        self.assertEqual(self.client.get('/fixtures/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        etag = self.client.get('/fixtures/')['ETag']
+        User.objects.filter(pk=self.user.pk).update(is_staff=True)
+        self.assertEqual(self.client.get('/fixtures/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_news_detail_keyed_on_its_article(self):
+        """Writing another article leaves an article page's ETag alone"""
+        url = f'/news/{self.article.id}/'
+        etag = self.client.get(url)['ETag']
+        News.objects.create(title="Unrelated", body="Kit launch", author=self.user, category='transfer')
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.article.title = "Season opener: sold out"
+        self.article.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_news_detail_keyed_on_its_fallback_related_list(self):
+        """Until an article is indexed, a new article in its category changes its page"""
+        url = f'/news/{self.article.id}/'
+        etag = self.client.get(url)['ETag']
+        News.objects.create(title="Away kit", body="Launch", author=self.user, category='general')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Away kit")
+
+    def test_match_event_invalidates_preview(self):
+        """Adding a match event changes the match preview ETag"""
+        self.client.login(username='fan', password='testpass')
+        url = f'/match-preview/{self.match.id}/'
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        
+        self.match.events.create(event_type='goal', minute=12, team='home', player_name='Kamara')
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class MatchSummaryStorageTest(TestCase):
+    def setUp(self):
+        """Set up a live match and a staff user"""
+        self.client = Client()
+        self.staff = User.objects.create_user(username='staff', password='testpass', is_staff=True)
+        self.match = Match.objects.create(
+            title="Bo Rangers FC vs Team A",
+            date=timezone.now() - timedelta(hours=2),
+            opponent="Team A",
+            venue="Bo Stadium",
+            status="live",
+            matchday=1,
+            home_score=2,
+            away_score=1
+        )
+        self.match.events.create(event_type='goal', minute=10, team='home')
+        self.match.events.create(event_type='goal', minute=55, team='away')
+
+    def test_texts_stored_on_completion(self):
+        """Completing a match via update_match_status stores its texts"""
+        self.assertEqual(self.match.generated_summary, '')
+        self.client.login(username='staff', password='testpass')
+        self.client.post(
+            '/update-match-status/',
+            data=json.dumps({'match_id': self.match.id, 'new_status': 'completed'}),
+            content_type='application/json'
+        )
+        self.match.refresh_from_db()
+        self.assertIn('secured a win against Team A', self.match.generated_summary)
+        self.assertIn('2 goals', self.match.generated_highlights)
+
+    def test_event_change_refreshes_highlights(self):
+        """New events regenerate the stored highlights of a completed match"""
+        self.match.status = 'completed'
+        self.match.save()
+        self.match.events.create(event_type='red_card', minute=80, team='away')
+        self.match.refresh_from_db()
+        self.assertIn('1 red cards', self.match.generated_highlights)
+
+    def test_texts_regenerated_only_when_their_inputs_change(self):
+        """Saves that leave the texts' fields alone do not reload events or rebuild the texts"""
+        self.match.status = 'completed'
+        self.match.save()
+        match = Match.objects.get(id=self.match.id)
+        with mock.patch('ticketing.models.generate_match_highlights', wraps=generate_match_highlights) as generate:
+            match.referee = 'A. Conteh'
+            with self.assertNumQueries(1):
+                match.save()
+            match.save(update_fields=['referee', 'updated_at'])
+            generate.assert_not_called()
+
+            match.home_score = 3
+            match.save(update_fields=['home_score', 'updated_at'])
+            self.assertEqual(generate.call_count, 1)
+        match.refresh_from_db()
+        self.assertIn('The final score was 3 - 1.', match.generated_summary)
+
+    def test_preview_does_not_regenerate(self):
+        """match_preview serves the stored texts without rebuilding them"""
+        self.match.status = 'completed'
+        self.match.save()
+        self.client.login(username='staff', password='testpass')
+        with mock.patch('ticketing.models.generate_match_summary') as generate, \
+                mock.patch('ticketing.models.generate_match_highlights') as generate_highlights:
+            response = self.client.get(f'/match-preview/{self.match.id}/')
+        generate.assert_not_called()
+        generate_highlights.assert_not_called()
+        self.assertContains(response, 'secured a win against Team A')
+
+    def test_backfill_command(self):
+        """The backfill command fills in matches completed without texts"""
+        Match.objects.filter(id=self.match.id).update(status='completed')
+        call_command('backfill_match_summaries', stdout=StringIO())
+        self.match.refresh_from_db()
+        self.assertIn('The final score was 2 - 1.', self.match.generated_summary)
+
+
+@override_settings(RELATED_NEWS_ASYNC=False)
+class RelatedNewsIndexTest(TestCase):
+    def setUp(self):
+        """Set up articles with overlapping and unrelated text"""
+        self.client = Client()
+        self.user = User.objects.create_user(username='editor', password='testpass')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create_articles()
+
+    def create_articles(self):
+        self.signing = News.objects.create(
+            title="Rangers sign striker Kamara",
+            body="The club has completed the transfer of striker Mohamed Kamara on a two year deal.",
+            author=self.user,
+            category='transfer'
+        )
+        self.recap = News.objects.create(
+            title="Kamara scores twice on debut",
+            body="New striker Mohamed Kamara scored twice as Rangers beat East End Lions.",
+            author=self.user,
+            category='match_recap'
+        )
+        self.stadium = News.objects.create(
+            title="Stadium car park closed",
+            body="Supporters are asked to use public buses during resurfacing works.",
+            author=self.user,
+            category='transfer'
+        )
+
+    def test_related_by_content_across_categories(self):
+        """The most similar article is related even in another category"""
+        response = self.client.get(f'/news/{self.signing.id}/')
+        related = list(response.context['related_news'])
+        self.assertEqual(related, [self.recap])
+
+    def test_incremental_update_on_save(self):
+        """Saving a new article links it from the articles it resembles, after commit"""
+        with self.captureOnCommitCallbacks(execute=True):
+            follow_up = News.objects.create(
+                title="Kamara named player of the month",
+                body="Striker Mohamed Kamara collected the award after his debut goals.",
+                author=self.user
+            )
+        related_ids = set(self.recap.related_entries.values_list('related_id', flat=True))
+        self.assertIn(follow_up.id, related_ids)
+
+    def test_rebuild_command(self):
+        """The batch rebuild produces the same links as incremental updates"""
+        before = set(RelatedNews.objects.values_list('article_id', 'related_id'))
+        call_command('build_related_news', stdout=StringIO())
+        after = set(RelatedNews.objects.values_list('article_id', 'related_id'))
+        self.assertEqual(before, after)
+        self.assertIn((self.recap.id, self.signing.id), after)
+
+    @override_settings(RELATED_NEWS_ASYNC=True)
+    def test_save_does_not_read_the_corpus(self):
+        """The save only queues the article; the corpus is read after commit, off the request"""
+        with mock.patch('ticketing.related_news.load_corpus') as load_corpus, \
+                self.captureOnCommitCallbacks() as callbacks:
+            self.recap.body += " He was named man of the match."
+            self.recap.save()
+        load_corpus.assert_not_called()
+        self.assertEqual(len(callbacks), 1)
+
+
+class TicketWalletTest(TestCase):
+    def setUp(self):
+        """Set up a fan with tickets for past and upcoming matches"""
+        self.client = Client()
+        self.user = User.objects.create_user(username='fan', password='testpass')
+        self.category = TicketCategory.objects.create(name='Regular', price=50)
+        self.client.login(username='fan', password='testpass')
+
+    def add_tickets(self, count, days):
+        """Create one pending ticket per match, each a day apart"""
+        for i in range(count):
+            match = Match.objects.create(
+                title=f"Bo Rangers FC vs Team {days}-{i}",
+                date=timezone.now() + timedelta(days=days + i if days > 0 else days - i),
+                opponent=f"Team {i}",
+                venue="Bo Stadium",
+                matchday=i + 1
+            )
+            Ticket.objects.create(user=self.user, match=match, ticket_category=self.category)
+
+    def test_query_count_independent_of_ticket_count(self):
+        """The profile issues the same number of queries for 2 or 30 tickets"""
+        self.add_tickets(2, days=1)
+        # Warm the role cache, which is per user and so cold on a new database's ids
+        self.client.get('/profile/')
+        with CaptureQueriesContext(connection) as small:
+            self.client.get('/profile/')
+        self.add_tickets(28, days=60)
+        with CaptureQueriesContext(connection) as large:
+            response = self.client.get('/profile/')
+        self.assertEqual(len(small), len(large))
+        self.assertEqual(len(response.context['user_tickets']), 20)
+
+    def test_keyset_pagination_and_tabs(self):
+        """Cursor pages cover every upcoming ticket once, in match order"""
+        self.add_tickets(25, days=1)
+        self.add_tickets(3, days=-1)
+        
+        first = self.client.get('/profile/wallet/').json()
+        second = self.client.get(f"/profile/wallet/?cursor={first['next_cursor']}").json()
+        self.assertIsNone(second['next_cursor'])
+        dates = [ticket['date'] for ticket in first['tickets'] + second['tickets']]
+        self.assertEqual(len(dates), 25)
+        self.assertEqual(dates, sorted(dates))
+        
+        past = self.client.get('/profile/wallet/?tab=past').json()
+        self.assertEqual(len(past['tickets']), 3)
+        past_dates = [ticket['date'] for ticket in past['tickets']]
+        self.assertEqual(past_dates, sorted(past_dates, reverse=True))
+
+    def test_live_match_stays_upcoming(self):
+        """A match already kicked off is listed as upcoming until it is no longer live"""
+        self.add_tickets(1, days=1)
+        self.add_tickets(1, days=-1)
+        match = Match.objects.get(date__lt=timezone.now())
+        match.status = 'live'
+        match.save()
+
+        upcoming = self.client.get('/profile/wallet/').json()['tickets']
+        self.assertEqual([ticket['match'] for ticket in upcoming][0], match.title)
+        self.assertEqual(len(upcoming), 2)
+        self.assertEqual(self.client.get('/profile/wallet/?tab=past').json()['tickets'], [])
+
+        match.status = 'completed'
+        match.save()
+        past = self.client.get('/profile/wallet/?tab=past').json()['tickets']
+        self.assertEqual([ticket['match'] for ticket in past], [match.title])
+
+
+class AdminListingTest(TestCase):
+    def setUp(self):
+        """Set up a staff user with news articles and sales reports"""
+        self.client = Client()
+        self.staff = User.objects.create_user(username='staff', password='testpass', is_staff=True)
+        self.client.login(username='staff', password='testpass')
+
+    def add_reports(self, count):
+        """Create matches with one sales report each"""
+        for i in range(count):
+            match = Match.objects.create(
+                title=f"Bo Rangers FC vs Team {i}",
+                date=timezone.now() - timedelta(days=i),
+                opponent=f"Team {i}",
+                venue="Bo Stadium",
+                matchday=i + 1
+            )
+            Report.objects.create(match=match, tickets_sold=10, revenue=500)
+
+    def test_admin_news_counts_and_pagination(self):
+        """Category counts come from one query and the list is paginated"""
+        with mock.patch('ticketing.signals.schedule_related_news_update'):
+            for i in range(30):
+                News.objects.create(
+                    title=f"Article {i}",
+                    body="Body",
+                    author=self.staff,
+                    category='transfer' if i % 3 == 0 else 'general',
+                    is_featured=i < 4
+                )
+        response = self.client.get('/admin-news/')
+        self.assertEqual(response.context['total_articles'], 30)
+        self.assertEqual(response.context['featured_count'], 4)
+        self.assertEqual(response.context['transfer_count'], 10)
+        self.assertEqual(response.context['general_count'], 20)
+        self.assertEqual(len(response.context['news_articles']), 25)
+        
+        response = self.client.get('/admin-news/?page=2')
+        self.assertEqual(len(response.context['news_articles']), 5)
+
+    def test_admin_reports_query_count_is_flat(self):
+        """Totals are aggregated in SQL, so more reports add no queries"""
+        self.add_reports(3)
+        # Warm the role cache, which is per user and so cold on a new database's ids
+        self.client.get('/admin-reports/')
+        with CaptureQueriesContext(connection) as small:
+            response = self.client.get('/admin-reports/')
+        self.assertEqual(response.context['total_tickets_sold'], 30)
+        
+        self.add_reports(40)
+        with CaptureQueriesContext(connection) as large:
+            response = self.client.get('/admin-reports/')
+        self.assertEqual(len(small), len(large))
+        self.assertEqual(response.context['report_count'], 43)
+        self.assertEqual(len(response.context['reports']), 25)
+
+    def test_admin_reports_date_filter(self):
+        """The date range limits both the listing and the totals"""
+        self.add_reports(10)
+        start = (timezone.now() - timedelta(days=2)).date()
+        response = self.client.get(f'/admin-reports/?start_date={start.isoformat()}')
+        self.assertEqual(response.context['report_count'], 3)
+        self.assertEqual(response.context['total_revenue'], 1500)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(), IMAGE_DERIVATIVES_ASYNC=False, RELATED_NEWS_ASYNC=False)
+class ImageDerivativeTest(TestCase):
+    def setUp(self):
+        """Set up an editor and an uploaded 800px wide image"""
+        cache.clear()
+        self.client = Client()
+        self.user = User.objects.create_user(username='editor', password='testpass')
+        buffer = BytesIO()
+        PILImage.new('RGB', (800, 400), (200, 30, 30)).save(buffer, 'JPEG')
+        self.upload = SimpleUploadedFile('kit.jpg', buffer.getvalue(), content_type='image/jpeg')
+
+    def tearDown(self):
+        shutil.rmtree(settings.MEDIA_ROOT, ignore_errors=True)
+
+    def test_derivatives_generated_after_upload(self):
+        """Saving an article writes resized WebP and JPEG copies narrower than the original"""
+        with self.captureOnCommitCallbacks(execute=True):
+            article = News.objects.create(title="New kit", body="Launch", author=self.user, image=self.upload)
+        self.assertEqual(available_widths(article.image.name), (96, 320, 640))
+        with default_storage.open(derivative_name(article.image.name, 320, 'webp')) as derivative:
+            self.assertEqual(PILImage.open(derivative).size, (320, 160))
+
+    def test_templates_get_srcset(self):
+        """News pages list the derivatives in srcset attributes"""
+        with self.captureOnCommitCallbacks(execute=True):
+            article = News.objects.create(title="New kit", body="Launch", author=self.user, image=self.upload)
+        response = self.client.get(f'/news/{article.id}/')
+        self.assertContains(response, 'type="image/webp"')
+        self.assertContains(response, derivative_name(article.image.name, 640, 'webp') + ' 640w')
+        self.assertContains(response, f'{article.image.url} 800w')
+
+    def test_pages_revalidate_once_derivatives_exist(self):
+        """A page cached before its image had derivatives is not answered 304 afterwards"""
+        with mock.patch('ticketing.signals.schedule_derivatives'):
+            article = News.objects.create(title="New kit", body="Launch", author=self.user, image=self.upload)
+        urls = ('/', '/news/', f'/news/{article.id}/')
+        etags = {}
+        for url in urls:
+            response = self.client.get(url)
+            self.assertNotContains(response, 'type="image/webp"')
+            etags[url] = response['ETag']
+        generate_derivatives(article.image.name)
+        for url in urls:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etags[url])
+            self.assertEqual(response.status_code, 200, url)
+            self.assertContains(response, derivative_name(article.image.name, 320, 'webp') + ' 320w')
+
+    def test_small_images_cached_as_complete(self):
+        """An image narrower than every derivative width is not looked for again"""
+        buffer = BytesIO()
+        PILImage.new('RGB', (80, 40)).save(buffer, 'JPEG')
+        small = SimpleUploadedFile('badge.jpg', buffer.getvalue(), content_type='image/jpeg')
+        with self.captureOnCommitCallbacks(execute=True):
+            article = News.objects.create(title="Badge", body="Small", author=self.user, image=small)
+        with mock.patch('ticketing.images.time.time', return_value=time.time() + 86400), \
+                mock.patch.object(default_storage, 'exists') as exists:
+            self.assertEqual(derivative_info(article.image.name), ((), 80))
+        exists.assert_not_called()
+
+    def test_logo_derivatives_only_for_new_files(self):
+        """Match saves queue logo derivatives only when a logo file changes"""
+        with mock.patch('ticketing.signals.schedule_derivatives') as schedule:
+            match = Match.objects.create(title="Bo Rangers FC vs Team A", date=timezone.now(), opponent="Team A",
+                                         venue="Bo Stadium", matchday=1, opponent_logo=self.upload)
+            self.assertEqual(schedule.call_args.args, (match.opponent_logo.name,))
+
+            match = Match.objects.get(id=match.id)
+            match.status = 'live'
+            match.save()
+            match.save(update_fields=['status', 'updated_at'])
+            self.assertEqual(schedule.call_args_list[1:], [mock.call(), mock.call()])
+
+            match.home_team_logo = SimpleUploadedFile('home.jpg', self.upload.open().read(), content_type='image/jpeg')
+            match.save()
+            self.assertEqual(schedule.call_args.args, (match.home_team_logo.name,))
+
+    def test_news_derivatives_only_for_new_files(self):
+        """Article saves queue image derivatives only when the image file changes"""
+        with mock.patch('ticketing.signals.schedule_derivatives') as schedule:
+            article = News.objects.create(title="New kit", body="Launch", author=self.user, image=self.upload)
+            self.assertEqual(schedule.call_args.args, (article.image.name,))
+
+            article = News.objects.get(id=article.id)
+            article.title = "New home kit"
+            article.save()
+            article.save(update_fields=['is_featured'])
+            self.assertEqual(schedule.call_args_list[1:], [mock.call(), mock.call()])
+
+            article.image = SimpleUploadedFile('away.jpg', self.upload.open().read(), content_type='image/jpeg')
+            article.save(update_fields=['title'])
+            self.assertEqual(schedule.call_args, mock.call())
+            article.save(update_fields=['image'])
+            self.assertEqual(schedule.call_args.args, (article.image.name,))
+
+
+@override_settings(
+    MEDIA_ROOT=tempfile.mkdtemp(),
+    CHUNKED_UPLOAD_DIR=tempfile.mkdtemp(),
+    VIDEO_UPLOAD_CHUNK_SIZE=1024,
+)
+class ChunkedVideoTest(TestCase):
+    def setUp(self):
+        """Set up a staff user, an article and some video bytes"""
+        self.client = Client()
+        self.staff = User.objects.create_user(username='staff', password='testpass', is_staff=True)
+        self.client.login(username='staff', password='testpass')
+        self.article = News.objects.create(title="Highlights", body="Watch the goals", author=self.staff)
+        self.video = bytes(range(256)) * 10
+
+    def tearDown(self):
+        shutil.rmtree(settings.MEDIA_ROOT, ignore_errors=True)
+        shutil.rmtree(settings.CHUNKED_UPLOAD_DIR, ignore_errors=True)
+
+    def send_chunk(self, upload_id, offset, data, checksum=None):
+        headers = {'HTTP_UPLOAD_OFFSET': str(offset)}
+        if checksum:
+            headers['HTTP_UPLOAD_CHECKSUM'] = checksum
+        return self.client.post(
+            f'/video-uploads/{upload_id}/chunk/', data=data,
+            content_type='application/octet-stream', **headers
+        ).json()
+
+    def upload_video(self):
+        """Upload the video in chunks, resuming after a rejected chunk"""
+        started = self.client.post(
+            '/video-uploads/',
+            data=json.dumps({'filename': 'goals.mp4', 'size': len(self.video),
+                             'sha256': hashlib.sha256(self.video).hexdigest()}),
+            content_type='application/json'
+        ).json()
+        upload_id = started['upload_id']
+        
+        self.send_chunk(upload_id, 0, self.video[:1024])
+        # A corrupted chunk is rejected and the offset does not move
+        rejected = self.send_chunk(upload_id, 1024, self.video[1024:2048], checksum='0' * 64)
+        self.assertFalse(rejected['success'])
+        self.assertEqual(self.client.get(f'/video-uploads/{upload_id}/').json()['offset'], 1024)
+        
+        offset = 1024
+        while offset < len(self.video):
+            chunk = self.video[offset:offset + 1024]
+            result = self.send_chunk(upload_id, offset, chunk, hashlib.sha256(chunk).hexdigest())
+            offset = result['offset']
+        self.assertTrue(result['complete'])
+        return upload_id
+
+    def test_chunked_upload_attaches_to_article(self):
+        """A finished upload is moved into storage when the news form is saved"""
+        upload_id = self.upload_video()
+        response = self.client.post(f'/edit-news/{self.article.id}/', {
+            'title': self.article.title,
+            'body': self.article.body,
+            'category': 'general',
+            'video_upload': upload_id,
+        })
+        self.assertEqual(response.status_code, 302)
+        self.article.refresh_from_db()
+        with self.article.video.open('rb') as video:
+            self.assertEqual(video.read(), self.video)
+        self.assertFalse(VideoUpload.objects.exists())
+
+    def test_cannot_attach_another_users_upload(self):
+        """A finished upload only attaches to an article edited by the user who uploaded it"""
+        upload_id = self.upload_video()
+        User.objects.create_user(username='other_staff', password='testpass', is_staff=True)
+        self.client.login(username='other_staff', password='testpass')
+        response = self.client.post(f'/edit-news/{self.article.id}/', {
+            'title': self.article.title,
+            'body': self.article.body,
+            'category': 'general',
+            'video_upload': upload_id,
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertFormError(response.context['form'], 'video_upload', 'No finished video upload of yours has that id.')
+        self.article.refresh_from_db()
+        self.assertFalse(self.article.video)
+        self.assertTrue(VideoUpload.objects.filter(upload_id=upload_id).exists())
+
+    def test_chunk_read_outside_any_transaction(self):
+        """A chunk is read from the client with no transaction open, then claimed once"""
+        upload = VideoUpload.objects.create(user=self.staff, filename='goals.mp4', size=len(self.video))
+        stale = VideoUpload.objects.get(pk=upload.pk)
+        open_blocks = len(connection.atomic_blocks)
+        depths = []
+
+        class Stream(BytesIO):
+            def read(self, size=-1):
+                depths.append(len(connection.atomic_blocks))
+                return super().read(size)
+
+        receive_chunk(upload, Stream(self.video[:1024]), 1024, 0)
+        self.assertEqual(set(depths), {open_blocks})
+
+        # A second request for the same offset loses the claim and leaves the part file alone
+        with self.assertRaisesMessage(ChunkError, 'Expected offset 1024'):
+            receive_chunk(stale, BytesIO(b'x' * 1024), 1024, 0)
+        self.assertEqual(stale.offset, 1024)
+        with open(upload.temp_path, 'rb') as part:
+            self.assertEqual(part.read(), self.video[:1024])
+        self.assertEqual(os.listdir(settings.CHUNKED_UPLOAD_DIR), [os.path.basename(upload.temp_path)])
+
+    def test_range_requests(self):
+        """The video endpoint serves byte ranges for seeking"""
+        self.article.video.save('goals.mp4', ContentFile(self.video))
+        url = f'/news/{self.article.id}/video/'
+        
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(b''.join(response.streaming_content), self.video)
+        
+        response = self.client.get(url, HTTP_RANGE='bytes=100-199')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 100-199/{len(self.video)}')
+        self.assertEqual(b''.join(response.streaming_content), self.video[100:200])
+        
+        response = self.client.get(url, HTTP_RANGE='bytes=-10')
+        self.assertEqual(b''.join(response.streaming_content), self.video[-10:])
+        
+        response = self.client.get(url, HTTP_RANGE=f'bytes={len(self.video)}-')
+        self.assertEqual(response.status_code, 416)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(), QR_CACHE_DIR=tempfile.mkdtemp())
+class TicketQRCodeTest(TestCase):
+    def setUp(self):
+        """Set up a fan with a paid ticket"""
+        clear_memory_cache()
+        self.client = Client()
+        self.user = User.objects.create_user(username='fan', password='testpass')
+        self.match = Match.objects.create(
+            title="Bo Rangers FC vs East End Lions",
+            date=timezone.now() + timedelta(days=3),
+            opponent="East End Lions",
+            venue="Bo Stadium",
+            matchday=1
+        )
+        category = TicketCategory.objects.create(name='VIP', price=200)
+        self.ticket = Ticket.objects.create(
+            user=self.user, match=self.match, ticket_category=category, payment_status='completed'
+        )
+        self.client.login(username='fan', password='testpass')
+
+    def tearDown(self):
+        shutil.rmtree(settings.MEDIA_ROOT, ignore_errors=True)
+        shutil.rmtree(settings.QR_CACHE_DIR, ignore_errors=True)
+
+    def test_qr_rendered_on_demand_and_cached(self):
+        """The QR code is rendered once, cached in a sharded directory and revalidated by ETag"""
+        url = f'/ticket/{self.ticket.ticket_id}/qr.png'
+        with mock.patch('ticketing.qr_codes.render_png', wraps=render_png) as render:
+            response = self.client.get(url)
+            self.client.get(url)
+        self.assertEqual(render.call_count, 1)
+        self.assertEqual(response['Content-Type'], 'image/png')
+        self.assertEqual(PILImage.open(BytesIO(response.content)).format, 'PNG')
+
+        digest = payload_digest(qr_payload(self.ticket))
+        path = cache_path(digest)
+        self.assertTrue(path.exists())
+        self.assertEqual(path.parent.name, digest[2:4])
+        self.assertFalse(default_storage.exists('qr_codes'))
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_revalidation_skips_the_image(self):
+        """A matching If-None-Match is answered from the payload digest alone"""
+        etag = f'"{payload_digest(qr_payload(self.ticket))}"'
+        with mock.patch('ticketing.views.qr_png') as qr_png:
+            response = self.client.get(f'/ticket/{self.ticket.ticket_id}/qr.png', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        qr_png.assert_not_called()
+
+    def test_qr_only_for_owner(self):
+        """Other fans cannot fetch someone else's QR code"""
+        User.objects.create_user(username='other', password='testpass')
+        self.client.login(username='other', password='testpass')
+        response = self.client.get(f'/ticket/{self.ticket.ticket_id}/qr.png')
+        self.assertEqual(response.status_code, 404)
+
+    def test_ticket_pages_use_rendered_qr(self):
+        """ticket_detail links the QR endpoint and the PDF still embeds the code"""
+        response = self.client.get(f'/ticket/{self.ticket.id}/')
+        self.assertContains(response, f'/ticket/{self.ticket.ticket_id}/qr.png')
+        response = self.client.get(f'/download-ticket/{self.ticket.ticket_id}/')
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertTrue(cache_path(payload_digest(qr_payload(self.ticket))).exists())
+
+    def test_purge_stored_qr_codes(self):
+        """Legacy per-ticket images are deleted, other files in qr_codes/ are kept"""
+        default_storage.save(f'qr_codes/ticket_{self.ticket.ticket_id}.png', ContentFile(b'png'))
+        default_storage.save('qr_codes/Logo.png', ContentFile(b'logo'))
+
+        out = StringIO()
+        call_command('purge_stored_qr_codes', '--dry-run', stdout=out)
+        self.assertIn('Would remove 1', out.getvalue())
+        self.assertTrue(default_storage.exists(f'qr_codes/ticket_{self.ticket.ticket_id}.png'))
+
+        call_command('purge_stored_qr_codes', stdout=StringIO())
+        self.assertFalse(default_storage.exists(f'qr_codes/ticket_{self.ticket.ticket_id}.png'))
+        self.assertTrue(default_storage.exists('qr_codes/Logo.png'))
+
+
+@override_settings(
+    MEDIA_ROOT=tempfile.mkdtemp(),
+    CHUNKED_UPLOAD_DIR=tempfile.mkdtemp(),
+    MEDIA_GC_KEEP=['qr_codes/Logo.png'],
+)
+class OrphanedMediaTest(TestCase):
+    def setUp(self):
+        """Set up one referenced image with derivatives alongside unreferenced files"""
+        self.user = User.objects.create_user(username='editor', password='testpass')
+        self.article = News.objects.create(
+            title="Cup run", body="Report", author=self.user,
+            image=SimpleUploadedFile('cup.jpg', b'jpeg', content_type='image/jpeg'),
+        )
+        self.files = {
+            'kept': self.article.image.name,
+            'kept_derivative': derivative_name(self.article.image.name, 320, 'webp'),
+            'orphan': 'news_images/deleted.jpg',
+            'orphan_derivative': derivative_name('news_images/deleted.jpg', 320, 'webp'),
+            'logo': 'qr_codes/Logo.png',
+            'legacy_qr': 'qr_codes/ticket_1234.png',
+        }
+        for name in self.files.values():
+            if not default_storage.exists(name):
+                default_storage.save(name, ContentFile(b'data'))
+        os.makedirs(settings.CHUNKED_UPLOAD_DIR, exist_ok=True)
+        self.stale_part = os.path.join(settings.CHUNKED_UPLOAD_DIR, 'abandoned.part')
+        with open(self.stale_part, 'wb') as part:
+            part.write(b'partial')
+
+    def tearDown(self):
+        shutil.rmtree(settings.MEDIA_ROOT, ignore_errors=True)
+        shutil.rmtree(settings.CHUNKED_UPLOAD_DIR, ignore_errors=True)
+
+    def test_dry_run_then_delete(self):
+        """Only unreferenced files are reported and removed"""
+        out = StringIO()
+        call_command('collect_orphaned_media', '--dry-run', '--grace-hours', '0', stdout=out)
+        self.assertIn('found 4 orphans', out.getvalue())
+        self.assertTrue(default_storage.exists(self.files['orphan']))
+
+        call_command('collect_orphaned_media', '--grace-hours', '0', stdout=StringIO())
+        for key in ('kept', 'kept_derivative', 'logo'):
+            self.assertTrue(default_storage.exists(self.files[key]), key)
+        for key in ('orphan', 'orphan_derivative', 'legacy_qr'):
+            self.assertFalse(default_storage.exists(self.files[key]), key)
+        self.assertFalse(os.path.exists(self.stale_part))
+
+    def test_media_linked_from_templates_is_kept(self):
+        """Every media file a template links to, such as the hero image, survives collection"""
+        names = template_media_names()
+        self.assertIn('qr_codes/stadium.jpg', names)
+        for name in names:
+            if not default_storage.exists(name):
+                default_storage.save(name, ContentFile(b'data'))
+        with self.settings(MEDIA_GC_KEEP=[]):
+            collector = MediaCollector(settings.MEDIA_ROOT, keep=keep_patterns(), grace_seconds=0)
+            orphans = {name for name, _path in collector.orphans()}
+        self.assertEqual(orphans & set(names), set())
+        self.assertIn(self.files['orphan'], orphans)
+
+    def test_quarantine_and_grace_period(self):
+        """Recent files are skipped and orphans are moved rather than deleted"""
+        quarantine = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, quarantine, True)
+        old = timezone.now().timestamp() - 7200
+        os.utime(default_storage.path(self.files['orphan']), (old, old))
+
+        call_command('collect_orphaned_media', '--quarantine', quarantine, '--grace-hours', '1', stdout=StringIO())
+        self.assertFalse(default_storage.exists(self.files['orphan']))
+        self.assertTrue(default_storage.exists(self.files['legacy_qr']))
+        moved = [os.path.relpath(os.path.join(root, name), quarantine)
+                 for root, _dirs, names in os.walk(quarantine) for name in names]
+        self.assertEqual(len(moved), 1)
+        self.assertTrue(moved[0].endswith(self.files['orphan']))
+
+    def test_sorted_listing_spills_runs(self):
+        """Listings larger than one run are merged back into sorted order"""
+        names = ['b.png', 'a.txt', 'a0.png', 'c', 'B.png', 'z.jpg', 'derivatives']
+        for name in names:
+            default_storage.save(f'big/{name}', ContentFile(b''))
+        default_storage.save('big/a/inner.png', ContentFile(b''))
+        listing = list(sorted_listing(default_storage.path('big'), run_size=3))
+        self.assertEqual(listing, sorted(names + ['a/']))
+
+
+class TicketWriteTest(TestCase):
+    def setUp(self):
+        """Set up a fan with a pending ticket and a gateman"""
+        cache.clear()
+        self.client = Client()
+        self.user = User.objects.create_user(username='fan', password='testpass')
+        self.gateman = User.objects.create_user(username='gate', password='testpass')
+        UserProfile.objects.create(user=self.gateman, role='gateman')
+        match = Match.objects.create(
+            title="Bo Rangers FC vs Kallon",
+            date=timezone.now() + timedelta(days=2),
+            opponent="Kallon",
+            venue="Bo Stadium",
+            matchday=1
+        )
+        category = TicketCategory.objects.create(name='Regular', price=50)
+        self.ticket = Ticket.objects.create(user=self.user, match=match, ticket_category=category, quantity=2)
+
+    def test_repeated_payment_counts_once(self):
+        """Submitting the payment form twice records the sale once"""
+        self.client.login(username='fan', password='testpass')
+        for _ in range(2):
+            self.client.post(f'/payment/{self.ticket.id}/', {'payment_method': 'orange_money'})
+        report = Report.objects.get(match=self.ticket.match)
+        self.assertEqual(report.tickets_sold, 2)
+        self.assertEqual(report.revenue, 100)
+
+    def test_ticket_scanned_once(self):
+        """A second scan of the same ticket is rejected"""
+        Ticket.objects.filter(pk=self.ticket.pk).update(payment_status='completed')
+        self.client.login(username='gate', password='testpass')
+        payload = json.dumps({'ticket_id': str(self.ticket.ticket_id)})
+        first = self.client.post('/scan-ticket/', payload, content_type='application/json').json()
+        second = self.client.post('/scan-ticket/', payload, content_type='application/json').json()
+        self.assertTrue(first['success'])
+        self.assertIn('already scanned', second['error'])
+
+    @mock.patch.dict(settings.SQLITE_PRODUCTION_OPTIONS)
+    def test_sqlite_production_profile(self):
+        """The production profile opens WAL connections with a busy timeout; IMMEDIATE is opt-in"""
+        settings.SQLITE_PRODUCTION_OPTIONS.pop('transaction_mode', None)
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, True)
+        settings_dict = dict(
+            connections.settings['default'],
+            NAME=os.path.join(directory, 'profile.sqlite3'),
+            OPTIONS=settings.SQLITE_PRODUCTION_OPTIONS,
+        )
+        wrapper = SQLiteDatabaseWrapper(settings_dict, alias='profile-check')
+        self.addCleanup(wrapper.close)
+        with wrapper.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            self.assertEqual(cursor.fetchone()[0], 'wal')
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], 20000)
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 1)
+        self.assertIsNone(wrapper.transaction_mode)
+
+
+@override_settings(DATABASE_REPLICAS=['replica'], DATABASE_ROUTERS=['ticketing.db_router.PrimaryReplicaRouter'])
+class ReplicaRouterTest(TestCase):
+    def route(self, request, write=False):
+        """Run a request through the middleware, noting where reads go before and after a write"""
+        reads = []
+
+        def view(request):
+            reads.append(router.db_for_read(Match))
+            if write:
+                router.db_for_write(Match)
+                reads.append(router.db_for_read(Match))
+            return HttpResponse()
+
+        response = ReplicaRoutingMiddleware(view)(request)
+        return reads, response
+
+    def test_safe_requests_read_replicas(self):
+        """GETs read from a replica; reads outside requests stay on the primary"""
+        reads, response = self.route(RequestFactory().get('/fixtures/'))
+        self.assertEqual(reads, ['replica'])
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+        self.assertEqual(router.db_for_read(Match), 'default')
+
+    def test_writes_pin_client_to_primary(self):
+        """A write moves the rest of the request and the next ones to the primary"""
+        reads, response = self.route(RequestFactory().post('/payment/1/'), write=True)
+        self.assertEqual(reads, ['default', 'default'])
+        self.assertEqual(response.cookies[PIN_COOKIE]['max-age'], settings.REPLICA_PIN_SECONDS)
+
+        reads, _ = self.route(RequestFactory().get('/ticket/1/', HTTP_COOKIE=f'{PIN_COOKIE}=1'))
+        self.assertEqual(reads, ['default'])
+
+        reads, response = self.route(RequestFactory().get('/fixtures/'), write=True)
+        self.assertEqual(reads, ['replica', 'default'])
+        self.assertIn(PIN_COOKIE, response.cookies)
+
+
+@skipUnless(settings.DATABASE_REPLICAS, 'Set DJANGO_DB_REPLICAS to test against a second database alias')
+class ReplicaReadYourWritesTest(TransactionTestCase):
+    databases = '__all__'
+
+    def tearDown(self):
+        # Pooled replica connections would keep the test database open
+        for alias in settings.DATABASE_REPLICAS:
+            connections[alias].close()
+            if getattr(connections[alias], 'pool', None):
+                connections[alias].close_pool()
+
+    def test_payment_then_ticket_detail(self):
+        """After paying, ticket_detail reads the primary; unpinned pages read the replica"""
+        user = User.objects.create_user(username='fan', password='testpass')
+        match = Match.objects.create(
+            title="Bo Rangers FC vs Lamboi", date=timezone.now() + timedelta(days=1),
+            opponent="Lamboi", venue="Bo Stadium", matchday=1
+        )
+        category = TicketCategory.objects.create(name='Regular', price=50)
+        ticket = Ticket.objects.create(user=user, match=match, ticket_category=category)
+        self.client.login(username='fan', password='testpass')
+
+        replica = connections[settings.DATABASE_REPLICAS[0]]
+        self.client.post(f'/payment/{ticket.id}/', {'payment_method': 'orange_money'})
+        with CaptureQueriesContext(replica) as replica_queries:
+            response = self.client.get(f'/ticket/{ticket.id}/')
+        self.assertEqual(response.context['ticket'].payment_status, 'completed')
+        self.assertEqual(len(replica_queries), 0)
+
+        del self.client.cookies[PIN_COOKIE]
+        with CaptureQueriesContext(replica) as replica_queries:
+            self.client.get('/fixtures/')
+        self.assertGreater(len(replica_queries), 0)
+
+
+class RoleCacheTest(TestCase):
+    def setUp(self):
+        """Set up a gateman and two paid tickets"""
+        cache.clear()
+        self.client = Client()
+        self.gateman = User.objects.create_user(username='gate', password='testpass')
+        self.profile = UserProfile.objects.create(user=self.gateman, role='gateman')
+        fan = User.objects.create_user(username='fan', password='testpass')
+        match = Match.objects.create(
+            title="Bo Rangers FC vs Luawa",
+            date=timezone.now() + timedelta(days=1),
+            opponent="Luawa",
+            venue="Bo Stadium",
+            matchday=1
+        )
+        category = TicketCategory.objects.create(name='Regular', price=50)
+        self.tickets = [
+            Ticket.objects.create(user=fan, match=match, ticket_category=category, payment_status='completed')
+            for _ in range(2)
+        ]
+        self.client.login(username='gate', password='testpass')
+
+    def scan(self, ticket):
+        payload = json.dumps({'ticket_id': str(ticket.ticket_id)})
+        return self.client.post('/scan-ticket/', payload, content_type='application/json').json()
+
+    def test_scans_skip_role_query(self):
+        """Once resolved, the gateman role comes from the cache"""
+        self.assertTrue(self.scan(self.tickets[0])['success'])
+        with CaptureQueriesContext(connection) as queries:
+            self.assertTrue(self.scan(self.tickets[1])['success'])
+        self.assertFalse([q for q in queries.captured_queries if 'ticketing_userprofile' in q['sql']])
+
+    def test_profile_change_invalidates_role(self):
+        """Changing the role takes effect on the next request"""
+        self.assertTrue(self.scan(self.tickets[0])['success'])
+        self.profile.role = 'fan'
+        self.profile.save()
+        self.assertEqual(self.scan(self.tickets[1])['error'], 'Access denied. Gateman privileges required.')
+        response = self.client.get('/gateman-scanner/')
+        self.assertRedirects(response, '/')
+
+
+@override_settings(LOGIN_THROTTLE_USERNAME=(3, 300), LOGIN_THROTTLE_IP=(10, 300))
+class LoginThrottleTest(TestCase):
+    def setUp(self):
+        """Set up a fan with a profile"""
+        cache.clear()
+        self.client = Client()
+        self.user = User.objects.create_user(username='fan', password='testpass')
+        UserProfile.objects.create(user=self.user, role='fan')
+
+    def login(self, password):
+        return self.client.post('/login/', {'username': 'fan', 'password': password})
+
+    def test_password_checked_once(self):
+        """A successful login authenticates exactly once"""
+        with mock.patch('django.contrib.auth.backends.ModelBackend.authenticate',
+                        autospec=True, return_value=self.user) as authenticate:
+            response = self.login('testpass')
+        self.assertRedirects(response, '/')
+        self.assertEqual(authenticate.call_count, 1)
+
+    def test_failures_throttle_before_hashing(self):
+        """After the limit, even the right password is refused without authenticating"""
+        for _ in range(3):
+            self.assertEqual(self.login('wrong').status_code, 200)
+        with mock.patch('django.contrib.auth.backends.ModelBackend.authenticate') as authenticate:
+            response = self.login('testpass')
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response['Retry-After']), 0)
+        authenticate.assert_not_called()
+
+    def test_success_clears_username_failures(self):
+        """A successful login resets the username's failure count"""
+        for _ in range(2):
+            self.login('wrong')
+        self.assertRedirects(self.login('testpass'), '/')
+        self.client.logout()
+        for _ in range(2):
+            self.login('wrong')
+        self.assertRedirects(self.login('testpass'), '/')
+
+    def test_window_slides(self):
+        """Failures older than the window stop counting, from the end of their six-second slice"""
+        throttle = SlidingWindowThrottle('test', limit=2, window=60)
+        with mock.patch('ticketing.throttling.time.time', return_value=1000.0):
+            throttle.hit('fan')
+        with mock.patch('ticketing.throttling.time.time', return_value=1030.0):
+            throttle.hit('fan')
+            self.assertEqual(throttle.retry_after('fan'), 33)
+        with mock.patch('ticketing.throttling.time.time', return_value=1061.0):
+            self.assertEqual(throttle.retry_after('fan'), 2)
+        with mock.patch('ticketing.throttling.time.time', return_value=1062.0):
+            self.assertEqual(throttle.retry_after('fan'), 0)
+            self.assertEqual(throttle.failures('fan'), 1)
+
+    def test_concurrent_failures_are_all_counted(self):
+        """Parallel failures raise one atomic counter instead of overwriting each other"""
+        throttle = SlidingWindowThrottle('test', limit=1000, window=60)
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(lambda _attempt: throttle.hit('fan'), range(400)))
+        self.assertEqual(throttle.failures('fan'), 400)
+        throttle.reset('fan')
+        self.assertEqual(throttle.failures('fan'), 0)
+
+    def test_deploy_check_wants_a_shared_cache(self):
+        """check --deploy warns while the cache is per-process"""
+        self.assertEqual([warning.id for warning in check_shared_cache(None)], ['ticketing.W001'])
+        redis = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://cache'}}
+        with self.settings(CACHES=redis):
+            self.assertEqual(check_shared_cache(None), [])
+
+
+class LiveMatchPushTest(TransactionTestCase):
+    def setUp(self):
+        """Set up a live match and a fan"""
+        self.user = User.objects.create_user(username='fan', password='testpass')
+        self.match = Match.objects.create(
+            title="Bo Rangers FC vs Team A",
+            date=timezone.now(),
+            home_team="Bo Rangers FC",
+            opponent="Team A",
+            venue="Bo Stadium",
+            status="live",
+            matchday=1,
+            home_score=0,
+            away_score=0,
+        )
+
+    async def test_update_fans_out_to_every_subscriber(self):
+        """One refresh is encoded once and queued for all viewers, with replay on reconnect"""
+        async with live_hub.subscribe(self.match.id) as first, live_hub.subscribe(self.match.id) as second:
+            initial = await first.get(1)
+            self.assertEqual(initial.name, 'state')
+            self.assertIs(await second.get(1), initial)
+
+            await MatchEvent.objects.acreate(match=self.match, event_type='goal', minute=12,
+                                             team='home', player_name='Mohamed Kamara')
+            await Match.objects.filter(id=self.match.id).aupdate(home_score=1)
+            live_hub.notify(self.match.id)
+
+            event = await first.get(2)
+            self.assertEqual(event.name, 'match_event')
+            self.assertEqual(event.data['player_name'], 'Mohamed Kamara')
+            state = await first.get(1)
+            self.assertEqual(state.data['home_score'], 1)
+            self.assertEqual(state.data['minute'], 12)
+            self.assertIs(await second.get(1), event)
+            self.assertIs(await second.get(1), state)
+
+            # A reconnecting client only gets what it missed
+            async with live_hub.subscribe(self.match.id, event.id) as third:
+                self.assertIs(await third.get(1), state)
+                self.assertIsNone(await third.get(0.01))
+            # An id from another process falls back to the full state
+            async with live_hub.subscribe(self.match.id, 'feedface.1') as fourth:
+                self.assertEqual((await fourth.get(1)).data['home_score'], 1)
+        self.assertNotIn(self.match.id, live_hub.channels)
+
+    async def test_failed_publisher_ends_streams(self):
+        """A publisher error is logged, ends every stream and frees the match for a fresh publisher"""
+        failure = OperationalError('database is locked')
+        with mock.patch.object(MatchChannel, 'refresh', side_effect=failure), \
+                self.assertLogs('ticketing.live', 'ERROR'):
+            chunks = await asyncio.wait_for(self.read_stream(), 5)
+        self.assertEqual(chunks, [])
+        self.assertNotIn(self.match.id, live_hub.channels)
+
+        async with live_hub.subscribe(self.match.id) as viewer:
+            self.assertEqual((await viewer.get(1)).name, 'state')
+            with mock.patch.object(MatchChannel, 'refresh', side_effect=failure), \
+                    self.assertLogs('ticketing.live', 'ERROR') as logs:
+                live_hub.notify(self.match.id)
+                with self.assertRaises(ConnectionAbortedError):
+                    await asyncio.wait_for(viewer.get(), 5)
+            self.assertIn(f'Live publisher for match {self.match.id} failed', logs.output[0])
+            self.assertNotIn(self.match.id, live_hub.channels)
+
+    async def read_stream(self):
+        return [chunk async for chunk in sse_stream(self.match.id)]
+
+    async def test_stream_sends_current_state(self):
+        """The SSE endpoint opens with the current score"""
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(f'/match-preview/{self.match.id}/live/')
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertEqual(response['Cache-Control'], 'no-cache')
+        received = asyncio.Queue()
+
+        async def read():
+            async for chunk in response.streaming_content:
+                await received.put(chunk)
+
+        reader = asyncio.ensure_future(read())
+        self.assertEqual(await received.get(), b'retry: 3000\n\n')
+        message = (await received.get()).decode()
+        self.assertIn('event: state\n', message)
+        self.assertIn('"home_score": 0', message)
+        # The ASGI handler cancels the response when the client disconnects
+        reader.cancel()
+        await asyncio.wait([reader])
+        self.assertNotIn(self.match.id, live_hub.channels)
+
+        missing = await self.async_client.get('/match-preview/999999/live/')
+        self.assertEqual(missing.status_code, 404)
+
+    def test_stream_declined_under_wsgi(self):
+        """Without an ASGI server the browser is told not to reconnect"""
+        self.client.force_login(self.user)
+        response = self.client.get(f'/match-preview/{self.match.id}/live/')
+        self.assertEqual(response.status_code, 204)
+
+    async def handshake_headers(self, origin='http://testserver'):
+        await self.async_client.aforce_login(self.user)
+        session_cookie = self.async_client.cookies[settings.SESSION_COOKIE_NAME]
+        return [(b'origin', origin.encode()), (b'cookie', f'{session_cookie.key}={session_cookie.value}'.encode())]
+
+    async def test_websocket_receives_state(self):
+        """The ASGI WebSocket route accepts and sends the state as JSON"""
+        incoming, sent = asyncio.Queue(), asyncio.Queue()
+        await incoming.put({'type': 'websocket.connect'})
+        scope = {'type': 'websocket', 'path': f'/ws/matches/{self.match.id}/',
+                 'headers': await self.handshake_headers()}
+        connection = asyncio.ensure_future(websocket_application(scope, incoming.get, sent.put))
+        self.assertEqual((await sent.get())['type'], 'websocket.accept')
+        message = json.loads((await sent.get())['text'])
+        self.assertEqual(message['type'], 'state')
+        self.assertEqual(message['data']['status'], 'live')
+        await incoming.put({'type': 'websocket.disconnect', 'code': 1000})
+        await asyncio.wait_for(connection, 1)
+        self.assertNotIn(self.match.id, live_hub.channels)
+
+    async def test_websocket_refuses_anonymous_and_foreign_origins(self):
+        """The handshake needs a logged-in session and a page from one of ALLOWED_HOSTS"""
+        signed_in = await self.handshake_headers()
+        for headers in ([(b'origin', b'http://testserver')], signed_in[1:],
+                        await self.handshake_headers(origin='https://evil.example')):
+            incoming, sent = asyncio.Queue(), asyncio.Queue()
+            await incoming.put({'type': 'websocket.connect'})
+            scope = {'type': 'websocket', 'path': f'/ws/matches/{self.match.id}/', 'headers': headers}
+            await asyncio.wait_for(websocket_application(scope, incoming.get, sent.put), 1)
+            self.assertEqual(await sent.get(), {'type': 'websocket.close', 'code': 4403})
+        self.assertNotIn(self.match.id, live_hub.channels)
+
+
+class MatchEventIngestionTest(TestCase):
+    def setUp(self):
+        """Set up a live match and a staff operator"""
+        self.client = Client()
+        self.operator = User.objects.create_user(username='operator', password='testpass', is_staff=True)
+        self.client.force_login(self.operator)
+        self.match = Match.objects.create(
+            title="Bo Rangers FC vs Team A",
+            date=timezone.now(),
+            home_team="Bo Rangers FC",
+            opponent="Team A",
+            venue="Bo Stadium",
+            status="live",
+            matchday=1,
+        )
+        self.url = f'/match-events/{self.match.id}/'
+
+    def post(self, payload):
+        return self.client.post(self.url, json.dumps(payload), content_type='application/json').json()
+
+    def test_batch_updates_counters_in_one_go(self):
+        """Events are bulk inserted and the score and counters incremented"""
+        events = [
+            {'event_type': 'goal', 'minute': 10, 'team': 'home', 'player_name': 'Mohamed Kamara'},
+            {'event_type': 'corner', 'minute': 14, 'team': 'away'},
+            {'event_type': 'yellow_card', 'minute': 20, 'team': 'away', 'player_name': 'David Kargbo'},
+            {'event_type': 'foul', 'minute': 20, 'team': 'away'},
+            {'event_type': 'substitution', 'minute': 30, 'team': 'home'},
+        ]
+        data = self.post({'events': events[:1]})
+        self.assertTrue(data['success'])
+        self.assertEqual(data['score'], '1 - 0')
+
+        # A batch costs the same queries as a single event
+        with CaptureQueriesContext(connection) as single:
+            self.post({'events': [{'event_type': 'goal', 'minute': 50, 'team': 'away'}]})
+        with CaptureQueriesContext(connection) as batch:
+            data = self.post({'events': events[1:]})
+        self.assertEqual(data['created'], 4)
+        self.assertEqual(len(batch), len(single))
+        self.match.refresh_from_db()
+        self.assertEqual((self.match.home_score, self.match.away_score), (1, 1))
+        self.assertEqual(self.match.corners_away, 1)
+        self.assertEqual(self.match.yellow_cards_away, 1)
+        self.assertEqual(self.match.fouls_away, 1)
+        self.assertIsNone(self.match.corners_home)
+        self.assertEqual(self.match.events.count(), 6)
+
+    def test_invalid_batch_stores_nothing(self):
+        """One bad event rejects the whole batch"""
+        data = self.post({'events': [
+            {'event_type': 'goal', 'minute': 10, 'team': 'home'},
+            {'event_type': 'own_goal', 'minute': 12, 'team': 'home'},
+        ]})
+        self.assertFalse(data['success'])
+        self.assertEqual(data['errors'][0]['index'], 1)
+        self.assertIn('event_type', data['errors'][0]['errors'])
+        self.assertFalse(self.match.events.exists())
+
+    def test_non_staff_rejected(self):
+        """Only staff may post events"""
+        fan = User.objects.create_user(username='fan', password='testpass')
+        self.client.force_login(fan)
+        data = self.post({'events': [{'event_type': 'goal', 'minute': 10, 'team': 'home'}]})
+        self.assertFalse(data['success'])
+        self.assertFalse(self.match.events.exists())
+
+    def test_replay_rebuilds_from_events(self):
+        """Replay replaces hand-typed counters with counts of the events"""
+        Match.objects.filter(id=self.match.id).update(home_score=4, corners_home=9)
+        MatchEvent.objects.create(match=self.match, event_type='goal', minute=5, team='home')
+        data = self.post({'events': [{'event_type': 'corner', 'minute': 8, 'team': 'home'}], 'replay': True})
+        self.assertEqual(data['score'], '1 - 0')
+        self.match.refresh_from_db()
+        self.assertEqual(self.match.corners_home, 1)
+        self.assertEqual(self.match.red_cards_home, 0)
+
+        Match.objects.filter(id=self.match.id).update(home_score=7)
+        call_command('rebuild_match_counters', self.match.id, stdout=StringIO())
+        self.match.refresh_from_db()
+        self.assertEqual(self.match.home_score, 1)
+
+    def test_rebuild_queries_do_not_grow_with_matches(self):
+        """Rebuilding completed matches runs the same queries for one match or several"""
+        matches = []
+        for matchday in range(2, 6):
+            match = Match.objects.create(title=f"Bo Rangers FC vs Team {matchday}", date=timezone.now(),
+                                         opponent=f"Team {matchday}", venue="Bo Stadium", matchday=matchday,
+                                         status='completed')
+            MatchEvent.objects.create(match=match, event_type='goal', minute=5, team='home')
+            MatchEvent.objects.create(match=match, event_type='red_card', minute=60, team='away')
+            matches.append(match)
+        Match.objects.filter(id__in=[match.id for match in matches]).update(home_score=9)
+
+        with self.assertNumQueries(7):
+            rebuild_counters(Match.objects.filter(id=matches[0].id))
+        with self.assertNumQueries(7):
+            self.assertEqual(rebuild_counters(Match.objects.filter(id__in=[match.id for match in matches])), 4)
+        for match in Match.objects.filter(id__in=[match.id for match in matches]):
+            self.assertEqual(match.home_score, 1)
+            self.assertIn('The final score was 1 - 0.', match.generated_summary)
+            self.assertIn('1 red cards', match.generated_highlights)
+
+
+class AsyncViewTest(TestCase):
+    def setUp(self):
+        """Set up a gateman and a paid ticket"""
+        cache.clear()
+        self.gateman = User.objects.create_user(username='gate', password='testpass')
+        UserProfile.objects.create(user=self.gateman, role='gateman')
+        fan = User.objects.create_user(username='fan', password='testpass')
+        match = Match.objects.create(
+            title="Bo Rangers FC vs Team A", date=timezone.now(), opponent="Team A",
+            venue="Bo Stadium", matchday=1,
+        )
+        category = TicketCategory.objects.create(name='Regular', price=50)
+        self.ticket = Ticket.objects.create(user=fan, match=match, ticket_category=category, payment_status='completed')
+
+    def test_asgi_stack_runs_without_sync_adapters(self):
+        """Every middleware runs natively under ASGI, so async views stay on the event loop"""
+        with self.assertNoLogs('django.request', 'DEBUG'):
+            ASGIHandler()
+
+    async def test_scan_under_asgi(self):
+        """A ticket is admitted once, with one conditional UPDATE"""
+        await self.async_client.aforce_login(self.gateman)
+        payload = json.dumps({'ticket_id': str(self.ticket.ticket_id)})
+        first = await self.async_client.post('/scan-ticket/', payload, content_type='application/json')
+        second = await self.async_client.post('/scan-ticket/', payload, content_type='application/json')
+        self.assertTrue(first.json()['success'])
+        self.assertEqual(first.json()['ticket_info']['user'], 'fan')
+        self.assertIn('already scanned', second.json()['error'])
+
+        fan = await self.async_client.post('/scan-ticket/', json.dumps({'ticket_id': str(uuid.uuid4())}),
+                                           content_type='application/json')
+        self.assertEqual(fan.json()['error'], 'Ticket not found')
+
+    async def test_load_more_news_under_asgi(self):
+        """News pages are counted and fetched with the async ORM"""
+        author = await User.objects.aget(username='fan')
+        await News.objects.abulk_create(
+            News(title=f"Test News Article {i}", body="Body", author=author, category='general') for i in range(12)
+        )
+        response = await self.async_client.get('/load-more-news/?page=2&category=all')
+        data = response.json()
+        self.assertFalse(data['has_next'])
+        self.assertEqual(data['articles_html'].count('<article'), 2)
+        self.assertIn('ETag', response)
+
+
+class StartupTimeTest(TestCase):
+    def test_worker_boots_without_pdf_and_imaging_libraries(self):
+        """reportlab and qrcode load on first use, not when a worker starts"""
+        out = StringIO()
+        # Generous budget: the timing itself is left to the benchmark, the lazy imports are checked here
+        call_command('benchmark_startup', '--runs', '1', '--budget', '10000', stdout=out)
+        self.assertIn('Worker boot', out.getvalue())
+        self.assertNotIn('reportlab', out.getvalue())
+
+    def test_report_pdfs_still_render(self):
+        """The PDF downloads import reportlab themselves"""
+        admin = User.objects.create_user(username='admin', password='testpass', is_staff=True)
+        match = Match.objects.create(
+            title="Bo Rangers FC vs Team A", date=timezone.now(), opponent="Team A",
+            venue="Bo Stadium", matchday=1,
+        )
+        report = Report.objects.create(match=match, tickets_sold=10, revenue=500)
+        self.client.force_login(admin)
+        for url in ('/export-reports-pdf/', f'/download-report/{report.id}/'):
+            response = self.client.get(url)
+            self.assertEqual(response['Content-Type'], 'application/pdf')
+            self.assertTrue(response.content.startswith(b'%PDF'))
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class FanImportTest(TestCase):
+    def setUp(self):
+        """An existing fan and a scratch folder for the member files"""
+        existing = User.objects.create_user(username='Taken')
+        UserProfile.objects.create(user=existing, phone='+232 76 000001', role='fan')
+        self.folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.folder)
+
+    ROWS = [
+        ['Username', 'Password', 'Email', 'First Name', 'Last Name', 'Phone'],
+        ['kamara', 'Leone-Stars-1977', 'kamara@example.com', 'Abu', 'Kamara', '+232 76 123456'],
+        ['sesay', '', '', '', '', '076-654321'],
+        ['taken', '', '', '', '', ''],
+        ['KAMARA', '', '', '', '', ''],
+        ['bangura', '', 'not-an-email', '', '', '+23276000001'],
+        ['conteh', '', '', '', '', '(076) 654 321'],
+    ]
+
+    def write_csv(self, rows):
+        path = os.path.join(self.folder, 'members.csv')
+        with open(path, 'w', newline='') as f:
+            csv.writer(f).writerows(rows)
+        return path
+
+    def test_valid_rows_become_fans(self):
+        """Rows are checked against the file and existing accounts, then bulk created"""
+        result = import_fans(self.write_csv(self.ROWS), workers=2, chunk_size=1)
+        self.assertEqual(result.created, 2)
+        self.assertEqual({number: errors for number, _username, errors in result.rejected}, {
+            4: ['Username is already registered'],
+            5: ['Username duplicates row 2'],
+            6: ['Enter a valid email address.', 'Phone number is already registered'],
+            7: ['Phone number duplicates row 3'],
+        })
+
+        kamara = User.objects.get(username='kamara')
+        self.assertTrue(kamara.check_password('Leone-Stars-1977'))
+        self.assertEqual((kamara.first_name, kamara.userprofile.phone, kamara.userprofile.role),
+                         ('Abu', '+23276123456', 'fan'))
+        self.assertFalse(User.objects.get(username='sesay').has_usable_password())
+
+    def test_dry_run_and_command(self):
+        """A dry run creates nobody; the command reports and writes the rejects"""
+        path = self.write_csv(self.ROWS)
+        self.assertEqual(import_fans(path, dry_run=True).created, 2)
+        self.assertFalse(User.objects.filter(username='kamara').exists())
+
+        rejects = os.path.join(self.folder, 'rejects.csv')
+        out = StringIO()
+        call_command('import_fans', path, '--workers', '1', '--rejects', rejects, stdout=out)
+        self.assertIn('Created 2 fans, rejected 4 rows', out.getvalue())
+        with open(rejects) as f:
+            self.assertEqual(len(f.readlines()), 5)
+
+        with self.assertRaisesMessage(CommandError, 'no "username" column'):
+            call_command('import_fans', self.write_csv([['name'], ['x']]), stdout=StringIO())
+
+    @skipUnless(find_spec('openpyxl'), 'openpyxl is not installed')
+    def test_xlsx_import(self):
+        """Spreadsheets are streamed the same way; numeric phone cells keep their digits"""
+        from openpyxl import Workbook
+        workbook = Workbook()
+        workbook.active.append(['username', 'phone'])
+        workbook.active.append(['koroma', 23276555555])
+        path = os.path.join(self.folder, 'members.xlsx')
+        workbook.save(path)
+
+        self.assertEqual(import_fans(path, workers=1).created, 1)
+        self.assertEqual(UserProfile.objects.get(user__username='koroma').phone, '23276555555')
+
+
+class MatchdaySimulationTest(LiveServerTestCase):
+    def test_one_fan_journey(self):
+        """The harness can follow the real flow from registration to the gate"""
+        simulation = MatchdaySimulation(self.live_server_url, fans=1, duration=0.1)
+        simulation.setup()
+        results = simulation.run()
+
+        self.assertEqual(results['journeys'], 1, results['error_samples'])
+        self.assertEqual(list(results['steps']), list(MATCHDAY_STEPS))
+        self.assertTrue(all(stats['errors'] == 0 for stats in results['steps'].values()))
+        self.assertTrue(Ticket.objects.get(user__username__startswith='fan-').is_scanned)
+
+    def test_percentiles(self):
+        """Nearest-rank percentiles over the recorded latencies"""
+        stats = summarise([i / 1000 for i in range(1, 101)], errors=5, elapsed=10)
+        self.assertEqual((stats['p50_ms'], stats['p95_ms'], stats['p99_ms']), (50, 95, 99))
+        self.assertEqual((stats['throughput'], stats['error_rate']), (9.5, 0.05))
+
+
+class MicrobenchTest(TestCase):
+    def test_committed_baseline_covers_every_benchmark(self):
+        """Every hot path has a committed baseline to compare against"""
+        path = os.path.join(settings.BASE_DIR, 'ticketing', 'microbench_baseline.json')
+        with open(path) as f:
+            self.assertEqual(set(json.load(f)['benchmarks']), set(BENCHMARKS))
+
+    def test_regressions_fail_the_run(self):
+        """A benchmark much slower than its baseline fails the command"""
+        folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, folder)
+        path = os.path.join(folder, 'baseline.json')
+        options = ['match_summary', '--warmup', '0', '--repeat', '1', '--baseline', path]
+        call_command('microbench', *options, '--save-baseline', stdout=StringIO())
+
+        out = StringIO()
+        call_command('microbench', *options, '--threshold', '1', stdout=out)
+        self.assertIn('No regressions', out.getvalue())
+
+        with open(path) as f:
+            baseline = json.load(f)
+        baseline['benchmarks']['match_summary']['relative'] /= 5
+        with open(path, 'w') as f:
+            json.dump(baseline, f)
+        with self.assertRaisesMessage(CommandError, 'match_summary'):
+            call_command('microbench', *options, '--threshold', '1', '--confirm', '0', stdout=StringIO())
+
+
+@override_settings(REQUEST_PROFILING=True)
+class RequestProfilingTest(TestCase):
+    def setUp(self):
+        """Start each test with empty per-view windows"""
+        reset_view_stats()
+        self.addCleanup(reset_view_stats)
+
+    def summary(self, view_name):
+        return next(summary for summary in view_summaries() if summary['view'] == view_name)
+
+    def test_query_shapes_ignore_list_lengths_and_limits(self):
+        """Queries differing only in IN-list length or inlined numbers share a shape"""
+        self.assertEqual(
+            fingerprint('SELECT "a" FROM "t" WHERE "id" IN (%s, %s) LIMIT 21'),
+            fingerprint('SELECT "a" FROM "t" WHERE "id" IN (%s) LIMIT 5'),
+        )
+        self.assertEqual(fingerprint('INSERT INTO "t" ("a", "b") VALUES (%s, %s), (%s, %s), (%s, %s)'),
+                         'INSERT INTO "t" ("a", "b") VALUES (...), ...')
+        self.assertNotEqual(fingerprint('SELECT "T3"."id" FROM "t" T3'), fingerprint('SELECT "T4"."id" FROM "t" T4'))
+        self.assertEqual(fingerprint("SELECT \"a\" FROM \"t\" WHERE \"key\" = 'x''y' AND \"id\" IN (1, 2)"),
+                         'SELECT "a" FROM "t" WHERE "key" = %s AND "id" IN (...)')
+        self.assertEqual(fingerprint('SAVEPOINT "s1401_x12"'), fingerprint('SAVEPOINT "s1401_x13"'))
+
+    def test_repeated_queries_are_logged_as_n_plus_one(self):
+        """A query run once per row is flagged, logged and counted against the view"""
+        def get_response(request):
+            for match_id in range(6):
+                Match.objects.filter(id=match_id).first()
+            return HttpResponse()
+
+        request = RequestFactory().get('/admin-matches/')
+        request.resolver_match = resolve('/admin-matches/')
+        with self.assertLogs('ticketing.performance', 'WARNING') as logs:
+            RequestProfilingMiddleware(get_response)(request)
+        self.assertIn('probable N+1, 6 times', logs.output[0])
+
+        summary = self.summary('admin_matches')
+        self.assertEqual((summary['requests'], summary['max_queries'], summary['n_plus_one']), (1, 6, 1))
+        self.assertEqual(summary['repeated_shapes'][0][1], 6)
+
+    @override_settings(REQUEST_TIME_BUDGET_MS=0, REQUEST_TIME_BUDGETS_MS={'login': 60_000})
+    def test_password_views_have_their_own_time_budget(self):
+        """A login is held to its own time budget, other views to the default"""
+        def get_response(request):
+            return HttpResponse()
+
+        login = RequestFactory().post('/login/')
+        login.resolver_match = resolve('/login/')
+        with self.assertNoLogs('ticketing.performance', 'WARNING'):
+            RequestProfilingMiddleware(get_response)(login)
+
+        home = RequestFactory().get('/')
+        home.resolver_match = resolve('/')
+        with self.assertLogs('ticketing.performance', 'WARNING') as logs:
+            RequestProfilingMiddleware(get_response)(home)
+        self.assertIn('GET / (home)', logs.output[0])
+        self.assertEqual((self.summary('login')['over_budget'], self.summary('home')['over_budget']), (0, 1))
+
+    async def test_async_view_queries_are_counted(self):
+        """ORM calls an async view makes on worker threads count towards its request"""
+        await self.async_client.get('/load-more-news/?page=1&category=all')
+        summary = self.summary('load_more_news')
+        self.assertGreater(summary['max_queries'], 0)
+        self.assertEqual(summary['n_plus_one'], 0)
+
+    def test_staff_summary_page(self):
+        """Staff see the per-view figures; everyone else is turned away"""
+        self.client.get('/')
+        User.objects.create_user(username='fan', password='testpass')
+        self.client.login(username='fan', password='testpass')
+        self.assertRedirects(self.client.get('/admin-performance/'), '/')
+
+        User.objects.create_user(username='staff', password='testpass', is_staff=True)
+        self.client.login(username='staff', password='testpass')
+        response = self.client.get('/admin-performance/')
+        self.assertContains(response, '<code>home</code>', html=True)
+        self.assertGreater(self.summary('home')['mean_render_ms'], 0)
+
+
+class SyntheticDatasetTest(TestCase):
+    SIZES = {'seasons': 1, 'fans': 60, 'tickets': 600, 'gatemen': 3, 'admins': 1, 'news': 6,
+             'today': date(2026, 10, 19), 'chunk_size': 50}
+
+    def snapshot(self):
+        """The generated rows, without the primary keys the database assigned"""
+        return (
+            list(User.objects.filter(email__endswith=EMAIL_DOMAIN).order_by('username')
+                 .values_list('username', 'password', 'date_joined', 'userprofile__role', 'userprofile__phone')),
+            list(Match.objects.values_list('title', 'date', 'status', 'home_score', 'away_score', 'attendance',
+                                           'corners_home', 'generated_summary')),
+            sorted(Ticket.objects.values_list('ticket_id', 'user__username', 'match__date', 'ticket_category__name',
+                                              'quantity', 'payment_status', 'created_at', 'scanned_by__username')),
+            list(Report.objects.order_by('match__date').values_list('tickets_sold', 'revenue', 'generated_at')),
+            list(News.objects.order_by('date_posted').values_list('title', 'category', 'date_posted')),
+        )
+
+    def test_same_seed_same_data(self):
+        """A seed and anchor day always give the same rows"""
+        SyntheticDataset(seed=7, **self.SIZES).generate()
+        first = self.snapshot()
+        User.objects.filter(email__endswith=EMAIL_DOMAIN).delete()
+        Match.objects.all().delete()
+
+        SyntheticDataset(seed=7, **self.SIZES).generate()
+        self.assertEqual(self.snapshot(), first)
+        self.assertEqual(len(first[2]), 600)
+
+    def test_rows_agree_with_each_other(self):
+        """Reports, scans, attendance and match statistics match the rows behind them"""
+        counts = SyntheticDataset(seed=3, **self.SIZES).generate()
+        self.assertEqual((counts['users'], counts['matches'], counts['tickets'], counts['news']), (64, 32, 600, 6))
+
+        anchor = timezone.now().replace(year=2026, month=10, day=19, hour=12, minute=0, second=0, microsecond=0)
+        scanned = Ticket.objects.filter(is_scanned=True)
+        self.assertTrue(scanned.exists())
+        self.assertFalse(scanned.exclude(payment_status='completed').exists())
+        self.assertFalse(scanned.filter(match__status='upcoming').exists())
+        self.assertFalse(scanned.filter(scanned_at__gt=anchor).exists())
+        self.assertFalse(Ticket.objects.filter(created_at__gt=anchor).exists())
+        self.assertEqual(set(scanned.values_list('scanned_by__userprofile__role', flat=True)), {'gateman'})
+
+        for report in Report.objects.select_related('match'):
+            paid = Ticket.objects.filter(match=report.match, payment_status='completed')
+            self.assertEqual(report.tickets_sold, paid.aggregate(total=Sum('quantity'))['total'])
+        for match in Match.objects.filter(status='completed', home_team='Bo Rangers FC'):
+            self.assertEqual(match.attendance, scanned.filter(match=match).aggregate(total=Sum('quantity'))['total'] or 0)
+            self.assertEqual(match.corners_home, match.events.filter(event_type='corner', team='home').count())
+            self.assertEqual(match.home_score, match.events.filter(event_type='goal', team='home').count())
+            self.assertIn(f'{match.attendance:,} passionate fans', match.generated_summary)
+        self.assertFalse(Match.objects.filter(status='upcoming').exclude(generated_summary='').exists())
+
+    COMMAND_OPTIONS = ['--seasons', '1', '--fans', '20', '--tickets', '100', '--gatemen', '2', '--admins', '1',
+                       '--news', '2', '--today', '2026-10-19']
+
+    @override_settings(DEBUG=True)
+    def test_command(self):
+        """The command reports what it built and refuses to load a second copy"""
+        options = self.COMMAND_OPTIONS + ['--password', 'scale-test']
+        out = StringIO()
+        call_command('generate_dataset', *options, '--disable-constraints', stdout=out)
+        self.assertIn('Generated', out.getvalue())
+        self.assertNotIn('Password of every generated account', out.getvalue())
+        self.assertEqual(Ticket.objects.count(), 100)
+        self.assertTrue(User.objects.filter(userprofile__role='gateman').first().check_password('scale-test'))
+
+        with self.assertRaisesMessage(CommandError, 'already loaded'):
+            call_command('generate_dataset', *options, stdout=StringIO())
+
+    def test_command_guards_production(self):
+        """Without DEBUG it needs --force, and without --password the accounts get a random one"""
+        with self.assertRaisesMessage(CommandError, '--force'):
+            call_command('generate_dataset', *self.COMMAND_OPTIONS, stdout=StringIO())
+        self.assertFalse(User.objects.exists())
+
+        out = StringIO()
+        call_command('generate_dataset', *self.COMMAND_OPTIONS, '--force', stdout=out)
+        password = out.getvalue().split('Password of every generated account: ')[1].split()[0]
+        admin = User.objects.filter(is_staff=True).first()
+        self.assertTrue(admin.check_password(password))
+        self.assertFalse(admin.check_password('password123'))
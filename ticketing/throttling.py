@@ -0,0 +1,142 @@
+"""
+Sliding-window login throttling backed by the Django cache.
+
+Failed logins are counted per username and per client IP. Each window is
+split into BUCKETS slices, and each slice has its own counter, created
+with cache.add and raised with cache.incr. Those are atomic in every
+backend, so concurrent failures are all counted. A client is blocked while
+``limit`` failures fall inside the trailing window, never until some fixed
+window boundary. A failure counts from the end of its slice, so the block
+can outlast the window by up to one slice. Throttled attempts are refused
+before the password is hashed.
+
+The counters only hold across server workers if the cache is shared by
+them; ``check --deploy`` warns when it is per-process (see settings.CACHES).
+"""
+import hashlib
+import time
+from django.conf import settings
+from django.core import checks
+from django.core.cache import cache
+
+CACHE_PREFIX = 'login-throttle:'
+# Counters per window; more means a closer fit to the window and more keys per check
+BUCKETS = 10
+PER_PROCESS_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+class SlidingWindowThrottle:
+    def __init__(self, scope, limit, window):
+        self.scope = scope
+        self.limit = limit
+        self.window = window
+        self.width = window / BUCKETS
+
+    def key(self, ident, bucket):
+        digest = hashlib.sha256(ident.encode('utf-8')).hexdigest()[:32]
+        return f'{CACHE_PREFIX}{self.scope}:{digest}:{bucket}'
+
+    def _buckets(self, ident, now):
+        """[(key, bucket)] for every slice that may still hold failures within the window"""
+        current = int(now // self.width)
+        return [(self.key(ident, bucket), bucket) for bucket in range(current - BUCKETS, current + 1)]
+
+    def _counts(self, ident, now):
+        """[(expiry, failures)] for the slices still counting, oldest first"""
+        buckets = self._buckets(ident, now)
+        found = cache.get_many([key for key, _bucket in buckets])
+        counts = []
+        for key, bucket in buckets:
+            expiry = (bucket + 1) * self.width + self.window
+            if found.get(key) and expiry > now:
+                counts.append((expiry, found[key]))
+        return counts
+
+    def failures(self, ident):
+        """Failures counted for ``ident`` in the trailing window"""
+        return sum(count for _expiry, count in self._counts(ident, time.time()))
+
+    def retry_after(self, ident):
+        """Seconds until ``ident`` may try again, or 0"""
+        now = time.time()
+        counts = self._counts(ident, now)
+        total = sum(count for _expiry, count in counts)
+        for expiry, count in counts:
+            if total < self.limit:
+                break
+            total -= count
+            if total < self.limit:
+                return int(expiry - now) + 1
+        return 0
+
+    def hit(self, ident):
+        now = time.time()
+        key = self.key(ident, int(now // self.width))
+        timeout = int(self.window + self.width) + 1
+        cache.add(key, 0, timeout)
+        try:
+            cache.incr(key)
+        except ValueError:
+            # Evicted between add and incr
+            cache.add(key, 1, timeout)
+
+    def reset(self, ident):
+        cache.delete_many([key for key, _bucket in self._buckets(ident, time.time())])
+
+
+def check_shared_cache(app_configs, **kwargs):
+    """Login throttling needs a cache that every server worker shares"""
+    backend = settings.CACHES['default']['BACKEND']
+    if backend in PER_PROCESS_CACHES:
+        return [checks.Warning(
+            f'The default cache ({backend}) is per-process, so each server worker '
+            'counts failed logins on its own and throttling is weaker.',
+            hint='Set DJANGO_REDIS_URL, or configure a shared CACHES backend.',
+            id='ticketing.W001',
+        )]
+    return []
+
+
+def _throttles():
+    username_limit, username_window = getattr(settings, 'LOGIN_THROTTLE_USERNAME', (5, 300))
+    ip_limit, ip_window = getattr(settings, 'LOGIN_THROTTLE_IP', (50, 300))
+    return (
+        SlidingWindowThrottle('username', username_limit, username_window),
+        SlidingWindowThrottle('ip', ip_limit, ip_window),
+    )
+
+
+def client_ip(request):
+    """The client address, looking past TRUSTED_PROXY_COUNT reverse proxies"""
+    proxies = getattr(settings, 'TRUSTED_PROXY_COUNT', 0)
+    if proxies:
+        forwarded = [part.strip() for part in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',') if part.strip()]
+        if len(forwarded) >= proxies:
+            return forwarded[-proxies]
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def _idents(request, username):
+    return (username.strip().lower(), client_ip(request))
+
+
+def login_retry_after(request, username):
+    """Seconds the login must wait, or 0 when it may proceed"""
+    return max(
+        throttle.retry_after(ident)
+        for throttle, ident in zip(_throttles(), _idents(request, username))
+    )
+
+
+def record_login_failure(request, username):
+    for throttle, ident in zip(_throttles(), _idents(request, username)):
+        throttle.hit(ident)
+
+
+def clear_login_failures(request, username):
+    """Forget failures for the username after a successful login"""
+    username_throttle = _throttles()[0]
+    username_throttle.reset(_idents(request, username)[0])
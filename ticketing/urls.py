@@ -8,11 +8,13 @@ urlpatterns = [
     path('news/', views.news_list, name='news_list'),
     path('news/<int:news_id>/', views.news_detail, name='news_detail'),
     path('load-more-news/', views.load_more_news, name='load_more_news'),
+    path('news/<int:news_id>/video/', views.stream_news_video, name='stream_news_video'),
     
     # User authentication
     path('login/', views.custom_login, name='login'),
     path('register/', views.register, name='register'),
     path('profile/', views.profile, name='profile'),
+    path('profile/wallet/', views.ticket_wallet, name='ticket_wallet'),
     path('logout/', views.logout_view, name='logout'),
     
     # Ticket booking
@@ -20,6 +22,7 @@ urlpatterns = [
     path('payment/<int:ticket_id>/', views.payment, name='payment'),
     path('ticket/<int:ticket_id>/', views.ticket_detail, name='ticket_detail'),
     path('download-ticket/<uuid:ticket_id>/', views.download_ticket, name='download_ticket'),
+    path('ticket/<uuid:ticket_id>/qr.png', views.ticket_qr, name='ticket_qr'),
     
     # Gateman pages
     path('gateman-scanner/', views.gateman_scanner, name='gateman_scanner'),
@@ -31,9 +34,13 @@ urlpatterns = [
     path('add-match/', views.add_match, name='add_match'),
     path('edit-match/<int:match_id>/', views.edit_match, name='edit_match'),
     path('match-preview/<int:match_id>/', views.match_preview, name='match_preview'),
+    path('match-preview/<int:match_id>/live/', views.live_match_stream, name='live_match_stream'),
     path('admin-news/', views.admin_news, name='admin_news'),
     path('edit-news/<int:news_id>/', views.edit_news, name='edit_news'),
     path('delete-news/<int:news_id>/', views.delete_news, name='delete_news'),
+    path('video-uploads/', views.start_video_upload, name='start_video_upload'),
+    path('video-uploads/<uuid:upload_id>/', views.video_upload_status, name='video_upload_status'),
+    path('video-uploads/<uuid:upload_id>/chunk/', views.upload_video_chunk, name='upload_video_chunk'),
     path('admin-reports/', views.admin_reports, name='admin_reports'),
     path('export-reports-csv/', views.export_reports_csv, name='export_reports_csv'),
     path('export-reports-pdf/', views.export_reports_pdf, name='export_reports_pdf'),
@@ -42,5 +49,7 @@ urlpatterns = [
     path('admin-users/', views.admin_users, name='admin_users'),
     path('delete-gateman/<int:user_id>/', views.delete_gateman, name='delete_gateman'),
     path('delete-admin/<int:user_id>/', views.delete_admin, name='delete_admin'),
+    path('admin-performance/', views.admin_performance, name='admin_performance'),
     path('update-match-status/', views.update_match_status, name='update_match_status'),
+    path('match-events/<int:match_id>/', views.ingest_match_events, name='ingest_match_events'),
 ]
@@ -0,0 +1,127 @@
+"""
+Chunked, resumable uploads for news videos.
+
+The browser declares the file, then sends it in order as raw chunks
+carrying an ``Upload-Offset`` header and optionally the chunk's SHA-256.
+Chunks are written into a part file under CHUNKED_UPLOAD_DIR with no
+database transaction open, so a slow client never holds up other writers
+(on SQLite a write transaction locks the whole database); a client
+that loses its connection asks for the current offset and carries on from
+there. The finished file is checksummed and moved into storage when the
+news form that references it is saved.
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+from django.conf import settings
+from django.core.files import File
+from django.db.models import F
+from django.utils import timezone
+from .models import VideoUpload
+
+COPY_BUFFER_SIZE = 64 * 1024
+
+
+class ChunkError(Exception):
+    """A chunk was rejected; the upload's offset is unchanged"""
+
+
+class AssembledVideo(File):
+    """A reassembled upload that FileSystemStorage can move instead of copy"""
+
+    def temporary_file_path(self):
+        return self.file.name
+
+
+def file_sha256(path):
+    """SHA-256 hex digest of a file, read in small blocks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(COPY_BUFFER_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def receive_chunk(upload, stream, length, offset, chunk_checksum=''):
+    """Append ``length`` bytes read from ``stream`` at ``offset`` to the upload.
+
+    No lock is held while the chunk arrives: it is spooled to a file of its
+    own, then claimed with a conditional UPDATE of the offset, so of two
+    requests for the same offset only one is appended. Raises ChunkError
+    if the chunk does not continue the upload or fails its checksum.
+    """
+    check_chunk(upload, length, offset)
+
+    os.makedirs(settings.CHUNKED_UPLOAD_DIR, exist_ok=True)
+    fd, spool_path = tempfile.mkstemp(dir=settings.CHUNKED_UPLOAD_DIR, prefix=f'{upload.upload_id}.', suffix='.chunk')
+    try:
+        digest = hashlib.sha256()
+        received = 0
+        with os.fdopen(fd, 'wb') as spool:
+            while received < length:
+                block = stream.read(min(COPY_BUFFER_SIZE, length - received))
+                if not block:
+                    break
+                spool.write(block)
+                digest.update(block)
+                received += len(block)
+        if received != length or (chunk_checksum and chunk_checksum.lower() != digest.hexdigest()):
+            raise ChunkError('Chunk was incomplete or failed its checksum')
+
+        claimed = VideoUpload.objects.filter(
+            pk=upload.pk, offset=offset, completed_at__isnull=True
+        ).update(offset=F('offset') + length)
+        if not claimed:
+            upload.refresh_from_db(fields=['offset', 'completed_at'])
+            check_chunk(upload, length, offset)
+            raise ChunkError(f'Expected offset {upload.offset}')
+        try:
+            write_at(upload.temp_path, spool_path, offset)
+        except OSError:
+            VideoUpload.objects.filter(pk=upload.pk, offset=offset + length).update(offset=offset)
+            raise
+    finally:
+        os.remove(spool_path)
+
+    upload.offset = offset + length
+    if upload.offset == upload.size:
+        finish_upload(upload)
+    return upload
+
+
+def check_chunk(upload, length, offset):
+    if upload.is_complete:
+        raise ChunkError('Upload already complete')
+    if offset != upload.offset:
+        raise ChunkError(f'Expected offset {upload.offset}')
+    if length <= 0 or length > settings.VIDEO_UPLOAD_CHUNK_SIZE:
+        raise ChunkError(f'Chunks must be between 1 and {settings.VIDEO_UPLOAD_CHUNK_SIZE} bytes')
+    if offset + length > upload.size:
+        raise ChunkError('Chunk runs past the declared file size')
+
+
+def write_at(path, spool_path, offset):
+    """Copy a spooled chunk into the part file at ``offset``"""
+    part_fd = os.open(path, os.O_RDWR | os.O_CREAT | getattr(os, 'O_BINARY', 0), 0o644)
+    with os.fdopen(part_fd, 'r+b') as part, open(spool_path, 'rb') as spool:
+        part.seek(offset)
+        shutil.copyfileobj(spool, part, COPY_BUFFER_SIZE)
+
+
+def finish_upload(upload):
+    """Verify the whole file once its last chunk is in, restarting it on a mismatch"""
+    checksum = file_sha256(upload.temp_path)
+    if upload.checksum and upload.checksum.lower() != checksum:
+        VideoUpload.objects.filter(pk=upload.pk, offset=upload.size).update(offset=0)
+        upload.offset = 0
+        os.remove(upload.temp_path)
+        raise ChunkError('File checksum does not match; upload restarted')
+    upload.checksum = checksum
+    upload.completed_at = timezone.now()
+    VideoUpload.objects.filter(pk=upload.pk).update(checksum=upload.checksum, completed_at=upload.completed_at)
+
+
+def take_assembled_file(upload):
+    """Return the finished upload as a File ready to assign to News.video"""
+    return AssembledVideo(open(upload.temp_path, 'rb'), name=upload.filename)
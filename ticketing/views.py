@@ -1,30 +1,40 @@
 from django.shortcuts import render, get_object_or_404, redirect
+from django.urls import reverse
 from django.contrib.auth.decorators import login_required
-from django.contrib.auth import login, authenticate, logout
+from django.contrib.auth import login, logout
 from django.contrib.auth.forms import UserCreationForm, AuthenticationForm
 from django.contrib import messages
-from django.http import JsonResponse, HttpResponse
-from django.db.models import Q, Sum, Count, F
+from django.http import JsonResponse, HttpResponse, Http404, StreamingHttpResponse
+from django.db import transaction
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.db.models import Exists, Q, Sum, Count, F, Max, Subquery
+from django.core.paginator import Paginator
+from django.utils.dateparse import parse_date
 from django.utils import timezone
 from django.views.decorators.http import require_http_methods
 from django.template.loader import get_template
 from django.conf import settings
-from .models import Match, Ticket, News, TicketCategory, UserProfile, Report
-from .forms import TicketBookingForm, NewsForm, GatemanCreationForm, AdminCreationForm, MatchForm
+from .models import Match, Ticket, News, RelatedNews, TicketCategory, UserProfile, Report, VideoUpload
+from .forms import TicketBookingForm, NewsForm, GatemanCreationForm, AdminCreationForm, MatchForm, MatchEventForm
+from .caching import conditional_page, content_version, combine_versions
+from .images import derivatives_version
+from .match_summaries import generate_match_summary, generate_match_highlights
+from .match_stats import ingest_events
+from .qr_codes import payload_digest, qr_payload, qr_png
+from .pdfs import match_report_pdf, sales_reports_pdf, ticket_pdf
+from .live import sse_stream
+from .request_profiling import view_summaries
+from .roles import get_role, role_required
+from .throttling import clear_login_failures, login_retry_after, record_login_failure
+from .streaming import ranged_file_response
+from .video_uploads import ChunkError, receive_chunk
 from django.contrib.auth.models import User
 import json
 import csv
 import os
-from datetime import datetime
-from io import BytesIO
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import letter, A4
-from reportlab.lib.units import inch
-from reportlab.lib.colors import black, green, gold
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image
-from reportlab.lib.enums import TA_CENTER, TA_LEFT
-from io import BytesIO
+from datetime import datetime, timedelta, timezone as dt_timezone
 
 
 def get_upcoming_matches(limit=None):
@@ -35,6 +45,50 @@ def get_upcoming_matches(limit=None):
     return matches
 
 
+def home_version(request):
+    """Content version for the homepage: upcoming matches, all news and their image derivatives"""
+    return combine_versions(
+        content_version(Match.objects.filter(status='upcoming')),
+        content_version(News.objects.all()),
+        derivatives_version(),
+    )
+
+
+def fixtures_version(request):
+    """Content version for the fixtures page and its logo derivatives"""
+    return combine_versions(content_version(Match.objects.all()), derivatives_version())
+
+
+def news_version(request, *args, **kwargs):
+    """Content version for news listings and their image derivatives"""
+    return combine_versions(content_version(News.objects.all()), derivatives_version())
+
+
+def fallback_related_news(news_id):
+    """Articles in the same category, listed as related until the article is indexed"""
+    category = News.objects.filter(id=news_id).values('category')
+    return News.objects.filter(category=Subquery(category)).exclude(id=news_id)
+
+
+def article_version(request, news_id):
+    """Content version for one article, the related articles it lists and their image derivatives"""
+    related_ids = RelatedNews.objects.filter(article_id=news_id).values('related_id')
+    not_indexed = ~Exists(RelatedNews.objects.filter(article_id=news_id))
+    return combine_versions(
+        content_version(News.objects.filter(
+            Q(id=news_id) | Q(id__in=related_ids)
+            | Q(not_indexed, id__in=fallback_related_news(news_id).values('id'))
+        )),
+        derivatives_version(),
+    )
+
+
+def match_version(request, match_id):
+    """Content version for a single match, bumped by its events too"""
+    return content_version(Match.objects.filter(id=match_id))
+
+
+@conditional_page(home_version)
 def home(request):
     """Homepage with featured matches and news"""
     # Get upcoming matches using the same logic as fixtures page
@@ -50,6 +104,7 @@ def home(request):
     return render(request, 'ticketing/home.html', context)
 
 
+@conditional_page(fixtures_version)
 def fixtures(request):
     """Display match fixtures with filtering"""
     status_filter = request.GET.get('status', 'all')
@@ -125,25 +180,33 @@ def book_ticket(request, match_id):
 @login_required
 def payment(request, ticket_id):
     """Mock payment page"""
-    ticket = get_object_or_404(Ticket, id=ticket_id, user=request.user)
+    ticket = get_object_or_404(Ticket.objects.select_related('match', 'ticket_category'), id=ticket_id, user=request.user)
     
     if request.method == 'POST':
         # Mock payment processing
         payment_method = request.POST.get('payment_method')
         phone_number = request.POST.get('phone_number')
         
-        # Simulate payment success
-        ticket.payment_status = 'completed'
-        ticket.save()  # This will trigger QR code generation
-        
-        # Update report
-        report, created = Report.objects.get_or_create(
-            match=ticket.match,
-            defaults={'tickets_sold': 0, 'revenue': 0}
-        )
-        report.tickets_sold += ticket.quantity
-        report.revenue += ticket.total_price()
-        report.save()
+        # Simulate payment success. The status check and the report update
+        # run in one write transaction so a double submit counts once.
+        with transaction.atomic():
+            ticket = get_object_or_404(
+                Ticket.objects.select_for_update().select_related('match', 'ticket_category'),
+                id=ticket_id, user=request.user
+            )
+            if ticket.payment_status != 'completed':
+                ticket.payment_status = 'completed'
+                ticket.save(update_fields=['payment_status'])
+                
+                # Update report
+                report, created = Report.objects.get_or_create(
+                    match=ticket.match,
+                    defaults={'tickets_sold': 0, 'revenue': 0}
+                )
+                Report.objects.filter(pk=report.pk).update(
+                    tickets_sold=F('tickets_sold') + ticket.quantity,
+                    revenue=F('revenue') + ticket.total_price(),
+                )
         
         messages.success(request, 'Payment successful! Your ticket has been generated.')
         return redirect('ticket_detail', ticket_id=ticket.id)
@@ -157,7 +220,9 @@ def payment(request, ticket_id):
 @login_required
 def ticket_detail(request, ticket_id):
     """Display ticket details with QR code"""
-    ticket = get_object_or_404(Ticket, id=ticket_id, user=request.user)
+    ticket = get_object_or_404(
+        Ticket.objects.select_related('match', 'ticket_category', 'user'), id=ticket_id, user=request.user
+    )
     
     context = {
         'ticket': ticket,
@@ -165,10 +230,29 @@ def ticket_detail(request, ticket_id):
     return render(request, 'ticketing/ticket_detail.html', context)
 
 
+@login_required
+def ticket_qr(request, ticket_id):
+    """Serve a ticket's QR code, rendered on demand and cached"""
+    tickets = Ticket.objects.select_related('match', 'user', 'ticket_category')
+    if not request.user.is_staff:
+        tickets = tickets.filter(user=request.user)
+    ticket = get_object_or_404(tickets, ticket_id=ticket_id, payment_status='completed')
+    
+    # The ETag is the payload digest, so a revalidation never touches the image
+    payload = qr_payload(ticket)
+    digest = payload_digest(payload)
+    etag = f'"{digest}"'
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(qr_png(payload, digest), content_type='image/png')
+    response['ETag'] = etag
+    patch_cache_control(response, private=True, max_age=86400)
+    return response
+
+
+@conditional_page(news_version)
 def news_list(request):
     """Display news articles with pagination"""
-    from django.core.paginator import Paginator
-    
     category_filter = request.GET.get('category', 'all')
     page_number = request.GET.get('page', 1)
     articles_per_page = 10  # Number of articles to show per page
@@ -179,7 +263,7 @@ def news_list(request):
         news_articles = News.objects.filter(category=category_filter).order_by('-date_posted')
     
     # Create paginator
-    paginator = Paginator(news_articles, articles_per_page)
+    paginator = Paginator(news_articles.select_related('author'), articles_per_page)
     page_obj = paginator.get_page(page_number)
     
     categories = News.CATEGORY_CHOICES
@@ -195,10 +279,14 @@ def news_list(request):
     return render(request, 'ticketing/news_list.html', context)
 
 
+@conditional_page(article_version)
 def news_detail(request, news_id):
     """Display individual news article"""
     article = get_object_or_404(News, id=news_id)
-    related_news = News.objects.filter(category=article.category).exclude(id=article.id)[:3]
+    related_news = [entry.related for entry in article.related_entries.select_related('related')[:3]]
+    if not related_news:
+        # Article not indexed yet: fall back to the same category
+        related_news = fallback_related_news(article.id)[:3]
     
     context = {
         'article': article,
@@ -207,9 +295,9 @@ def news_detail(request, news_id):
     return render(request, 'ticketing/news_detail.html', context)
 
 
-def load_more_news(request):
+@conditional_page(news_version)
+async def load_more_news(request):
     """AJAX endpoint to load more news articles"""
-    from django.core.paginator import Paginator
     from django.template.loader import render_to_string
     
     category_filter = request.GET.get('category', 'all')
@@ -221,8 +309,11 @@ def load_more_news(request):
     else:
         news_articles = News.objects.filter(category=category_filter).order_by('-date_posted')
     
-    paginator = Paginator(news_articles, articles_per_page)
+    paginator = Paginator(news_articles.select_related('author'), articles_per_page)
+    # Count and fetch with the async ORM; the paginator then only does page arithmetic
+    paginator.count = await news_articles.acount()
     page_obj = paginator.get_page(page_number)
+    page_obj.object_list = [article async for article in page_obj.object_list]
     
     # Render the articles HTML
     articles_html = render_to_string('ticketing/news_articles_partial.html', {
@@ -257,17 +348,113 @@ def register(request):
     return render(request, 'registration/register.html', {'form': form})
 
 
+WALLET_PAGE_SIZE = 20
+WALLET_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def encode_wallet_cursor(ticket):
+    """Opaque keyset cursor pointing just after the given ticket"""
+    micros = (ticket.match.date - WALLET_EPOCH) // timedelta(microseconds=1)
+    return f"{micros}.{ticket.id}"
+
+
+def decode_wallet_cursor(cursor):
+    """Return (match_date, ticket_id) from a cursor, or None if it is invalid"""
+    try:
+        micros, ticket_id = cursor.split('.')
+        return WALLET_EPOCH + timedelta(microseconds=int(micros)), int(ticket_id)
+    except (AttributeError, ValueError, OverflowError):
+        return None
+
+
+def get_wallet_page(user, tab, cursor=None, page_size=WALLET_PAGE_SIZE):
+    """One page of a user's tickets with match and category joined in.
+    
+    Upcoming tickets run soonest first and past tickets most recent first.
+    A live match stays upcoming after kick-off until it is completed.
+    Pages are keyed on (match date, ticket id) so the query cost does not
+    grow with how far the fan has scrolled. Returns (tickets, next_cursor).
+    """
+    now = timezone.now()
+    tickets = Ticket.objects.filter(user=user).select_related('match', 'ticket_category')
+    position = decode_wallet_cursor(cursor) if cursor else None
+    upcoming = Q(match__date__gte=now) | Q(match__status='live')
+    
+    if tab == 'past':
+        tickets = tickets.exclude(upcoming).order_by('-match__date', '-id')
+        if position:
+            match_date, ticket_id = position
+            tickets = tickets.filter(Q(match__date__lt=match_date) | Q(match__date=match_date, id__lt=ticket_id))
+    else:
+        tickets = tickets.filter(upcoming).order_by('match__date', 'id')
+        if position:
+            match_date, ticket_id = position
+            tickets = tickets.filter(Q(match__date__gt=match_date) | Q(match__date=match_date, id__gt=ticket_id))
+    
+    # Fetch one extra row to learn whether another page exists
+    tickets = list(tickets[:page_size + 1])
+    next_cursor = None
+    if len(tickets) > page_size:
+        tickets = tickets[:page_size]
+        next_cursor = encode_wallet_cursor(tickets[-1])
+    return tickets, next_cursor
+
+
 @login_required
 def profile(request):
     """User profile page"""
-    user_tickets = Ticket.objects.filter(user=request.user).order_by('-created_at')
+    tab = 'past' if request.GET.get('tab') == 'past' else 'upcoming'
+    user_tickets, next_cursor = get_wallet_page(request.user, tab, request.GET.get('cursor'))
+    
+    ticket_stats = Ticket.objects.filter(user=request.user).aggregate(
+        total=Count('id'),
+        attended=Count('match', filter=Q(is_scanned=True), distinct=True),
+    )
+    recent_tickets = Ticket.objects.filter(user=request.user).select_related('match').order_by('-created_at')[:5]
     
     context = {
         'user_tickets': user_tickets,
+        'current_tab': tab,
+        'next_cursor': next_cursor,
+        'is_first_page': not request.GET.get('cursor'),
+        'total_tickets': ticket_stats['total'],
+        'matches_attended': ticket_stats['attended'],
+        'recent_tickets': recent_tickets,
     }
     return render(request, 'ticketing/profile.html', context)
 
 
+@login_required
+def ticket_wallet(request):
+    """JSON ticket wallet for the mobile app, paginated like the profile page"""
+    tab = 'past' if request.GET.get('tab') == 'past' else 'upcoming'
+    tickets, next_cursor = get_wallet_page(request.user, tab, request.GET.get('cursor'))
+    
+    return JsonResponse({
+        'tab': tab,
+        'tickets': [
+            {
+                'ticket_id': str(ticket.ticket_id),
+                'match': ticket.match.title,
+                'opponent': ticket.match.opponent,
+                'date': ticket.match.date.isoformat(),
+                'venue': ticket.match.venue,
+                'category': ticket.ticket_category.name,
+                'quantity': ticket.quantity,
+                'payment_status': ticket.payment_status,
+                'is_scanned': ticket.is_scanned,
+                'qr_code': (
+                    reverse('ticket_qr', args=[ticket.ticket_id])
+                    if ticket.payment_status == 'completed' else None
+                ),
+                'download_url': reverse('download_ticket', args=[ticket.ticket_id]),
+            }
+            for ticket in tickets
+        ],
+        'next_cursor': next_cursor,
+    })
+
+
 def logout_view(request):
     """Log out the user and redirect to login page"""
     logout(request)
@@ -277,27 +464,35 @@ def logout_view(request):
 def custom_login(request):
     """Custom login view that redirects based on user role"""
     if request.method == 'POST':
+        username = request.POST.get('username', '')
+        
+        # Refuse throttled attempts before paying for a password hash
+        retry_after = login_retry_after(request, username)
+        if retry_after:
+            messages.error(request, f'Too many failed login attempts. Please try again in {retry_after} seconds.')
+            form = AuthenticationForm(request, initial={'username': username})
+            response = render(request, 'registration/login.html', {'form': form}, status=429)
+            response['Retry-After'] = str(retry_after)
+            return response
+        
         form = AuthenticationForm(request, data=request.POST)
+        # is_valid() authenticates; reuse its user rather than hashing again
         if form.is_valid():
-            username = form.cleaned_data.get('username')
-            password = form.cleaned_data.get('password')
-            user = authenticate(username=username, password=password)
-            if user is not None:
-                login(request, user)
-                
-                # Check user role and redirect accordingly
-                try:
-                    user_profile = UserProfile.objects.get(user=user)
-                    if user_profile.role == 'admin':
-                        return redirect('admin_dashboard')  # Redirect admins to admin dashboard
-                    elif user_profile.role == 'gateman':
-                        return redirect('gateman_scanner')  # Redirect gateman to ticket scanner
-                    else:
-                        return redirect('home')  # Redirect fans to home page
-                except UserProfile.DoesNotExist:
-                    # If no profile exists, create one with default 'fan' role
-                    UserProfile.objects.create(user=user, role='fan')
-                    return redirect('home')
+            user = form.get_user()
+            login(request, user)
+            clear_login_failures(request, username)
+            
+            # Check user role and redirect accordingly
+            role = get_role(user)
+            if role == 'admin':
+                return redirect('admin_dashboard')  # Redirect admins to admin dashboard
+            elif role == 'gateman':
+                return redirect('gateman_scanner')  # Redirect gateman to ticket scanner
+            elif role is None:
+                # If no profile exists, create one with default 'fan' role
+                UserProfile.objects.create(user=user, role='fan')
+            return redirect('home')  # Redirect fans to home page
+        record_login_failure(request, username)
     else:
         form = AuthenticationForm()
     
@@ -320,10 +515,11 @@ def admin_dashboard(request):
         total=Sum('ticket_category__price'))['total'] or 0
     
     upcoming_matches = Match.objects.filter(status='upcoming').count()
-    recent_tickets = Ticket.objects.filter(payment_status='completed').order_by('-created_at')[:5]
+    recent_tickets = Ticket.objects.filter(payment_status='completed').select_related(
+        'user', 'match', 'ticket_category').order_by('-created_at')[:5]
     
     # Chart data for revenue by match
-    reports = Report.objects.all().order_by('-revenue')[:5]
+    reports = Report.objects.select_related('match').order_by('-revenue')[:5]
     chart_data = {
         'labels': [report.match.title for report in reports],
         'revenue': [float(report.revenue) for report in reports],
@@ -399,23 +595,22 @@ def admin_matches(request):
             messages.error(request, 'Match not found.')
         return redirect('admin_matches')
     
-    matches = Match.objects.all().order_by('-date')
-    
-    # Add sold tickets count for each match
-    for match in matches:
-        match.sold_tickets_count = match.ticket_set.filter(payment_status='completed').count()
-    
-    # Calculate counts for different match statuses
-    upcoming_count = matches.filter(status='upcoming').count()
-    completed_count = matches.filter(status='completed').count()
-    live_count = matches.filter(status='live').count()
+    # Sold tickets are counted in the same query as the matches
+    matches = Match.objects.annotate(
+        sold_tickets_count=Count('ticket', filter=Q(ticket__payment_status='completed'))
+    ).order_by('-date')
+    
+    # Calculate counts for different match statuses in one query
+    status_counts = Match.objects.aggregate(
+        total_matches=Count('id'),
+        upcoming_count=Count('id', filter=Q(status='upcoming')),
+        completed_count=Count('id', filter=Q(status='completed')),
+        live_count=Count('id', filter=Q(status='live')),
+    )
     
     context = {
         'matches': matches,
-        'upcoming_count': upcoming_count,
-        'completed_count': completed_count,
-        'live_count': live_count,
-        'total_matches': matches.count(),
+        **status_counts,
     }
     return render(request, 'ticketing/admin_matches.html', context)
 
@@ -471,6 +666,19 @@ def edit_match(request, match_id):
     return render(request, 'ticketing/add_edit_match.html', context)
 
 
+ADMIN_PAGE_SIZE = 25
+
+
+def get_date_range(request):
+    """Read the optional start_date/end_date filters (YYYY-MM-DD) from the query string"""
+    def parse(value):
+        try:
+            return parse_date(value) if value else None
+        except ValueError:
+            return None
+    return parse(request.GET.get('start_date')), parse(request.GET.get('end_date'))
+
+
 @login_required
 def admin_news(request):
     """Admin news management"""
@@ -479,37 +687,43 @@ def admin_news(request):
         return redirect('home')
     
     if request.method == 'POST':
-        form = NewsForm(request.POST, request.FILES)
+        form = NewsForm(request.POST, request.FILES, user=request.user)
         if form.is_valid():
-            news = form.save(commit=False)
-            news.author = request.user
-            news.save()
+            form.instance.author = request.user
+            form.save()
             messages.success(request, 'News article created successfully!')
             return redirect('admin_news')
     else:
         form = NewsForm()
     
-    news_articles = News.objects.all().order_by('-date_posted')
+    start_date, end_date = get_date_range(request)
+    news_articles = News.objects.select_related('author').order_by('-date_posted')
+    if start_date:
+        news_articles = news_articles.filter(date_posted__date__gte=start_date)
+    if end_date:
+        news_articles = news_articles.filter(date_posted__date__lte=end_date)
+    
+    # Calculate all counts in a single conditional-aggregation query
+    category_counts = {
+        f'{category}_count': Count('id', filter=Q(category=category))
+        for category, _ in News.CATEGORY_CHOICES
+    }
+    stats = news_articles.aggregate(
+        total_articles=Count('id'),
+        featured_count=Count('id', filter=Q(is_featured=True)),
+        **category_counts,
+    )
     
-    # Calculate counts for each category
-    total_articles = news_articles.count()
-    featured_count = news_articles.filter(is_featured=True).count()
-    match_recap_count = news_articles.filter(category='match_recap').count()
-    press_release_count = news_articles.filter(category='press_release').count()
-    club_news_count = news_articles.filter(category='club_news').count()
-    transfer_count = news_articles.filter(category='transfer').count()
-    general_count = news_articles.filter(category='general').count()
+    paginator = Paginator(news_articles, ADMIN_PAGE_SIZE)
+    page_obj = paginator.get_page(request.GET.get('page'))
     
     context = {
         'form': form,
-        'news_articles': news_articles,
-        'total_articles': total_articles,
-        'featured_count': featured_count,
-        'match_recap_count': match_recap_count,
-        'press_release_count': press_release_count,
-        'club_news_count': club_news_count,
-        'transfer_count': transfer_count,
-        'general_count': general_count,
+        'news_articles': page_obj,
+        'page_obj': page_obj,
+        'start_date': start_date,
+        'end_date': end_date,
+        **stats,
     }
     return render(request, 'ticketing/admin_news.html', context)
 
@@ -528,7 +742,7 @@ def edit_news(request, news_id):
         return redirect('admin_news')
     
     if request.method == 'POST':
-        form = NewsForm(request.POST, request.FILES, instance=news)
+        form = NewsForm(request.POST, request.FILES, instance=news, user=request.user)
         if form.is_valid():
             form.save()
             messages.success(request, f'News article "{news.title}" updated successfully!')
@@ -565,6 +779,91 @@ def delete_news(request, news_id):
         return JsonResponse({'success': False, 'error': str(e)})
 
 
+@login_required
+@require_http_methods(["POST"])
+def start_video_upload(request):
+    """Begin a chunked news video upload via AJAX"""
+    if not request.user.is_staff:
+        return JsonResponse({'success': False, 'error': 'Access denied. Admin privileges required.'})
+    
+    try:
+        data = json.loads(request.body)
+        filename = os.path.basename(str(data.get('filename', '')))
+        size = int(data.get('size', 0))
+    except (json.JSONDecodeError, TypeError, ValueError):
+        return JsonResponse({'success': False, 'error': 'Invalid JSON data'})
+    
+    if not filename or size <= 0:
+        return JsonResponse({'success': False, 'error': 'Missing filename or size'})
+    if size > settings.VIDEO_UPLOAD_MAX_SIZE:
+        return JsonResponse({'success': False, 'error': 'Video is too large'})
+    
+    upload = VideoUpload.objects.create(
+        user=request.user,
+        filename=filename,
+        size=size,
+        checksum=str(data.get('sha256', ''))[:64],
+    )
+    return JsonResponse({
+        'success': True,
+        'upload_id': str(upload.upload_id),
+        'offset': upload.offset,
+        'chunk_size': settings.VIDEO_UPLOAD_CHUNK_SIZE,
+    })
+
+
+@login_required
+def video_upload_status(request, upload_id):
+    """Report how much of a chunked upload has arrived, so clients can resume"""
+    upload = get_object_or_404(VideoUpload, upload_id=upload_id, user=request.user)
+    return JsonResponse({
+        'success': True,
+        'upload_id': str(upload.upload_id),
+        'offset': upload.offset,
+        'size': upload.size,
+        'complete': upload.is_complete,
+        'chunk_size': settings.VIDEO_UPLOAD_CHUNK_SIZE,
+    })
+
+
+@login_required
+@require_http_methods(["POST", "PUT"])
+def upload_video_chunk(request, upload_id):
+    """Append one raw chunk (with an Upload-Offset header) to a chunked upload"""
+    try:
+        offset = int(request.headers.get('Upload-Offset', ''))
+        length = int(request.headers.get('Content-Length', ''))
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'Missing Upload-Offset or Content-Length header'})
+    
+    upload = get_object_or_404(VideoUpload, upload_id=upload_id, user=request.user)
+    try:
+        receive_chunk(upload, request, length, offset, request.headers.get('Upload-Checksum', ''))
+    except ChunkError as e:
+        return JsonResponse({'success': False, 'error': str(e), 'offset': upload.offset})
+    
+    return JsonResponse({
+        'success': True,
+        'offset': upload.offset,
+        'complete': upload.is_complete,
+        'checksum': upload.checksum if upload.is_complete else None,
+    })
+
+
+def stream_news_video(request, news_id):
+    """Serve a news video with HTTP Range support so players can seek"""
+    news = get_object_or_404(News, id=news_id)
+    if not news.video:
+        raise Http404('This article has no video')
+    try:
+        video = news.video.open('rb')
+    except FileNotFoundError:
+        raise Http404('Video file not found')
+    response = ranged_file_response(request, video, news.video.size)
+    patch_cache_control(response, public=True, max_age=settings.PUBLIC_PAGE_MAX_AGE)
+    return response
+
+
 @login_required
 def admin_reports(request):
     """Admin reports page"""
@@ -572,25 +871,40 @@ def admin_reports(request):
         messages.error(request, 'Access denied. Admin privileges required.')
         return redirect('home')
     
-    reports = Report.objects.all().order_by('-generated_at')
+    start_date, end_date = get_date_range(request)
+    reports = Report.objects.select_related('match').order_by('-generated_at')
+    if start_date:
+        reports = reports.filter(match__date__date__gte=start_date)
+    if end_date:
+        reports = reports.filter(match__date__date__lte=end_date)
+    
+    # Calculate totals in the database rather than over every row
+    totals = reports.aggregate(
+        report_count=Count('id'),
+        total_tickets_sold=Sum('tickets_sold'),
+        total_revenue=Sum('revenue'),
+        highest_match_revenue=Max('revenue'),
+    )
     
-    # Calculate average price per ticket for each report
-    for report in reports:
+    paginator = Paginator(reports, ADMIN_PAGE_SIZE)
+    page_obj = paginator.get_page(request.GET.get('page'))
+    
+    # Calculate average price per ticket for the reports on this page
+    for report in page_obj:
         if report.tickets_sold > 0:
             report.avg_price_per_ticket = report.revenue / report.tickets_sold
         else:
             report.avg_price_per_ticket = 0
     
-    # Calculate totals
-    total_tickets_sold = sum(report.tickets_sold for report in reports)
-    total_revenue = sum(report.revenue for report in reports)
-    highest_match_revenue = max((report.revenue for report in reports), default=0)
-    
     context = {
-        'reports': reports,
-        'total_tickets_sold': total_tickets_sold,
-        'total_revenue': total_revenue,
-        'highest_match_revenue': highest_match_revenue,
+        'reports': page_obj,
+        'page_obj': page_obj,
+        'start_date': start_date,
+        'end_date': end_date,
+        'report_count': totals['report_count'],
+        'total_tickets_sold': totals['total_tickets_sold'] or 0,
+        'total_revenue': totals['total_revenue'] or 0,
+        'highest_match_revenue': totals['highest_match_revenue'] or 0,
     }
     return render(request, 'ticketing/admin_reports.html', context)
 
@@ -612,8 +926,8 @@ def export_reports_csv(request):
     # Write header row
     writer.writerow(['Match', 'Opponent', 'Date', 'Venue', 'Tickets Sold', 'Revenue (Nle)', 'Avg. Ticket Price', 'Report Generated'])
     
-    # Get all reports
-    reports = Report.objects.all().order_by('-generated_at')
+    # Get all reports with their matches
+    reports = Report.objects.select_related('match').order_by('-generated_at')
     
     # Write data rows
     for report in reports:
@@ -641,92 +955,8 @@ def export_reports_pdf(request):
         messages.error(request, 'Access denied. Admin privileges required.')
         return redirect('home')
     
-    # Create a file-like buffer to receive PDF data
-    buffer = BytesIO()
-    
-    # Create the PDF object, using the buffer as its "file"
-    p = canvas.Canvas(buffer, pagesize=letter)
-    width, height = letter
-    
-    # Set up the document with a header
-    p.setFont('Helvetica-Bold', 16)
-    p.drawString(30, height - 50, 'Bo Rangers FC - Sales Reports')
-    p.setFont('Helvetica', 10)
-    p.drawString(30, height - 70, f'Generated on: {datetime.now().strftime("%Y-%m-%d %H:%M")}')
-    p.drawString(30, height - 90, f'Generated by: {request.user.username}')
-    
-    # Add a horizontal line
-    p.line(30, height - 100, width - 30, height - 100)
-    
-    # Get all reports
-    reports = Report.objects.all().order_by('-generated_at')
-    
-    # Calculate totals
-    total_tickets = sum(report.tickets_sold for report in reports)
-    total_revenue = sum(report.revenue for report in reports)
-    
-    # Add summary section
-    p.setFont('Helvetica-Bold', 12)
-    p.drawString(30, height - 130, 'Summary')
-    p.setFont('Helvetica', 10)
-    p.drawString(30, height - 150, f'Total Reports: {reports.count()}')
-    p.drawString(30, height - 170, f'Total Tickets Sold: {total_tickets}')
-    p.drawString(30, height - 190, f'Total Revenue: Nle{float(total_revenue):.2f}')
-    
-    # Add table headers
-    y_position = height - 230
-    p.setFont('Helvetica-Bold', 10)
-    p.drawString(30, y_position, 'Match')
-    p.drawString(180, y_position, 'Date')
-    p.drawString(260, y_position, 'Tickets')
-    p.drawString(320, y_position, 'Revenue (Nle)')
-    p.drawString(420, y_position, 'Generated')
-    p.line(30, y_position - 10, width - 30, y_position - 10)
-    
-    # Add table data
-    y_position -= 30
-    p.setFont('Helvetica', 9)
-    
-    for report in reports:
-        # Check if we need a new page
-        if y_position < 50:
-            p.showPage()
-            p.setFont('Helvetica-Bold', 12)
-            p.drawString(30, height - 50, 'Bo Rangers FC - Sales Reports (Continued)')
-            p.setFont('Helvetica-Bold', 10)
-            p.drawString(30, height - 80, 'Match')
-            p.drawString(180, height - 80, 'Date')
-            p.drawString(260, height - 80, 'Tickets')
-            p.drawString(320, height - 80, 'Revenue (Nle)')
-            p.drawString(420, height - 80, 'Generated')
-            p.line(30, height - 90, width - 30, height - 90)
-            y_position = height - 110
-            p.setFont('Helvetica', 9)
-        
-        # Add report data
-        match_title = f"{report.match.title} vs {report.match.opponent}"
-        if len(match_title) > 25:
-            match_title = match_title[:22] + '...'
-        
-        p.drawString(30, y_position, match_title)
-        p.drawString(180, y_position, report.match.date.strftime('%Y-%m-%d'))
-        p.drawString(260, y_position, str(report.tickets_sold))
-        p.drawString(320, y_position, f"{float(report.revenue):.2f}")
-        p.drawString(420, y_position, report.generated_at.strftime('%Y-%m-%d'))
-        
-        y_position -= 20
-    
-    # Add footer
-    p.showPage()
-    p.setFont('Helvetica', 8)
-    p.drawString(30, 30, 'Bo Rangers FC Ticketing System - Confidential')
-    
-    # Save the PDF
-    p.save()
-    
-    # Get the value of the BytesIO buffer and return the PDF as a response
-    pdf = buffer.getvalue()
-    buffer.close()
+    reports = Report.objects.select_related('match').order_by('-generated_at')
+    pdf = sales_reports_pdf(reports, request.user.username)
     
     # Create the HttpResponse object with PDF headers
     response = HttpResponse(content_type='application/pdf')
@@ -744,44 +974,11 @@ def download_report(request, report_id):
         return redirect('home')
     
     try:
-        report = Report.objects.get(id=report_id)
+        report = Report.objects.select_related('match').get(id=report_id)
     except Report.DoesNotExist:
         messages.error(request, 'Report not found.')
         return redirect('admin_reports')
     
-    # Create a file-like buffer to receive PDF data
-    buffer = BytesIO()
-    
-    # Create the PDF object, using the buffer as its "file"
-    p = canvas.Canvas(buffer, pagesize=letter)
-    width, height = letter
-    
-    # Set up the document with a header
-    p.setFont('Helvetica-Bold', 16)
-    p.drawString(30, height - 50, f'Bo Rangers FC - Match Sales Report')
-    p.setFont('Helvetica-Bold', 14)
-    p.drawString(30, height - 80, f'{report.match.title} vs {report.match.opponent}')
-    
-    p.setFont('Helvetica', 10)
-    p.drawString(30, height - 100, f'Match Date: {report.match.date.strftime("%Y-%m-%d %H:%M")}')
-    p.drawString(30, height - 120, f'Venue: {report.match.venue}')
-    p.drawString(30, height - 140, f'Report Generated: {report.generated_at.strftime("%Y-%m-%d %H:%M")}')
-    
-    # Add a horizontal line
-    p.line(30, height - 160, width - 30, height - 160)
-    
-    # Add summary section
-    p.setFont('Helvetica-Bold', 12)
-    p.drawString(30, height - 190, 'Sales Summary')
-    
-    p.setFont('Helvetica', 10)
-    p.drawString(30, height - 220, f'Tickets Sold: {report.tickets_sold}')
-    p.drawString(30, height - 240, f'Total Revenue: Nle{float(report.revenue):.2f}')
-    
-    # Calculate average price
-    avg_price = report.revenue / report.tickets_sold if report.tickets_sold > 0 else 0
-    p.drawString(30, height - 260, f'Average Ticket Price: Nle{float(avg_price):.2f}')
-    
     # Get ticket category breakdown for this match
     ticket_categories = Ticket.objects.filter(
         match=report.match, 
@@ -791,38 +988,7 @@ def download_report(request, report_id):
         total=Sum(F('ticket_category__price') * F('quantity'))
     )
     
-    # Add category breakdown
-    if ticket_categories:
-        p.setFont('Helvetica-Bold', 12)
-        p.drawString(30, height - 300, 'Category Breakdown')
-        
-        y_position = height - 330
-        p.setFont('Helvetica-Bold', 10)
-        p.drawString(30, y_position, 'Category')
-        p.drawString(200, y_position, 'Tickets Sold')
-        p.drawString(300, y_position, 'Revenue (Nle)')
-        p.line(30, y_position - 10, width - 30, y_position - 10)
-        
-        y_position -= 30
-        p.setFont('Helvetica', 10)
-        
-        for category in ticket_categories:
-            p.drawString(30, y_position, category['ticket_category__name'])
-            p.drawString(200, y_position, str(category['count']))
-            p.drawString(300, y_position, f"{float(category['total']):.2f}")
-            y_position -= 20
-    
-    # Add footer
-    p.showPage()
-    p.setFont('Helvetica', 8)
-    p.drawString(30, 30, 'Bo Rangers FC Ticketing System - Confidential')
-    
-    # Save the PDF
-    p.save()
-    
-    # Get the value of the BytesIO buffer and return the PDF as a response
-    pdf = buffer.getvalue()
-    buffer.close()
+    pdf = match_report_pdf(report, list(ticket_categories))
     
     # Create the HttpResponse object with PDF headers
     response = HttpResponse(content_type='application/pdf')
@@ -859,7 +1025,7 @@ def update_match_status(request):
         
         # Update status
         match.status = new_status
-        match.save()
+        match.save(update_fields=['status', 'updated_at'])
         
         return JsonResponse({
             'success': True, 
@@ -876,6 +1042,55 @@ def update_match_status(request):
         return JsonResponse({'success': False, 'error': str(e)})
 
 
+@login_required
+@require_http_methods(["POST"])
+async def ingest_match_events(request, match_id):
+    """Record a batch of live events and update the match score and counters.
+
+    Expects ``{"events": [{"event_type", "minute", "team", ...}], "replay": false}``.
+    The batch is stored only if every event is valid.
+    """
+    user = await request.auser()
+    if not user.is_staff:
+        return JsonResponse({'success': False, 'error': 'Access denied. Admin privileges required.'})
+    
+    try:
+        data = json.loads(request.body)
+    except json.JSONDecodeError:
+        return JsonResponse({'success': False, 'error': 'Invalid JSON data'})
+    
+    rows = data.get('events') if isinstance(data, dict) else None
+    if not isinstance(rows, list) or not rows:
+        return JsonResponse({'success': False, 'error': 'Missing events'})
+    if len(rows) > settings.MATCH_EVENT_BATCH_LIMIT:
+        return JsonResponse({'success': False, 'error': f'At most {settings.MATCH_EVENT_BATCH_LIMIT} events per batch'})
+    
+    match = await Match.objects.filter(id=match_id).afirst()
+    if match is None:
+        return JsonResponse({'success': False, 'error': 'Match not found'})
+    
+    events = []
+    errors = []
+    for index, row in enumerate(rows):
+        form = MatchEventForm(row if isinstance(row, dict) else {})
+        if form.is_valid():
+            events.append(form.save(commit=False))
+        else:
+            errors.append({'index': index, 'errors': form.errors})
+    if errors:
+        return JsonResponse({'success': False, 'error': 'Invalid events', 'errors': errors})
+    
+    # The insert and counter updates share one transaction, which needs a thread
+    await sync_to_async(ingest_events)(match, events, replay=bool(data.get('replay')))
+    await match.arefresh_from_db()
+    return JsonResponse({
+        'success': True,
+        'created': len(events),
+        'event_ids': [event.id for event in events],
+        'score': match.score_display,
+    })
+
+
 @login_required
 def admin_gatemen(request):
     """Admin gateman management page"""
@@ -902,23 +1117,13 @@ def admin_gatemen(request):
     else:
         form = GatemanCreationForm()
     
-    # Get all gatemen
-    gatemen_profiles = UserProfile.objects.filter(role='gateman').select_related('user')
-    
-    # Get scan statistics for each gateman
-    for profile in gatemen_profiles:
-        profile.total_scans = Ticket.objects.filter(
-            is_scanned=True,
-            scanned_by=profile.user
-        ).count()
-        
-        # Today's scans
-        today = timezone.now().date()
-        profile.today_scans = Ticket.objects.filter(
-            is_scanned=True,
-            scanned_by=profile.user,
-            scanned_at__date=today
-        ).count()
+    # Get all gatemen with their scan statistics, counted in the same query
+    today = timezone.now().date()
+    scanned = Q(user__scanned_tickets__is_scanned=True)
+    gatemen_profiles = UserProfile.objects.filter(role='gateman').select_related('user').annotate(
+        total_scans=Count('user__scanned_tickets', filter=scanned),
+        today_scans=Count('user__scanned_tickets', filter=scanned & Q(user__scanned_tickets__scanned_at__date=today)),
+    ).order_by('id')
     
     context = {
         'form': form,
@@ -985,20 +1190,31 @@ def delete_admin(request, user_id):
         return JsonResponse({'success': False, 'error': str(e)})
 
 
+@login_required
+def admin_performance(request):
+    """Rolling per-view query counts and timings for this server process"""
+    if not request.user.is_staff:
+        messages.error(request, 'Access denied. Admin privileges required.')
+        return redirect('home')
+    
+    context = {
+        'summaries': view_summaries(),
+        'process_id': os.getpid(),
+        'window': settings.REQUEST_PROFILE_WINDOW,
+        'query_budget': settings.REQUEST_QUERY_BUDGET,
+        'time_budget_ms': settings.REQUEST_TIME_BUDGET_MS,
+        'view_time_budgets': sorted(settings.REQUEST_TIME_BUDGETS_MS.items()),
+        'n_plus_one_threshold': settings.N_PLUS_ONE_THRESHOLD,
+        'profiling_enabled': settings.REQUEST_PROFILING,
+    }
+    return render(request, 'ticketing/admin_performance.html', context)
+
+
 # Gateman views
 @login_required
+@role_required('gateman')
 def gateman_scanner(request):
     """Gateman scanner interface with daily statistics"""
-    # Check if user has gateman role
-    try:
-        user_profile = UserProfile.objects.get(user=request.user)
-        if user_profile.role != 'gateman':
-            messages.error(request, 'Access denied. Gateman privileges required.')
-            return redirect('home')
-    except UserProfile.DoesNotExist:
-        messages.error(request, 'Access denied. User profile not found.')
-        return redirect('home')
-    
     # Get today's statistics
     today = timezone.now().date()
     today_scans = Ticket.objects.filter(
@@ -1011,7 +1227,7 @@ def gateman_scanner(request):
     recent_scans = Ticket.objects.filter(
         is_scanned=True,
         scanned_by=request.user
-    ).order_by('-scanned_at')[:10]
+    ).select_related('match', 'user', 'ticket_category').order_by('-scanned_at')[:10]
     
     context = {
         'today_scans': today_scans,
@@ -1022,16 +1238,9 @@ def gateman_scanner(request):
 
 @login_required
 @require_http_methods(["POST"])
-def scan_ticket(request):
+@role_required('gateman', ajax=True)
+async def scan_ticket(request):
     """Process ticket scanning via AJAX"""
-    # Check if user has gateman role
-    try:
-        user_profile = UserProfile.objects.get(user=request.user)
-        if user_profile.role != 'gateman':
-            return JsonResponse({'success': False, 'error': 'Access denied. Gateman privileges required.'})
-    except UserProfile.DoesNotExist:
-        return JsonResponse({'success': False, 'error': 'Access denied. User profile not found.'})
-    
     try:
         data = json.loads(request.body)
         ticket_id = data.get('ticket_id')
@@ -1039,29 +1248,25 @@ def scan_ticket(request):
         if not ticket_id:
             return JsonResponse({'success': False, 'error': 'Missing ticket ID'})
         
-        # Get the ticket
-        try:
-            ticket = Ticket.objects.get(ticket_id=ticket_id)
-        except Ticket.DoesNotExist:
-            return JsonResponse({'success': False, 'error': 'Ticket not found'})
+        # A single conditional UPDATE admits a paid ticket at most once, even
+        # when two gates scan it at the same moment
+        admitted = await Ticket.objects.filter(
+            ticket_id=ticket_id, payment_status='completed', is_scanned=False,
+        ).aupdate(is_scanned=True, scanned_at=timezone.now(), scanned_by=await request.auser())
         
-        # Check if ticket is paid
-        if ticket.payment_status != 'completed':
-            return JsonResponse({'success': False, 'error': 'Ticket payment not completed'})
+        ticket = await Ticket.objects.select_related('match', 'ticket_category', 'user').filter(ticket_id=ticket_id).afirst()
+        if ticket is None:
+            return JsonResponse({'success': False, 'error': 'Ticket not found'})
         
-        # Check if already scanned
-        if ticket.is_scanned:
+        if not admitted:
+            # Check if ticket is paid
+            if ticket.payment_status != 'completed':
+                return JsonResponse({'success': False, 'error': 'Ticket payment not completed'})
             return JsonResponse({
                 'success': False, 
                 'error': f'Ticket already scanned on {ticket.scanned_at.strftime("%Y-%m-%d %H:%M")}'
             })
         
-        # Scan the ticket
-        ticket.is_scanned = True
-        ticket.scanned_at = timezone.now()
-        ticket.scanned_by = request.user
-        ticket.save()
-        
         return JsonResponse({
             'success': True,
             'message': 'Ticket scanned successfully',
@@ -1086,119 +1291,17 @@ def download_ticket(request, ticket_id):
     """Generate and download a professional PDF ticket"""
     try:
         # Get the ticket
-        ticket = get_object_or_404(Ticket, ticket_id=ticket_id, user=request.user)
+        ticket = get_object_or_404(
+            Ticket.objects.select_related('match', 'user', 'ticket_category'),
+            ticket_id=ticket_id, user=request.user,
+        )
         
         # Check if ticket is paid
         if ticket.payment_status != 'completed':
             messages.error(request, 'Ticket payment not completed')
             return redirect('profile')
         
-        # Create PDF in memory
-        buffer = BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=A4, rightMargin=72, leftMargin=72, topMargin=72, bottomMargin=18)
-        
-        # Container for the 'Flowable' objects
-        elements = []
-        
-        # Define styles
-        styles = getSampleStyleSheet()
-        title_style = styles['Title']
-        title_style.alignment = TA_CENTER
-        title_style.fontSize = 24
-        title_style.textColor = green
-        
-        heading_style = styles['Heading2']
-        heading_style.alignment = TA_CENTER
-        heading_style.fontSize = 18
-        heading_style.textColor = black
-        
-        normal_style = styles['Normal']
-        normal_style.fontSize = 12
-        normal_style.alignment = TA_LEFT
-        
-        # Add logo if exists
-        logo_path = os.path.join(settings.MEDIA_ROOT, 'qr_codes', 'Logo.png')
-        if os.path.exists(logo_path):
-            try:
-                logo = Image(logo_path, width=2*inch, height=2*inch)
-                logo.hAlign = 'CENTER'
-                elements.append(logo)
-                elements.append(Spacer(1, 12))
-            except:
-                pass  # Skip logo if there's an issue
-        
-        # Title
-        elements.append(Paragraph("BO RANGERS FC", title_style))
-        elements.append(Paragraph("OFFICIAL MATCH TICKET", heading_style))
-        elements.append(Spacer(1, 24))
-        
-        # Ticket border (decorative line)
-        elements.append(Paragraph("━" * 50, normal_style))
-        elements.append(Spacer(1, 12))
-        
-        # Match Information
-        elements.append(Paragraph(f"<b>MATCH:</b> {ticket.match.title}", normal_style))
-        elements.append(Paragraph(f"<b>OPPONENT:</b> vs {ticket.match.opponent}", normal_style))
-        elements.append(Spacer(1, 12))
-        
-        # Date and Time
-        elements.append(Paragraph(f"<b>DATE:</b> {ticket.match.date.strftime('%A, %B %d, %Y')}", normal_style))
-        elements.append(Paragraph(f"<b>TIME:</b> {ticket.match.date.strftime('%H:%M')}", normal_style))
-        elements.append(Paragraph(f"<b>VENUE:</b> {ticket.match.venue}", normal_style))
-        elements.append(Spacer(1, 12))
-        
-        # Ticket Details
-        elements.append(Paragraph(f"<b>CATEGORY:</b> {ticket.ticket_category.name}", normal_style))
-        elements.append(Paragraph(f"<b>QUANTITY:</b> {ticket.quantity} ticket{'s' if ticket.quantity > 1 else ''}", normal_style))
-        elements.append(Paragraph(f"<b>TICKET HOLDER:</b> {ticket.user.get_full_name() or ticket.user.username}", normal_style))
-        elements.append(Spacer(1, 12))
-        
-        # Price
-        elements.append(Paragraph(f"<b>TOTAL PAID:</b> Nle{ticket.total_price()}", normal_style))
-        elements.append(Spacer(1, 12))
-        
-        # Ticket ID
-        elements.append(Paragraph("━" * 50, normal_style))
-        elements.append(Spacer(1, 12))
-        elements.append(Paragraph(f"<b>TICKET ID:</b> {ticket.ticket_id}", normal_style))
-        elements.append(Paragraph(f"<b>PURCHASED:</b> {ticket.created_at.strftime('%B %d, %Y at %H:%M')}", normal_style))
-        elements.append(Spacer(1, 12))
-        
-        # QR Code
-        if ticket.qr_code:
-            qr_path = os.path.join(settings.MEDIA_ROOT, str(ticket.qr_code))
-            if os.path.exists(qr_path):
-                try:
-                    qr_image = Image(qr_path, width=2*inch, height=2*inch)
-                    qr_image.hAlign = 'CENTER'
-                    elements.append(Paragraph("SCAN QR CODE AT ENTRANCE", heading_style))
-                    elements.append(Spacer(1, 12))
-                    elements.append(qr_image)
-                    elements.append(Spacer(1, 12))
-                except:
-                    pass
-        
-        # Important Information
-        elements.append(Paragraph("━" * 50, normal_style))
-        elements.append(Spacer(1, 12))
-        elements.append(Paragraph("<b>IMPORTANT INFORMATION:</b>", normal_style))
-        elements.append(Paragraph("• Arrive at stadium 30 minutes before kickoff", normal_style))
-        elements.append(Paragraph("• Present QR code at entrance for scanning", normal_style))
-        elements.append(Paragraph("• This ticket is non-transferable", normal_style))
-        elements.append(Paragraph("• Keep this ticket safe until match day", normal_style))
-        elements.append(Paragraph("• Contact: tickets@borangersfc.com for support", normal_style))
-        elements.append(Spacer(1, 24))
-        
-        # Footer
-        elements.append(Paragraph("━" * 50, normal_style))
-        elements.append(Paragraph("Thank you for supporting Bo Rangers FC!", heading_style))
-        
-        # Build PDF
-        doc.build(elements)
-        
-        # Get PDF data
-        pdf_data = buffer.getvalue()
-        buffer.close()
+        pdf_data = ticket_pdf(ticket)
         
         # Create response
         response = HttpResponse(pdf_data, content_type='application/pdf')
@@ -1212,22 +1315,22 @@ def download_ticket(request, ticket_id):
 
 
 @login_required
+@conditional_page(match_version)
 def match_preview(request, match_id):
     """Display detailed preview or summary for a single match."""
     match = get_object_or_404(Match, id=match_id)
     
-    # Get match events for completed matches
+    # Get match events for live and completed matches
     match_events = []
-    if match.is_completed:
-        match_events = match.events.all().order_by('minute')
+    if match.status in ('live', 'completed'):
+        match_events = list(match.events.all().order_by('minute'))
     
-    # Generate match summary if not provided
+    # Fall back to the texts stored when the match was completed
     if match.is_completed and not match.match_summary:
-        match.match_summary = generate_match_summary(match)
+        match.match_summary = match.generated_summary
     
-    # Generate highlights if not provided
     if match.is_completed and not match.highlights:
-        match.highlights = generate_match_highlights(match, match_events)
+        match.highlights = match.generated_highlights
     
     context = {
         'match': match,
@@ -1236,84 +1339,19 @@ def match_preview(request, match_id):
     return render(request, 'ticketing/match_preview.html', context)
 
 
-def generate_match_summary(match):
-    """Generate an auto-generated match summary based on match data."""
-    if not match.is_completed:
-        return ""
-    
-    summary_parts = []
-    
-    # Basic result - handle None case
-    if match.result is None:
-        summary_parts.append(f"Bo Rangers FC played against {match.opponent}")
-    elif match.result == 'Win':
-        summary_parts.append(f"Bo Rangers FC secured a {match.result.lower()} against {match.opponent}")
-    elif match.result == 'Loss':
-        summary_parts.append(f"Bo Rangers FC suffered a {match.result.lower()} to {match.opponent}")
-    elif match.result == 'Draw':
-        summary_parts.append(f"Bo Rangers FC played to a {match.result.lower()} with {match.opponent}")
-    else:
-        summary_parts.append(f"Bo Rangers FC played against {match.opponent}")
-    
-    summary_parts.append(f"in a thrilling encounter at {match.venue}.")
-    
-    # Score details
-    if match.home_score is not None and match.away_score is not None:
-        summary_parts.append(f"The final score was {match.score_display}.")
-    else:
-        summary_parts.append("The match has been completed.")
-    
-    # Attendance
-    if match.attendance:
-        summary_parts.append(f"The match was attended by {match.attendance:,} passionate fans.")
-    
-    # Weather
-    if match.weather:
-        summary_parts.append(f"Match conditions were {match.weather}.")
-    
-    # Key statistics
-    if match.shots_home and match.shots_away:
-        summary_parts.append(f"Bo Rangers had {match.shots_home} shots compared to {match.shots_away} from {match.opponent}.")
-    
-    if match.possession_home and match.possession_away:
-        summary_parts.append(f"Possession was {match.possession_home}% - {match.possession_away}%.")
-    
-    return " ".join(summary_parts)
-
-
-def generate_match_highlights(match, events):
-    """Generate match highlights based on events and statistics."""
-    if not match.is_completed:
-        return ""
-    
-    highlights = []
-    
-    # Goals
-    goal_events = [e for e in events if e.event_type == 'goal']
-    if goal_events:
-        highlights.append(f"⚽ {len(goal_events)} goals were scored during the match.")
-    
-    # Cards
-    yellow_cards = [e for e in events if e.event_type == 'yellow_card']
-    red_cards = [e for e in events if e.event_type == 'red_card']
-    
-    if yellow_cards:
-        highlights.append(f"🟨 {len(yellow_cards)} yellow cards were shown.")
-    if red_cards:
-        highlights.append(f"🟥 {len(red_cards)} red cards were shown.")
-    
-    # Substitutions
-    substitutions = [e for e in events if e.event_type == 'substitution']
-    if substitutions:
-        highlights.append(f"🔄 {len(substitutions)} substitutions were made.")
-    
-    # Key moments
-    if match.shots_on_target_home and match.shots_on_target_away:
-        total_shots_on_target = match.shots_on_target_home + match.shots_on_target_away
-        highlights.append(f"🎯 {total_shots_on_target} shots were on target.")
-    
-    if match.corners_home and match.corners_away:
-        total_corners = match.corners_home + match.corners_away
-        highlights.append(f"🏁 {total_corners} corners were awarded.")
-    
-    return " ".join(highlights)
+@login_required
+async def live_match_stream(request, match_id):
+    """Push score changes and new events for a match as Server-Sent Events"""
+    if not await Match.objects.filter(id=match_id).aexists():
+        raise Http404('Match not found')
+    if not isinstance(request, ASGIRequest):
+        # WSGI would buffer the endless stream; 204 tells EventSource not to retry
+        return HttpResponse(status=204)
+    response = StreamingHttpResponse(
+        sse_stream(match_id, request.headers.get('Last-Event-ID')),
+        content_type='text/event-stream',
+    )
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response